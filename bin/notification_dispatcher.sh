@@ -0,0 +1,6 @@
+#!/bin/bash
+
+set -e
+
+echo "Starting notification dispatcher"
+exec python src/manage.py run_dispatcher
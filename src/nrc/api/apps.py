@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class APIConfig(AppConfig):
+    name = "nrc.api"
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,146 @@
+"""
+Cached authorization of API clients.
+
+The authorization middleware of vng-api-common verifies the JWT of every request
+with the secret of its client, and resolves the scopes of the client from its
+applicaties and autorisaties. Publishers send many requests with the same few
+clients, so the verified token payloads and the resolved scopes are kept in the
+(shared) Django cache for ``API_AUTH_CACHE_TIMEOUT`` seconds.
+
+The cache keys include an authorization version, which is replaced whenever a JWT
+secret, applicatie, autorisatie or the authorizations configuration is saved or
+deleted (see :mod:`nrc.api.signals`).
+"""
+
+import hashlib
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, TypedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+from vng_api_common.authorizations import middleware
+from vng_api_common.authorizations.models import AuthorizationsConfig
+
+from .metrics import auth_cache_hits_counter, auth_cache_misses_counter
+
+AUTH_VERSION_CACHE_KEY = "nrc:auth_version"
+
+# set while the scopes of a client are resolved, during which vng-api-common may
+# store the applicaties and autorisaties that it retrieved
+resolving_scopes: ContextVar[bool] = ContextVar("resolving_scopes", default=False)
+
+
+def get_auth_version() -> str:
+    version = cache.get(AUTH_VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # another process might have set a version in the meantime
+        if not cache.add(AUTH_VERSION_CACHE_KEY, version, timeout=None):
+            version = cache.get(AUTH_VERSION_CACHE_KEY, version)
+    return version
+
+
+def invalidate_auth() -> None:
+    """
+    Discard the cached authorizations of all clients.
+    """
+    cache.set(AUTH_VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_auth_cache_key(kind: str, *parts: str | None) -> str:
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()
+    return f"nrc:auth:{kind}:{get_auth_version()}:{digest}"
+
+
+class ClientScopes(TypedDict):
+    heeft_alle_autorisaties: bool
+    scopes: list[str]
+
+
+class CachedJWTAuth(middleware.JWTAuth):
+    @cached_property
+    def payload(self) -> dict[str, Any] | None:
+        timeout = settings.API_AUTH_CACHE_TIMEOUT
+        if self.encoded is None or timeout <= 0:
+            return super().payload
+
+        # the full token is part of the key, so only tokens that were verified
+        # before are taken from the cache
+        cache_key = get_auth_cache_key("payload", self.encoded)
+        if (payload := cache.get(cache_key)) is not None:
+            auth_cache_hits_counter.add(1, {"type": "payload"})
+            return payload
+
+        auth_cache_misses_counter.add(1, {"type": "payload"})
+        payload = super().payload
+        if payload is None:
+            return payload
+
+        # tokens are not taken from the cache after they expire
+        now = time.time()
+        if (iat := payload.get("iat")) is not None:
+            timeout = min(timeout, int(iat + settings.JWT_EXPIRY - now))
+        if (exp := payload.get("exp")) is not None:
+            timeout = min(timeout, int(exp - now))
+        if timeout > 0:
+            cache.set(cache_key, payload, timeout=timeout)
+        return payload
+
+    def has_auth(self, scopes, component: str | None = None, **fields) -> bool:
+        # authorizations on additional fields (e.g. zaaktypen) are not cached
+        if (
+            scopes is None
+            or fields
+            or settings.API_AUTH_CACHE_TIMEOUT <= 0
+            or self.client_id is None
+        ):
+            return super().has_auth(scopes, component, **fields)
+
+        client_scopes = self.get_client_scopes(component)
+        if client_scopes["heeft_alle_autorisaties"]:
+            return True
+        return scopes.is_contained_in(client_scopes["scopes"])
+
+    def get_client_scopes(self, component: str | None = None) -> ClientScopes:
+        cache_key = get_auth_cache_key("scopes", self.client_id, component)
+        if (client_scopes := cache.get(cache_key)) is not None:
+            auth_cache_hits_counter.add(1, {"type": "scopes"})
+            return client_scopes
+
+        auth_cache_misses_counter.add(1, {"type": "scopes"})
+        token = resolving_scopes.set(True)
+        try:
+            client_scopes = self._resolve_client_scopes(component)
+        finally:
+            resolving_scopes.reset(token)
+
+        cache.set(cache_key, client_scopes, timeout=settings.API_AUTH_CACHE_TIMEOUT)
+        return client_scopes
+
+    def _resolve_client_scopes(self, component: str | None) -> ClientScopes:
+        if component is None:
+            component = AuthorizationsConfig.get_solo().component
+
+        scopes: set[str] = set()
+        for applicatie in self.applicaties:
+            if applicatie.heeft_alle_autorisaties is True:
+                return {"heeft_alle_autorisaties": True, "scopes": []}
+
+            for autorisatie in applicatie.autorisaties.filter(component=component):
+                scopes.update(autorisatie.scopes)
+
+        return {"heeft_alle_autorisaties": False, "scopes": sorted(scopes)}
+
+
+class AuthMiddleware(middleware.AuthMiddleware):
+    """
+    Authorize the API clients with :class:`CachedJWTAuth`.
+    """
+
+    def extract_jwt_payload(self, request) -> None:
+        super().extract_jwt_payload(request)
+        request.jwt_auth = CachedJWTAuth(request.jwt_auth.encoded)
@@ -0,0 +1,274 @@
+"""
+Concurrent delivery of a batch of scheduled notifications.
+
+Instead of starting a Celery task (and blocking a worker thread) per scheduled
+notification, a single task delivers a batch of scheduled notifications concurrently
+with an asynchronous HTTP client. The requests are prepared with the regular
+(cached) clients of the subscriptions, so the authentication is exactly the same as
+for the delivery per task.
+
+The requests are sent with ``httpx`` instead of ``requests``, so they are not logged
+by ``django-log-outgoing-requests`` (which only handles the requests and responses of
+``requests``). Instead, every request is logged (with its URL, status and duration)
+in the ``bulk_delivery_successful`` and ``bulk_delivery_failed`` events.
+
+Like ``requests``, the HTTP client uses the proxy environment variables
+(``HTTPS_PROXY``, ``NO_PROXY``, ...). The certificates to verify the callbacks with
+are the ones ``requests`` would use, including ``REQUESTS_CA_BUNDLE``.
+"""
+
+import asyncio
+import json
+import os
+import ssl
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.translation import gettext as _
+
+import certifi
+import httpx
+import requests
+import structlog
+import urllib3.exceptions
+from oauthlib.oauth2.rfc6749.errors import OAuth2Error
+
+from nrc.datamodel.models import ScheduledNotification
+
+from .clients import get_client
+from .metrics import record_delivery_duration
+from .oauth2 import CachedOAuth2Auth
+from .payloads import get_task_args
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+@dataclass
+class Delivery:
+    scheduled_notif: ScheduledNotification
+    request: requests.PreparedRequest | None = None
+    auth: CachedOAuth2Auth | None = None
+    verify: bool | str = True
+    cert: str | tuple[str, str] | None = None
+    response_status: int | None = None
+    exception: str = ""
+    duration: float | None = None
+
+    @property
+    def is_cloudevent(self) -> bool:
+        return self.scheduled_notif.sub.send_cloudevents
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.exception and self.response_status is not None
+
+
+def prepare_delivery(scheduled_notif: ScheduledNotification) -> Delivery:
+    """
+    Build the request to the subscription, including the authentication headers.
+    """
+    delivery = Delivery(scheduled_notif=scheduled_notif)
+    sub = scheduled_notif.sub
+    content_type = (
+        "application/cloudevents+json" if delivery.is_cloudevent else "application/json"
+    )
+
+    try:
+        client = get_client(sub)
+        delivery.request = client.prepare_request(
+            requests.Request(
+                "POST",
+                sub.callback_url,
+                data=json.dumps(get_task_args(scheduled_notif), cls=DjangoJSONEncoder),
+                headers={"Content-Type": content_type},
+            )
+        )
+        # use the same certificate (bundles) as requests would
+        environment = client.merge_environment_settings(
+            delivery.request.url, {}, None, client.verify, client.cert
+        )
+    except (
+        requests.RequestException,
+        OAuth2Error,
+        urllib3.exceptions.HTTPError,
+    ) as e:
+        delivery.exception = str(e)
+        return delivery
+
+    delivery.verify = environment["verify"]
+    delivery.cert = environment["cert"]
+    if isinstance(client.auth, CachedOAuth2Auth):
+        delivery.auth = client.auth
+    return delivery
+
+
+def get_ssl_context(
+    verify: bool | str, cert: str | tuple[str, str] | None
+) -> ssl.SSLContext | bool:
+    if not verify:
+        return False
+
+    if isinstance(verify, str) and os.path.isdir(verify):
+        context = ssl.create_default_context(capath=verify)
+    else:
+        cafile = verify if isinstance(verify, str) else certifi.where()
+        context = ssl.create_default_context(cafile=cafile)
+
+    if isinstance(cert, tuple):
+        context.load_cert_chain(*cert)
+    elif cert:
+        context.load_cert_chain(cert)
+    return context
+
+
+async def _send(
+    client: httpx.AsyncClient, delivery: Delivery, semaphore: asyncio.Semaphore
+) -> None:
+    request = delivery.request
+    assert request is not None
+
+    async with semaphore:
+        start = time.monotonic()
+        try:
+            response = await client.request(
+                request.method,
+                request.url,
+                content=request.body,
+                headers=dict(request.headers),
+            )
+            delivery.response_status = response.status_code
+        except httpx.HTTPError as e:
+            delivery.exception = str(e) or type(e).__name__
+            return
+        finally:
+            delivery.duration = time.monotonic() - start
+            record_delivery_duration(
+                delivery.duration,
+                delivery.response_status,
+                delivery.scheduled_notif.type,
+            )
+
+    if not 200 <= response.status_code < 300:
+        exception_message = (
+            _("Could not send couldevent: status {status_code} - {response}")
+            if delivery.is_cloudevent
+            else _("Could not send notification: status {status_code} - {response}")
+        ).format(status_code=response.status_code, response=response.text)
+        delivery.exception = exception_message[:1000]
+
+
+def _group_by_ssl_context(
+    deliveries: list[Delivery],
+) -> list[tuple[ssl.SSLContext | bool, list[Delivery]]]:
+    # the certificates are configured per client, so a client is needed for every
+    # combination of certificates
+    grouped: dict[tuple, list[Delivery]] = defaultdict(list)
+    for delivery in deliveries:
+        grouped[(delivery.verify, delivery.cert)].append(delivery)
+
+    groups = []
+    for (verify, cert), group in grouped.items():
+        try:
+            groups.append((get_ssl_context(verify, cert), group))
+        except (OSError, ssl.SSLError) as e:
+            for delivery in group:
+                delivery.exception = str(e)
+    return groups
+
+
+async def _send_all(groups: list[tuple[ssl.SSLContext | bool, list[Delivery]]]) -> None:
+    semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(settings.NOTIFICATION_BULK_HOST_CONCURRENCY)
+    )
+    timeout = httpx.Timeout(settings.NOTIFICATION_REQUESTS_TIMEOUT)
+
+    async with AsyncExitStack() as stack:
+        sends, deliveries = [], []
+        for ssl_context, group in groups:
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(verify=ssl_context, timeout=timeout)
+            )
+            for delivery in group:
+                semaphore = semaphores[urlsplit(delivery.request.url).netloc]
+                sends.append(_send(client, delivery, semaphore))
+                deliveries.append(delivery)
+
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        # an unexpected error only fails its own delivery
+        for delivery, result in zip(deliveries, results, strict=True):
+            if isinstance(result, Exception):
+                logger.error("bulk_delivery_error", exc_info=result)
+                delivery.exception = str(result) or type(result).__name__
+
+
+def deliver(scheduled_notifs: list[ScheduledNotification]) -> list[Delivery]:
+    """
+    Deliver the scheduled notifications concurrently.
+
+    Database queries are only performed while preparing the requests, before the
+    event loop is started.
+    """
+    deliveries = []
+    for scheduled_notif in scheduled_notifs:
+        try:
+            deliveries.append(prepare_delivery(scheduled_notif))
+        except Exception as e:
+            # only the delivery that can not be prepared fails
+            logger.exception(
+                "bulk_delivery_not_prepared",
+                subscription_pk=scheduled_notif.sub_id,
+            )
+            deliveries.append(
+                Delivery(
+                    scheduled_notif=scheduled_notif,
+                    exception=str(e) or type(e).__name__,
+                )
+            )
+
+    prepared = [delivery for delivery in deliveries if delivery.request is not None]
+    if groups := _group_by_ssl_context(prepared):
+        asyncio.run(_send_all(groups))
+
+    for delivery in prepared:
+        # the response hooks of the OAuth2 auth are not called by httpx
+        if delivery.auth and delivery.response_status == 401:
+            authorization = delivery.request.headers.get("Authorization", "")
+            delivery.auth.invalidate(authorization.removeprefix("Bearer "))
+
+    for delivery in deliveries:
+        with structlog.contextvars.bound_contextvars(
+            subscription_pk=delivery.scheduled_notif.sub_id,
+            subscription_callback=delivery.scheduled_notif.sub.callback_url,
+            notification_attempt_count=delivery.scheduled_notif.attempt,
+        ):
+            # the requests are not logged as outgoing requests (see the module
+            # docstring), the request itself is logged here
+            request_info = (
+                {
+                    "http_method": delivery.request.method,
+                    "http_url": delivery.request.url,
+                    "duration": delivery.duration,
+                }
+                if delivery.request is not None
+                else {}
+            )
+            if delivery.succeeded:
+                logger.info(
+                    "bulk_delivery_successful",
+                    http_status_code=delivery.response_status,
+                    **request_info,
+                )
+            else:
+                logger.warning(
+                    "bulk_delivery_failed",
+                    http_status_code=delivery.response_status,
+                    exception=delivery.exception,
+                    **request_info,
+                )
+
+    return deliveries
@@ -0,0 +1,116 @@
+"""
+Checking whether the callback URLs of the subscriptions can receive notifications.
+
+The admin schedules a Celery task that posts the test notification of
+`CallbackURLValidator` to the callback URLs concurrently, with at most
+``NOTIFICATION_CALLBACK_CHECK_CONCURRENCY`` requests at the same time and a timeout of
+``NOTIFICATION_REQUESTS_TIMEOUT`` seconds per request, so a few unreachable hosts do
+not hold up the check of the others.
+
+Subscriptions with the same callback URL and authorization are checked once, and get
+the same result. The results are stored as `CallbackCheck`, so the subscriptions can
+be filtered on them in the admin.
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.utils import timezone
+
+import httpx
+import structlog
+
+from nrc.datamodel.models import Abonnement, CallbackCheck
+
+from .validators import TEST_NOTIFICATION, is_reachable
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+@dataclass
+class Check:
+    callback_url: str
+    auth: str
+    response_status: int | None = None
+    exception: str = ""
+
+    @property
+    def reachable(self) -> bool:
+        return self.response_status is not None and is_reachable(self.response_status)
+
+
+async def _check(
+    client: httpx.AsyncClient, check: Check, semaphore: asyncio.Semaphore
+) -> None:
+    async with semaphore:
+        try:
+            response = await client.post(
+                check.callback_url,
+                json=TEST_NOTIFICATION,
+                headers={"Authorization": check.auth},
+            )
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            check.exception = str(e) or type(e).__name__
+            return
+
+    check.response_status = response.status_code
+
+
+async def _check_all(checks: list[Check]) -> None:
+    semaphore = asyncio.Semaphore(settings.NOTIFICATION_CALLBACK_CHECK_CONCURRENCY)
+    timeout = httpx.Timeout(settings.NOTIFICATION_REQUESTS_TIMEOUT)
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        await asyncio.gather(*(_check(client, check, semaphore) for check in checks))
+
+
+def check_callback_urls(abonnementen: Iterable[Abonnement]) -> list[CallbackCheck]:
+    """
+    Check the callback URLs of the subscriptions and store the results.
+
+    The results are also stored for the other subscriptions with the same callback URL
+    and authorization.
+    """
+    checks = {
+        (sub.callback_url, sub.auth): Check(sub.callback_url, sub.auth)
+        for sub in abonnementen
+    }
+    if not checks:
+        return []
+
+    asyncio.run(_check_all(list(checks.values())))
+
+    subs_by_key: dict[tuple[str, str], list[Abonnement]] = defaultdict(list)
+    for sub in Abonnement.objects.filter(
+        callback_url__in={callback_url for callback_url, _ in checks}
+    ).only("callback_url", "auth"):
+        subs_by_key[(sub.callback_url, sub.auth)].append(sub)
+
+    now = timezone.now()
+    callback_checks = [
+        CallbackCheck(
+            abonnement=sub,
+            reachable=check.reachable,
+            response_status=check.response_status,
+            exception=check.exception,
+            checked_at=now,
+        )
+        for key, check in checks.items()
+        for sub in subs_by_key[key]
+    ]
+    CallbackCheck.objects.bulk_create(
+        callback_checks,
+        update_conflicts=True,
+        unique_fields=["abonnement"],
+        update_fields=["reachable", "response_status", "exception", "checked_at"],
+    )
+
+    logger.info(
+        "callback_urls_checked",
+        checked=len(checks),
+        unreachable=sum(not check.reachable for check in checks.values()),
+    )
+    return callback_checks
@@ -0,0 +1,145 @@
+"""
+Circuit breaker per subscription.
+
+When the callback of a subscription keeps failing, delivering to it ties up worker
+threads until the requests time out. After ``NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD``
+consecutive failures the circuit of the subscription opens: its scheduled
+notifications are deferred without sending a request. When the circuit half-opens,
+a single delivery is let through as a probe. If the probe succeeds the circuit
+closes, otherwise it opens again for twice as long (up to
+``NOTIFICATION_CIRCUIT_BREAKER_MAX_TIMEOUT`` seconds).
+
+Only the deliveries without a response, or with a server error, timeout (408) or
+rate limit (429) response, count as failures. A client error is a problem of the
+notification or the configuration of the subscription, not of the availability of the
+callback.
+
+The state is kept in the (shared) Django cache, so it is the same for all workers.
+
+A deferral counts as a failed delivery attempt (see
+`nrc.api.tasks._defer_scheduled_notifications`), so the notifications of a
+subscription that keeps failing still expire after the configured number of retries.
+"""
+
+import time
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+import structlog
+
+logger = structlog.stdlib.get_logger(__name__)
+
+# the number of consecutive trips is forgotten after a day without failures
+TRIPS_TIMEOUT = 60 * 60 * 24
+
+
+def _key(abonnement_id: int, name: str) -> str:
+    return f"circuit_breaker:{abonnement_id}:{name}"
+
+
+def get_open_circuits(abonnement_ids: Iterable[int]) -> dict[int, datetime]:
+    """
+    Return the subscriptions with an open circuit and when it half-opens.
+    """
+    if not settings.NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD:
+        return {}
+
+    keys = {
+        _key(abonnement_id, "open"): abonnement_id for abonnement_id in abonnement_ids
+    }
+    return {
+        keys[key]: datetime.fromtimestamp(open_until, tz=UTC)
+        for key, open_until in cache.get_many(keys).items()
+    }
+
+
+def is_available(response_status: int | None) -> bool:
+    """
+    Return whether the response shows that the callback of the subscription is
+    available.
+    """
+    return (
+        response_status is not None
+        and response_status < 500
+        and response_status not in (408, 429)
+    )
+
+
+class CircuitBreaker:
+    def __init__(self, abonnement_id: int):
+        self.abonnement_id = abonnement_id
+        self.threshold = settings.NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD
+
+    def retry_at(self) -> datetime | None:
+        """
+        Return when to retry if no request should be sent to the subscription.
+
+        If the circuit is half-open this claims the probe, so only one request is
+        sent until its result is recorded.
+        """
+        if not self.threshold:
+            return None
+
+        open_key = _key(self.abonnement_id, "open")
+        failures_key = _key(self.abonnement_id, "failures")
+        state = cache.get_many([open_key, failures_key])
+
+        if (open_until := state.get(open_key)) is not None:
+            return datetime.fromtimestamp(open_until, tz=UTC)
+        if state.get(failures_key, 0) < self.threshold:
+            return None
+
+        # the probe is released if its result is not recorded (e.g. the worker died)
+        probe_timeout = settings.NOTIFICATION_REQUESTS_TIMEOUT * 2
+        if cache.add(_key(self.abonnement_id, "probe"), "1", timeout=probe_timeout):
+            logger.info("circuit_half_open", subscription_pk=self.abonnement_id)
+            return None
+        return timezone.now() + timedelta(seconds=probe_timeout)
+
+    def record_success(self) -> None:
+        if not self.threshold:
+            return
+
+        cache.delete_many(
+            [
+                _key(self.abonnement_id, name)
+                for name in ("failures", "trips", "open", "probe")
+            ]
+        )
+
+    def record_failure(self) -> None:
+        if not self.threshold:
+            return
+
+        failures_key = _key(self.abonnement_id, "failures")
+        cache.add(failures_key, 0, timeout=None)
+        try:
+            failures = cache.incr(failures_key)
+        except ValueError:  # the key was removed by a concurrent success
+            return
+
+        if failures is None or failures < self.threshold:
+            return
+
+        trips_key = _key(self.abonnement_id, "trips")
+        trips = cache.get(trips_key, 0)
+        timeout = min(
+            settings.NOTIFICATION_CIRCUIT_BREAKER_TIMEOUT * 2**trips,
+            settings.NOTIFICATION_CIRCUIT_BREAKER_MAX_TIMEOUT,
+        )
+        # failures of deliveries that were already in progress do not extend it
+        if cache.add(
+            _key(self.abonnement_id, "open"), time.time() + timeout, timeout=timeout
+        ):
+            cache.set(trips_key, trips + 1, timeout=TRIPS_TIMEOUT)
+            cache.delete(_key(self.abonnement_id, "probe"))
+            logger.warning(
+                "circuit_opened",
+                subscription_pk=self.abonnement_id,
+                consecutive_failures=failures,
+                timeout=timeout,
+            )
@@ -0,0 +1,162 @@
+"""
+Reusable HTTP clients for delivering messages to subscriptions.
+
+Building a client for every delivery means a new connection (and TLS handshake) for
+every notification. Instead, the clients are kept in a per-process LRU cache, so
+deliveries to the same subscription reuse the keep-alive connections of its client.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+
+import structlog
+from ape_pie import APIClient
+from requests.adapters import HTTPAdapter
+from zgw_consumers.client import build_client
+from zgw_consumers.constants import AuthTypes
+from zgw_consumers.models import Service
+
+from nrc.datamodel.models import Abonnement
+
+from .oauth2 import CachedOAuth2Auth
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+def service_from_abonnement(abonnement: Abonnement) -> Service:
+    return Service(
+        api_root=abonnement.callback_url,
+        auth_type=abonnement.auth_type,
+        header_key="Authorization",
+        header_value=abonnement.auth,
+        client_id=abonnement.client_id,
+        secret=abonnement.secret,
+        oauth2_token_url=abonnement.oauth2_token_url,
+        oauth2_scope=abonnement.oauth2_scope,
+        client_certificate=abonnement.client_certificate,
+        server_certificate=abonnement.server_certificate,
+    )
+
+
+def get_fingerprint(abonnement: Abonnement) -> str:
+    """
+    Hash of all the attributes of the subscription that are used to build its client.
+    """
+    attributes = (
+        abonnement.callback_url,
+        abonnement.auth_type,
+        abonnement.auth,
+        abonnement.client_id,
+        abonnement.secret,
+        abonnement.oauth2_token_url,
+        abonnement.oauth2_scope,
+        abonnement.client_certificate_id,
+        abonnement.server_certificate_id,
+    )
+    return hashlib.sha256(repr(attributes).encode()).hexdigest()
+
+
+@dataclass
+class CachedClient:
+    fingerprint: str
+    client: APIClient
+    last_used: float
+
+
+class ClientCache:
+    """
+    Thread-safe LRU cache of clients per subscription.
+
+    Clients are evicted when the cache is full, they have been idle for too long or
+    the subscription changed. Evicted clients are not closed, because another thread
+    can still be delivering a notification with them: they are dropped, and their
+    connections are closed when they are garbage collected.
+    """
+
+    def __init__(self, max_size: int, max_idle: float, pool_maxsize: int):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.pool_maxsize = pool_maxsize
+        self._clients: OrderedDict[int, CachedClient] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_client(self, abonnement: Abonnement) -> APIClient:
+        fingerprint = get_fingerprint(abonnement)
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+
+            cached = self._clients.get(abonnement.pk)
+            if cached is not None and cached.fingerprint == fingerprint:
+                cached.last_used = now
+                self._clients.move_to_end(abonnement.pk)
+                return cached.client
+
+        # built outside of the lock, so other threads are not blocked meanwhile
+        client = self._build_client(abonnement)
+
+        with self._lock:
+            self._clients[abonnement.pk] = CachedClient(
+                fingerprint=fingerprint, client=client, last_used=now
+            )
+            self._clients.move_to_end(abonnement.pk)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def _build_client(self, abonnement: Abonnement) -> APIClient:
+        service = service_from_abonnement(abonnement)
+        uses_oauth2 = abonnement.auth_type == AuthTypes.oauth2_client_credentials
+        if uses_oauth2:
+            # the access token is taken from the shared token cache instead
+            service.auth_type = AuthTypes.no_auth
+
+        client = build_client(service)
+        if uses_oauth2:
+            client.auth = CachedOAuth2Auth(
+                token_url=abonnement.oauth2_token_url,
+                client_id=abonnement.client_id,
+                secret=abonnement.secret,
+                scope=abonnement.oauth2_scope,
+            )
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        client.mount("https://", adapter)
+        client.mount("http://", adapter)
+        # ape_pie closes the session (and its connection pool) after every request
+        # that is not made inside the context manager of the client, the cached client
+        # is kept "entered" so its connections are reused. It is never exited, the
+        # connections are closed when the client is garbage collected.
+        client.__enter__()
+        logger.debug("subscription_client_created", subscription_pk=abonnement.pk)
+        return client
+
+    def _evict_idle(self, now: float) -> None:
+        # the least recently used clients are at the start
+        while self._clients:
+            pk, cached = next(iter(self._clients.items()))
+            if now - cached.last_used <= self.max_idle:
+                break
+            del self._clients[pk]
+
+
+client_cache = ClientCache(
+    max_size=settings.NOTIFICATION_CLIENT_CACHE_SIZE,
+    max_idle=settings.NOTIFICATION_CLIENT_MAX_IDLE,
+    pool_maxsize=settings.NOTIFICATION_CLIENT_POOL_MAXSIZE,
+)
+
+
+def get_client(abonnement: Abonnement) -> APIClient:
+    return client_cache.get_client(abonnement)
@@ -0,0 +1,25 @@
+"""
+Wake up the scheduler when notifications are scheduled.
+
+With ``NOTIFICATION_DISPATCHER_ENABLED`` a Postgres ``NOTIFY`` is sent when scheduled
+notifications are created. The ``run_dispatcher`` management command ``LISTEN``s for
+it and starts the deliveries right away, instead of waiting for the next run of
+``execute_notifications`` by celery beat. Celery beat keeps starting the retries of
+failed deliveries, and anything the dispatcher missed.
+
+The notification is only delivered to the listeners when the transaction that
+scheduled the notifications commits.
+"""
+
+from django.conf import settings
+from django.db import connection
+
+CHANNEL = "nrc_scheduled_notifications"
+
+
+def notify_dispatcher() -> None:
+    if not settings.NOTIFICATION_DISPATCHER_ENABLED:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, '')", [CHANNEL])
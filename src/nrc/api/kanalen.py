@@ -0,0 +1,39 @@
+"""
+In-memory registry of the kanalen.
+
+Publishing a notification used to query its kanaal several times: to validate the
+message, to log the notification and to route it. Kanalen rarely change, so they are
+kept in memory by every process instead, like the routing indexes.
+
+The registry shares the routing version of :mod:`nrc.api.routing`, which is replaced
+whenever a kanaal is saved or deleted (see :mod:`nrc.api.signals`). Kanalen that are
+not in the registry are looked up in the database, so a kanaal created by another
+process can be used before the registry is rebuilt.
+"""
+
+from nrc.datamodel.models import Kanaal
+
+from .routing import VersionedIndex
+
+
+def build_registry() -> dict[str, Kanaal]:
+    return Kanaal.objects.in_bulk(field_name="naam")
+
+
+kanaal_registry = VersionedIndex(build_registry)
+
+
+def get_kanaal(naam: str, kanalen: dict[str, Kanaal] | None = None) -> Kanaal:
+    """
+    Return the kanaal with the given name, or raise ``Kanaal.DoesNotExist``.
+
+    :param kanalen: the registry to use, to look up multiple kanalen with the same
+      version of the registry.
+    """
+    if kanalen is None:
+        kanalen = kanaal_registry.get()
+
+    try:
+        return kanalen[naam]
+    except KeyError:
+        return Kanaal.objects.get(naam=naam)
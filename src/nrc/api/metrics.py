@@ -1,3 +1,9 @@
+from collections.abc import Collection
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
 from opentelemetry import metrics
 
 meter = metrics.get_meter("opennotificaties.api")
@@ -19,3 +25,94 @@ kanaal_create_counter = meter.create_counter(
     description="Amount of kanalen created (via the API).",
     unit="1",
 )
+
+auth_cache_hits_counter = meter.create_counter(
+    "opennotificaties.client_auth.cache_hits",
+    description="Amount of API client authorizations taken from the cache.",
+    unit="1",
+)
+
+auth_cache_misses_counter = meter.create_counter(
+    "opennotificaties.client_auth.cache_misses",
+    description="Amount of API client authorizations that were not cached.",
+    unit="1",
+)
+
+delivery_duration_histogram = meter.create_histogram(
+    "opennotificaties.delivery.duration",
+    description="Duration of the requests to the callbacks of the subscriptions.",
+    unit="s",
+)
+
+delivery_delay_histogram = meter.create_histogram(
+    "opennotificaties.delivery.delay",
+    description=(
+        "Time between publishing a notification and its first delivery attempt."
+    ),
+    unit="s",
+)
+
+delivery_retries_counter = meter.create_counter(
+    "opennotificaties.delivery.retries",
+    description="Amount of failed deliveries that are retried later.",
+    unit="1",
+)
+
+delivery_expired_counter = meter.create_counter(
+    "opennotificaties.delivery.expired",
+    description=(
+        "Amount of notifications that were not delivered before the maximum number "
+        "of retries was reached."
+    ),
+    unit="1",
+)
+
+scheduler_claimed_histogram = meter.create_histogram(
+    "opennotificaties.scheduler.claimed",
+    description="Amount of scheduled notifications started per run of the scheduler.",
+    unit=r"{notification}",
+)
+
+scheduler_claim_duration_histogram = meter.create_histogram(
+    "opennotificaties.scheduler.claim_duration",
+    description="Duration of claiming the scheduled notifications that are started.",
+    unit="s",
+)
+
+
+def record_delivery_duration(
+    duration: float, status_code: int | None, type: str
+) -> None:
+    # the callbacks are not an attribute, their number is unbounded
+    delivery_duration_histogram.record(
+        duration,
+        {
+            "status_class": f"{status_code // 100}xx" if status_code else "error",
+            "type": type,
+        },
+    )
+
+
+def count_scheduled_notifications(
+    options: metrics.CallbackOptions,
+) -> Collection[metrics.Observation]:
+    # imported here, because the tasks record the delivery metrics
+    from .tasks import get_scheduled_notification_counts
+
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.NOTIFICATION_REQUESTS_TIMEOUT * 10)
+    counts = get_scheduled_notification_counts(now, cutoff)
+    return tuple(
+        metrics.Observation(count, {"scope": "global", "state": state})
+        for state, count in counts.items()
+    )
+
+
+meter.create_observable_gauge(
+    name="opennotificaties.scheduled_notifications",
+    description=(
+        "The number of scheduled notifications that are waiting, in progress or stuck."
+    ),
+    unit=r"{notification}",  # no unit so that the _ratio suffix is not added
+    callbacks=[count_scheduled_notifications],
+)
@@ -0,0 +1,216 @@
+"""
+OAuth2 client credentials authentication for deliveries to subscriptions.
+
+Access tokens are stored in the (shared) Django cache, keyed by token URL, client ID,
+scope and (a digest of) the client secret, so all threads and worker nodes use the same
+token until it expires.
+
+Fetching a new token is single-flight: one thread per process and one process per
+cache acquires a lock, while the others wait for the token to appear in the cache. The
+others never fetch a token without the lock: if the fetch failed, they take over the
+lock one at a time. After a failed fetch, no new token is fetched for
+``FETCH_FAILURE_BACKOFF`` seconds, so a failing token endpoint is not flooded with
+requests. A token that is rejected by a subscription (``401``) is removed from the
+cache, so a revoked token is not used until it expires.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import TypedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+import structlog
+from oauthlib.oauth2 import BackendApplicationClient
+from oauthlib.oauth2.rfc6749.errors import OAuth2Error
+from requests import Response
+from requests.auth import AuthBase
+from requests.models import PreparedRequest
+from requests_oauthlib import OAuth2Session
+
+logger = structlog.stdlib.get_logger(__name__)
+
+# tokens are refreshed this many seconds before they actually expire (at most half of
+# their lifetime)
+TOKEN_EXPIRY_LEEWAY = 30
+# lifetime (in seconds) for tokens without `expires_in`
+DEFAULT_TOKEN_LIFETIME = 300
+FETCH_POLL_INTERVAL = 0.1
+# the number of seconds that no token is fetched after fetching one failed
+FETCH_FAILURE_BACKOFF = 5
+
+
+class Token(TypedDict):
+    access_token: str
+    expires_at: float
+    refresh_at: float
+
+
+class TokenUnavailable(OAuth2Error):
+    error = "token_unavailable"
+
+
+def is_valid(token: Token | None) -> bool:
+    return bool(token) and token["refresh_at"] > time.time()
+
+
+def get_token_cache_key(token_url: str, client_id: str, secret: str, scope: str) -> str:
+    # the secret is part of the key, so a token is never reused for a client with
+    # another (for example rotated or wrong) secret
+    secret_digest = hashlib.sha256(secret.encode()).hexdigest()
+    digest = hashlib.sha256(
+        repr((token_url, client_id, secret_digest, scope)).encode()
+    ).hexdigest()
+    return f"oauth2_token:{digest}"
+
+
+def get_fetch_lock_timeout() -> int:
+    # longer than fetching a token can take (connecting and reading both time out
+    # after NOTIFICATION_REQUESTS_TIMEOUT), so the lock does not expire while it is held
+    return settings.NOTIFICATION_REQUESTS_TIMEOUT * 3
+
+
+_locks: dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def _get_local_lock(cache_key: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(cache_key, threading.Lock())
+
+
+def _fetch_token(
+    cache_key: str, token_url: str, client_id: str, secret: str, scope: str
+) -> Token:
+    client = BackendApplicationClient(client_id=client_id, scope=scope or None)
+    with OAuth2Session(client=client) as session:
+        response = session.fetch_token(
+            token_url=token_url,
+            client_id=client_id,
+            client_secret=secret,
+            timeout=settings.NOTIFICATION_REQUESTS_TIMEOUT,
+        )
+
+    now = time.time()
+    lifetime = response.get("expires_in") or DEFAULT_TOKEN_LIFETIME
+    refresh_after = lifetime - min(TOKEN_EXPIRY_LEEWAY, lifetime / 2)
+    token: Token = {
+        "access_token": response["access_token"],
+        "expires_at": now + lifetime,
+        "refresh_at": now + refresh_after,
+    }
+    cache.set(cache_key, token, timeout=max(1, int(refresh_after)))
+    logger.debug("oauth2_token_fetched", token_url=token_url, client_id=client_id)
+    return token
+
+
+def _release_lock(lock_key: str, owner: str) -> None:
+    # the lock is only released by its owner, not when it was acquired by another
+    # process after it expired
+    if cache.get(lock_key) == owner:
+        cache.delete(lock_key)
+
+
+def _fetch_token_once(
+    cache_key: str, token_url: str, client_id: str, secret: str, scope: str
+) -> Token:
+    lock_key = f"{cache_key}:lock"
+    failed_key = f"{cache_key}:failed"
+    lock_timeout = get_fetch_lock_timeout()
+    owner = uuid.uuid4().hex
+
+    deadline = time.monotonic() + lock_timeout
+    while True:
+        if cache.get(failed_key):
+            raise TokenUnavailable(
+                description=f"Fetching an access token from {token_url} failed recently"
+            )
+
+        if cache.add(lock_key, owner, timeout=lock_timeout):
+            try:
+                # another process might have fetched the token before the lock was
+                # released
+                if is_valid(token := cache.get(cache_key)):
+                    return token
+                return _fetch_token(cache_key, token_url, client_id, secret, scope)
+            except Exception:
+                cache.set(failed_key, True, timeout=FETCH_FAILURE_BACKOFF)
+                raise
+            finally:
+                _release_lock(lock_key, owner)
+
+        # another process is fetching the token, wait for it to appear in the cache
+        if time.monotonic() >= deadline:
+            raise TokenUnavailable(
+                description=f"Timed out waiting for an access token from {token_url}"
+            )
+        time.sleep(FETCH_POLL_INTERVAL)
+        if is_valid(token := cache.get(cache_key)):
+            return token
+
+
+def get_token(token_url: str, client_id: str, secret: str, scope: str) -> Token:
+    cache_key = get_token_cache_key(token_url, client_id, secret, scope)
+    if is_valid(token := cache.get(cache_key)):
+        return token
+
+    with _get_local_lock(cache_key):
+        # another thread might have fetched the token while waiting for the lock
+        if is_valid(token := cache.get(cache_key)):
+            return token
+        return _fetch_token_once(cache_key, token_url, client_id, secret, scope)
+
+
+def invalidate_token(
+    token_url: str, client_id: str, secret: str, scope: str, access_token: str
+) -> None:
+    """
+    Remove the access token from the cache, unless it was already replaced.
+    """
+    cache_key = get_token_cache_key(token_url, client_id, secret, scope)
+    token = cache.get(cache_key)
+    if token and token["access_token"] == access_token:
+        cache.delete(cache_key)
+        logger.info("oauth2_token_rejected", token_url=token_url, client_id=client_id)
+
+
+@dataclass
+class CachedOAuth2Auth(AuthBase):
+    """
+    OAuth2 bearer token auth (client credentials) using the shared token cache.
+    """
+
+    token_url: str
+    client_id: str
+    secret: str
+    scope: str
+    _token: Token | None = field(default=None, repr=False)
+
+    def __call__(self, request: PreparedRequest) -> PreparedRequest:
+        if not is_valid(self._token):
+            self._token = get_token(
+                self.token_url, self.client_id, self.secret, self.scope
+            )
+
+        assert self._token is not None
+        request.headers["Authorization"] = f"Bearer {self._token['access_token']}"
+        request.register_hook("response", self._handle_response)
+        return request
+
+    def invalidate(self, access_token: str) -> None:
+        if self._token and self._token["access_token"] == access_token:
+            self._token = None
+        invalidate_token(
+            self.token_url, self.client_id, self.secret, self.scope, access_token
+        )
+
+    def _handle_response(self, response: Response, **kwargs) -> None:
+        if response.status_code == 401:
+            # the (revoked) token is not retried, a new one is fetched for the next
+            # delivery
+            authorization = response.request.headers.get("Authorization", "")
+            self.invalidate(authorization.removeprefix("Bearer "))
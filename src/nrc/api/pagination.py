@@ -0,0 +1,28 @@
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.pagination import PageNumberPagination
+
+
+class OptionalPageNumberPagination(PageNumberPagination):
+    """
+    Paginate the results only if a page is requested.
+
+    The list endpoints of the Notificaties API return all results by default, which
+    is kept for existing consumers. Consumers with many results can request the
+    results in pages of ``PAGE_SIZE`` with the ``page`` query parameter.
+    """
+
+    page_query_description = _(
+        "Een pagina binnen de gepagineerde set resultaten. Zonder deze parameter "
+        "worden alle resultaten teruggegeven."
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params:
+            return None
+
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response_schema(self, schema):
+        # the results are only paginated if a page is requested
+        return {"oneOf": [schema, super().get_paginated_response_schema(schema)]}
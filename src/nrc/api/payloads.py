@@ -0,0 +1,59 @@
+"""
+The contents of the scheduled notifications.
+
+A published message is stored once, in a `Payload` that is shared by the scheduled
+notifications of all subscriptions that receive it. Subscriptions that receive
+notifications as cloudevents get a transformed variant, which is built when the
+message is sent.
+"""
+
+from datetime import datetime
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from nrc.datamodel.models import NotificationTypes, ScheduledNotification
+
+from .types import CloudEventKwargs, NotificationMessage, NotificationMessageKwargs
+
+
+def transform_to_cloudevent(
+    notif: NotificationMessage | NotificationMessageKwargs, id: str
+) -> CloudEventKwargs:
+    aanmaakdatum = notif["aanmaakdatum"]
+    if not isinstance(aanmaakdatum, datetime):
+        aanmaakdatum = parse_datetime(aanmaakdatum)
+
+    return {
+        "id": id,
+        "source": notif["source"],
+        "specversion": settings.CLOUDEVENT_SPECVERSION,
+        "type": f"nl.overheid.{notif['kanaal']}.{notif['resource']}.{notif['actie']}",
+        "datacontenttype": "application/json",
+        "subject": notif["resourceUrl"].rsplit("/", 1)[
+            1
+        ],  # TODO the whole resourceUrl would make the location of the resource clearer.
+        "time": aanmaakdatum.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "data": {
+            **notif["kenmerken"],
+            "hoofdObject": notif["hoofdObject"],
+        },
+    }
+
+
+def get_task_args(scheduled_notif: ScheduledNotification) -> dict:
+    """
+    Return the message that should be sent to the subscription.
+    """
+    payload = scheduled_notif.payload
+    if payload is None:
+        # scheduled before the payloads were shared
+        return scheduled_notif.task_args
+
+    if (
+        scheduled_notif.type == NotificationTypes.cloudevent
+        and payload.type == NotificationTypes.notification
+    ):
+        # every subscription receives the same cloudevent
+        return transform_to_cloudevent(payload.data, str(payload.uuid))
+    return payload.data
@@ -0,0 +1,335 @@
+"""
+Resending logged notifications and cloudevents in bulk.
+
+The resend actions of the admin create a `ResendJob` with the selected messages, which
+is handled by a Celery task. The ids of the selected messages are stored on the job and
+filtered on by every chunk, so at most ``MAX_SELECTED_MESSAGES`` messages can be
+selected. Jobs can also be created in the admin for the messages of a time range and/or
+a subscription, for example to redeliver the notifications that a subscription missed
+during an outage.
+
+The messages are handled in chunks of ``NOTIFICATION_RESEND_CHUNK_SIZE`` (in order of
+their ids), and the deliveries of a chunk are scheduled with a few queries. They are
+either routed against the routing index at the start of the job, or (``only_failed``)
+only sent to the subscriptions of which the latest response to the message was a
+failure.
+
+A job is claimed by the task that runs it, so it never runs twice at the same time, and
+its progress is stored per chunk. A job that failed can be resumed from the admin, and
+running jobs that were interrupted (their progress was not updated for
+``STALE_JOB_TIMEOUT``) are resumed periodically. Both continue after the last handled
+message.
+
+The messages are resent as they were logged, they are not validated again.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q, QuerySet
+from django.utils import timezone
+
+import structlog
+
+from nrc.datamodel.models import (
+    Abonnement,
+    CloudEvent,
+    FilterGroup,
+    Notificatie,
+    NotificationTypes,
+    Payload,
+    ResendJob,
+    ResendJobStatus,
+    ScheduledNotification,
+)
+
+from .dispatcher import notify_dispatcher
+from .routing import (
+    CloudEventRoutingIndex,
+    NotificationRoutingIndex,
+    cloudevent_routing_index,
+    notification_routing_index,
+)
+from .serializers import CloudEventSerializer, MessageSerializer
+from .summaries import (
+    RESPONSE_MODELS,
+    get_latest_responses,
+    is_delivered,
+    update_delivery_summaries,
+)
+
+logger = structlog.stdlib.get_logger(__name__)
+
+# a running job of which the progress was not updated for this long is considered
+# interrupted, and is resumed by `resume_resend_jobs`
+STALE_JOB_TIMEOUT = timedelta(minutes=15)
+
+# the maximum number of messages that can be resent with the actions of the admin,
+# larger selections are resent with a job for a time range
+MAX_SELECTED_MESSAGES = 10_000
+
+# the fields of a logged cloudevent that are sent
+CLOUDEVENT_FIELDS = (
+    "id",
+    "source",
+    "specversion",
+    "type",
+    "datacontenttype",
+    "dataschema",
+    "subject",
+    "time",
+    "data",
+)
+
+
+def get_failed_subs(
+    model: type[Notificatie | CloudEvent], ids: list[int]
+) -> dict[int, set[int]]:
+    """
+    Return the ids of the subscriptions of which the latest delivery attempt failed,
+    per message.
+    """
+    failed_subs: dict[int, set[int]] = defaultdict(set)
+    for message_id, sub_id, response_status in get_latest_responses(model, ids):
+        if not is_delivered(response_status):
+            failed_subs[message_id].add(sub_id)
+    return failed_subs
+
+
+def get_last_attempts(
+    model: type[Notificatie | CloudEvent], ids: list[int]
+) -> dict[int, int]:
+    field = model._meta.model_name
+    return dict(
+        RESPONSE_MODELS[model]
+        .objects.filter(**{f"{field}__in": ids})
+        .values(field)
+        .annotate(last_attempt=Max("attempt"))
+        .values_list(field, "last_attempt")
+    )
+
+
+def get_messages(job: ResendJob) -> QuerySet[Notificatie] | QuerySet[CloudEvent]:
+    """
+    Return the messages that are resent by the job, in order.
+    """
+    if job.type == NotificationTypes.notification:
+        model, date_field = Notificatie, "aanmaakdatum"
+    else:
+        model, date_field = CloudEvent, "time"
+
+    messages = model.objects.all()
+    if job.message_ids:
+        messages = messages.filter(pk__in=job.message_ids)
+    if job.start:
+        messages = messages.filter(**{f"{date_field}__gte": job.start})
+    if job.end:
+        messages = messages.filter(**{f"{date_field}__lt": job.end})
+    if job.only_failed:
+        # the delivery summary is indexed
+        messages = messages.filter(failed_count__gt=0)
+
+    if job.abonnement_id and job.only_failed:
+        field = model._meta.model_name
+        messages = messages.filter(
+            Exists(
+                RESPONSE_MODELS[model].objects.filter(
+                    **{field: OuterRef("pk")}, abonnement=job.abonnement_id
+                )
+            )
+        )
+    elif job.abonnement_id and model is Notificatie:
+        # only the notifications of the kanalen of the subscription are routed to it
+        messages = messages.filter(
+            kanaal__in=FilterGroup.objects.filter(abonnement=job.abonnement_id).values(
+                "kanaal"
+            )
+        )
+
+    if model is Notificatie:
+        messages = messages.select_related("kanaal")
+    return messages.order_by("pk")
+
+
+def get_message(message: Notificatie | CloudEvent) -> dict | None:
+    """
+    Return the message as it was logged, to send it again.
+    """
+    if isinstance(message, CloudEvent):
+        return {field: getattr(message, field) for field in CLOUDEVENT_FIELDS}
+    if not isinstance(message.forwarded_msg, dict):
+        return None
+    return message.forwarded_msg
+
+
+def route(
+    message: Notificatie | CloudEvent,
+    msg: dict,
+    routing_index: NotificationRoutingIndex | CloudEventRoutingIndex,
+) -> set[Abonnement]:
+    if isinstance(message, CloudEvent):
+        msg_filters = msg["data"] if isinstance(msg["data"], dict) else {}
+        return routing_index.get_subs(msg["type"], msg_filters)
+    return routing_index.get_subs(message.kanaal.naam, msg.get("kenmerken", {}))
+
+
+def resend_chunk(
+    job: ResendJob,
+    messages: list[Notificatie] | list[CloudEvent],
+    routing_index: NotificationRoutingIndex | CloudEventRoutingIndex,
+) -> int:
+    """
+    Schedule the deliveries of a chunk of the messages of the job.
+
+    With ``only_failed`` the messages are only sent to the subscriptions of which the
+    latest delivery of the message failed, otherwise they are routed to the current
+    subscriptions. Returns the number of scheduled deliveries.
+    """
+    if job.type == NotificationTypes.notification:
+        model, serializer = Notificatie, MessageSerializer()
+    else:
+        model, serializer = CloudEvent, CloudEventSerializer()
+
+    ids = [message.pk for message in messages]
+    last_attempts = get_last_attempts(model, ids)
+    if job.only_failed:
+        failed_subs = get_failed_subs(model, ids)
+        subs_by_id = Abonnement.objects.in_bulk(set().union(*failed_subs.values()))
+
+    now = timezone.now()
+    routed = []
+    for message in messages:
+        if (msg := get_message(message)) is None:
+            continue
+
+        if job.only_failed:
+            subs = {
+                subs_by_id[sub_id]
+                for sub_id in failed_subs[message.pk]
+                if sub_id in subs_by_id
+            }
+        else:
+            subs = route(message, msg, routing_index)
+        if job.abonnement_id:
+            subs = {sub for sub in subs if sub.pk == job.abonnement_id}
+        if model is Notificatie and not msg.get("source"):
+            # the notification can not be transformed to a cloudevent
+            subs = {sub for sub in subs if not sub.send_cloudevents}
+
+        if subs:
+            payload = Payload(type=job.type, data=msg)
+            routed.append((subs, payload, message))
+
+    # the message is stored once for all subscriptions
+    Payload.objects.bulk_create(payload for _, payload, _ in routed)
+    scheduled_notifs = ScheduledNotification.objects.bulk_create(
+        scheduled_notif
+        for subs, payload, message in routed
+        for scheduled_notif in serializer._get_scheduled_notifications(
+            subs, payload, message, last_attempts.get(message.pk, 0) + 1, now
+        )
+    )
+    # the scheduled deliveries are pending
+    update_delivery_summaries(model, [message.pk for _, _, message in routed])
+    if routed:
+        notify_dispatcher()
+    return len(scheduled_notifs)
+
+
+def get_stale_jobs() -> QuerySet[ResendJob]:
+    """
+    Return the running jobs of which the progress was not updated for
+    ``STALE_JOB_TIMEOUT``, for example because the worker was stopped.
+    """
+    return ResendJob.objects.filter(
+        status=ResendJobStatus.running,
+        updated_at__lt=timezone.now() - STALE_JOB_TIMEOUT,
+    )
+
+
+def claim_resend_job(resend_job_id: int) -> ResendJob | None:
+    """
+    Claim a pending, failed or stale job to run it.
+
+    The status is updated with a single conditional UPDATE, so a job can not be run
+    by two tasks at the same time. Returns ``None`` if the job can not be claimed.
+    """
+    now = timezone.now()
+    claimed = (
+        ResendJob.objects.filter(pk=resend_job_id)
+        .filter(
+            Q(status__in=[ResendJobStatus.pending, ResendJobStatus.failed])
+            | Q(
+                status=ResendJobStatus.running,
+                updated_at__lt=now - STALE_JOB_TIMEOUT,
+            )
+        )
+        .update(status=ResendJobStatus.running, updated_at=now)
+    )
+    if not claimed:
+        return None
+    return ResendJob.objects.get(pk=resend_job_id)
+
+
+def _resend_next_chunk(
+    job: ResendJob,
+    chunk: list[Notificatie] | list[CloudEvent],
+    routing_index: NotificationRoutingIndex | CloudEventRoutingIndex,
+) -> bool:
+    """
+    Resend a chunk and store the progress of the job. Returns ``False`` if the job was
+    taken over by another task (after it was considered stale) in the meantime.
+    """
+    current = (
+        ResendJob.objects.select_for_update()
+        .filter(pk=job.pk)
+        .values_list("status", "last_message_id")
+        .get()
+    )
+    if current != (ResendJobStatus.running, job.last_message_id):
+        return False
+
+    job.scheduled += resend_chunk(job, chunk, routing_index)
+    job.processed += len(chunk)
+    job.last_message_id = chunk[-1].pk
+    job.save(update_fields=["processed", "scheduled", "last_message_id", "updated_at"])
+    return True
+
+
+def run_resend_job(job: ResendJob) -> None:
+    """
+    Run a job that was claimed with `claim_resend_job`.
+    """
+    if job.type == NotificationTypes.notification:
+        routing_index = notification_routing_index.get()
+    else:
+        routing_index = cloudevent_routing_index.get()
+
+    messages = get_messages(job)
+    if not job.processed:
+        job.total = messages.count()
+        job.save(update_fields=["total", "updated_at"])
+    logger.info("resend_job_started", resend_job_pk=job.pk, total=job.total)
+
+    try:
+        while chunk := list(
+            messages.filter(pk__gt=job.last_message_id)[
+                : settings.NOTIFICATION_RESEND_CHUNK_SIZE
+            ]
+        ):
+            with transaction.atomic():
+                if not _resend_next_chunk(job, chunk, routing_index):
+                    logger.warning("resend_job_taken_over", resend_job_pk=job.pk)
+                    return
+    except Exception:
+        logger.exception("resend_job_failed", resend_job_pk=job.pk)
+        job.status = ResendJobStatus.failed
+        job.save(update_fields=["status", "updated_at"])
+        raise
+
+    job.status = ResendJobStatus.finished
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at", "updated_at"])
+    logger.info("resend_job_finished", resend_job_pk=job.pk, scheduled=job.scheduled)
@@ -0,0 +1,185 @@
+"""
+Buffered recording of delivery results.
+
+Creating a `NotificatieResponse`/`CloudEventResponse` per delivery means an INSERT
+per subscription. Instead, the results are collected in a per-process buffer and
+written with `bulk_create` once the buffer is full or has not been flushed for
+``NOTIFICATION_RESPONSE_FLUSH_INTERVAL`` seconds. The buffer is also flushed when
+the Celery worker shuts down. If a batch can not be written, its responses are
+written one by one, so a single invalid response does not lose the others.
+
+The scheduled notifications that are finished (delivered or expired) are only deleted
+when the buffer is flushed, in the same transaction as the responses. If a worker is
+killed before it flushed its buffer, its finished scheduled notifications are left in
+progress, and are delivered again once they are considered stuck
+(``10 * NOTIFICATION_REQUESTS_TIMEOUT`` seconds). Only the responses of the failed
+attempts that were buffered are lost, the failed scheduled notifications themselves
+are rescheduled immediately.
+
+After a flush the delivery summaries of the messages of the responses are updated
+(see `nrc.api.summaries`).
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+import structlog
+
+from nrc.datamodel.models import (
+    CloudEvent,
+    CloudEventResponse,
+    Notificatie,
+    NotificatieResponse,
+    ScheduledNotification,
+)
+
+from .summaries import update_delivery_summaries
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+def _create_responses(
+    model: type[NotificatieResponse | CloudEventResponse],
+    responses: list[NotificatieResponse | CloudEventResponse],
+) -> list[NotificatieResponse | CloudEventResponse]:
+    """
+    Create the responses, and return the ones that were created.
+
+    If the batch can not be inserted (for example because a notificatie was deleted
+    in the meantime), the responses are inserted one by one, so only the failing
+    responses are lost.
+    """
+    if not responses:
+        return []
+
+    try:
+        with transaction.atomic():
+            return model.objects.bulk_create(responses)
+    except DatabaseError:
+        logger.warning(
+            "delivery_responses_batch_not_recorded",
+            model=model._meta.model_name,
+            count=len(responses),
+        )
+
+    created = []
+    for response in responses:
+        # the ids might have been set by the failed batch
+        response.pk = None
+        try:
+            with transaction.atomic():
+                response.save(force_insert=True)
+        except DatabaseError:
+            logger.exception(
+                "delivery_response_not_recorded",
+                model=model._meta.model_name,
+                subscription_pk=response.abonnement_id,
+            )
+        else:
+            created.append(response)
+    return created
+
+
+class ResponseBuffer:
+    """
+    Thread-safe buffer of delivery results.
+    """
+
+    def __init__(self):
+        self._responses: list[NotificatieResponse | CloudEventResponse] = []
+        self._finished_ids: list[int] = []
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def __len__(self) -> int:
+        return len(self._responses) + len(self._finished_ids)
+
+    def add(self, *responses: NotificatieResponse | CloudEventResponse) -> None:
+        self._add(responses, ())
+
+    def finish(self, *scheduled_notif_ids: int) -> None:
+        """
+        Delete the (delivered or expired) scheduled notifications when the buffer is
+        flushed.
+        """
+        self._add((), scheduled_notif_ids)
+
+    def _add(
+        self,
+        responses: tuple[NotificatieResponse | CloudEventResponse, ...],
+        scheduled_notif_ids: tuple[int, ...],
+    ) -> None:
+        if not responses and not scheduled_notif_ids:
+            return
+
+        with self._lock:
+            self._responses += responses
+            self._finished_ids += scheduled_notif_ids
+            full = len(self) >= settings.NOTIFICATION_RESPONSE_BUFFER_SIZE
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    settings.NOTIFICATION_RESPONSE_FLUSH_INTERVAL,
+                    self._flush_in_background,
+                )
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            responses, self._responses = self._responses, []
+            finished_ids, self._finished_ids = self._finished_ids, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not responses and not finished_ids:
+            return
+
+        try:
+            with transaction.atomic():
+                notificatie_responses = _create_responses(
+                    NotificatieResponse,
+                    [r for r in responses if isinstance(r, NotificatieResponse)],
+                )
+                cloudevent_responses = _create_responses(
+                    CloudEventResponse,
+                    [r for r in responses if isinstance(r, CloudEventResponse)],
+                )
+                if finished_ids:
+                    ScheduledNotification.objects.filter(id__in=finished_ids).delete()
+        except DatabaseError:
+            # the finished scheduled notifications are delivered again once they are
+            # considered stuck
+            logger.exception(
+                "delivery_results_not_recorded",
+                count=len(responses),
+                finished=len(finished_ids),
+            )
+            return
+
+        now = timezone.now()
+        try:
+            update_delivery_summaries(
+                Notificatie, [r.notificatie_id for r in notificatie_responses], now
+            )
+            update_delivery_summaries(
+                CloudEvent, [r.cloudevent_id for r in cloudevent_responses], now
+            )
+        except DatabaseError:
+            logger.exception("delivery_summaries_not_updated", count=len(responses))
+
+    def _flush_in_background(self) -> None:
+        try:
+            self.flush()
+        finally:
+            # the timer thread has its own database connection
+            connection.close()
+
+
+response_buffer = ResponseBuffer()
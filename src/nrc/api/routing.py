@@ -0,0 +1,236 @@
+"""
+In-memory routing of published messages to their subscriptions.
+
+Determining the subscriptions for a message used to query all filter groups of the
+kanaal (or all cloudevent filter groups) on every publish. Instead, the subscriptions
+are compiled into routing indexes that are kept in memory by every process and
+rebuilt when the subscriptions change.
+
+Changes are detected through a routing version stored in the (shared) Django cache,
+which is replaced whenever a subscription related model is saved or deleted (see
+:mod:`nrc.api.signals`).
+"""
+
+import threading
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Generic, TypeVar
+
+from django.core.cache import cache
+
+from djangorestframework_camel_case.util import camelize
+
+from nrc.datamodel.models import Abonnement, CloudEventFilterGroup, FilterGroup
+
+ROUTING_VERSION_CACHE_KEY = "nrc:routing_version"
+
+WILDCARD = "*"
+
+T = TypeVar("T")
+
+
+def get_routing_version() -> str:
+    version = cache.get(ROUTING_VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # another process might have set a version in the meantime
+        if not cache.add(ROUTING_VERSION_CACHE_KEY, version, timeout=None):
+            version = cache.get(ROUTING_VERSION_CACHE_KEY, version)
+    return version
+
+
+def invalidate_routing() -> None:
+    """
+    Mark all routing indexes (in all processes) as outdated.
+    """
+    cache.set(ROUTING_VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+class VersionedIndex(Generic[T]):
+    """
+    Process-local cache of a routing index, rebuilt if the routing version changed.
+    """
+
+    def __init__(self, build: Callable[[], T]):
+        self._build = build
+        self._entry: tuple[str, T] | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        version = get_routing_version()
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        with self._lock:
+            # another thread might have rebuilt the index while waiting for the lock
+            entry = self._entry
+            if entry is None or entry[0] != version:
+                entry = (version, self._build())
+                self._entry = entry
+        return entry[1]
+
+    def clear(self) -> None:
+        self._entry = None
+
+
+@dataclass(frozen=True)
+class Route:
+    abonnement: Abonnement
+    # camelized filters of the filter group, without wildcards
+    filters: dict[str, str]
+
+    @classmethod
+    def from_filter_group(cls, group: FilterGroup | CloudEventFilterGroup) -> "Route":
+        # to ignore case during matching the filter keys are camelized, just
+        # like in `match_pattern`
+        filters: dict[str, str] = camelize(
+            {f.key: f.value for f in group.filters.all() if f.value != WILDCARD}
+        )
+        return cls(abonnement=group.abonnement, filters=filters)
+
+    def matches(self, msg_filters: dict[str, str]) -> bool:
+        # filters that do not occur in the message are ignored, see `match_pattern`
+        return all(
+            msg_filters.get(key, value) == value for key, value in self.filters.items()
+        )
+
+
+@dataclass
+class KanaalRoutes:
+    # routes without (non-wildcard) filters, which match every message
+    unfiltered: list[Route] = field(default_factory=list)
+    # routes grouped by the key and value of their first filter
+    by_kenmerk: dict[str, dict[str, list[Route]]] = field(default_factory=dict)
+
+    def add(self, route: Route) -> None:
+        if not route.filters:
+            self.unfiltered.append(route)
+            return
+
+        key, value = next(iter(route.filters.items()))
+        self.by_kenmerk.setdefault(key, {}).setdefault(value, []).append(route)
+
+    def match(self, msg_filters: dict[str, str]) -> Iterator[Route]:
+        yield from self.unfiltered
+
+        for key, routes_by_value in self.by_kenmerk.items():
+            if key in msg_filters:
+                candidates = routes_by_value.get(msg_filters[key], [])
+            else:
+                candidates = chain.from_iterable(routes_by_value.values())
+
+            yield from (route for route in candidates if route.matches(msg_filters))
+
+
+class NotificationRoutingIndex:
+    """
+    Routes of all filter groups, grouped by the name of their kanaal.
+    """
+
+    def __init__(self, kanalen: dict[str, KanaalRoutes]):
+        self.kanalen = kanalen
+
+    @classmethod
+    def build(cls) -> "NotificationRoutingIndex":
+        kanalen: dict[str, KanaalRoutes] = {}
+        filter_groups = FilterGroup.objects.select_related(
+            "abonnement", "kanaal"
+        ).prefetch_related("filters")
+        for group in filter_groups.iterator(chunk_size=2000):
+            kanalen.setdefault(group.kanaal.naam, KanaalRoutes()).add(
+                Route.from_filter_group(group)
+            )
+        return cls(kanalen)
+
+    def get_subs(self, kanaal: str, msg_filters: dict[str, str]) -> set[Abonnement]:
+        if not (routes := self.kanalen.get(kanaal)):
+            return set()
+        return {route.abonnement for route in routes.match(msg_filters)}
+
+
+class SubstringMatcher:
+    """
+    Aho-Corasick automaton to find which of the patterns occur in a text.
+
+    The text is scanned once, regardless of the number of patterns.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._output: list[list[str]] = [[]]
+
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                if (next_state := self._goto[state].get(char)) is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._output.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state].append(pattern)
+
+        # breadth first, so the failure state of the parent is always known
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> set[str]:
+        # empty patterns occur in every text
+        found = set(self._output[0])
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found.update(self._output[state])
+        return found
+
+
+class CloudEventRoutingIndex:
+    """
+    Routes of all cloudevent filter groups, grouped by their type substring.
+    """
+
+    def __init__(self, type_substrings: dict[str, list[Route]]):
+        self.type_substrings = type_substrings
+        self.matcher = SubstringMatcher(type_substrings)
+
+    @classmethod
+    def build(cls) -> "CloudEventRoutingIndex":
+        type_substrings: dict[str, list[Route]] = {}
+        filter_groups = (
+            CloudEventFilterGroup.objects.filter(abonnement__send_cloudevents=True)
+            .select_related("abonnement")
+            .prefetch_related("filters")
+        )
+        for group in filter_groups.iterator(chunk_size=2000):
+            type_substrings.setdefault(group.type_substring, []).append(
+                Route.from_filter_group(group)
+            )
+        return cls(type_substrings)
+
+    def get_subs(self, type: str, msg_filters: dict[str, str]) -> set[Abonnement]:
+        return {
+            route.abonnement
+            for type_substring in self.matcher.find(type)
+            for route in self.type_substrings[type_substring]
+            if route.matches(msg_filters)
+        }
+
+
+notification_routing_index = VersionedIndex(NotificationRoutingIndex.build)
+cloudevent_routing_index = VersionedIndex(CloudEventRoutingIndex.build)
@@ -1,9 +1,9 @@
-import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.db.models import CharField, F, Value
 from django.forms.models import model_to_dict
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -16,6 +16,7 @@ from rest_framework.validators import UniqueValidator
 from vng_api_common.utils import get_help_text
 from vng_api_common.validators import IsImmutableValidator, URLValidator
 
+from nrc.datamodel.facets import add_facets
 from nrc.datamodel.models import (
     Abonnement,
     CloudEvent,
@@ -26,17 +27,37 @@ from nrc.datamodel.models import (
     Kanaal,
     Notificatie,
     NotificationTypes,
+    Payload,
     ScheduledNotification,
 )
 
 from ..utils.help_text import mark_experimental
+from .dispatcher import notify_dispatcher
 from .fields import JSONOrStringField, URIField, URIRefField
+from .kanalen import get_kanaal, kanaal_registry
+from .routing import (
+    CloudEventRoutingIndex,
+    NotificationRoutingIndex,
+    cloudevent_routing_index,
+    notification_routing_index,
+)
+from .summaries import update_delivery_summaries
 from .types import CloudEventKwargs, NotificationMessage
 from .validators import CallbackURLAuthValidator, CallbackURLValidator
 
 logger = structlog.stdlib.get_logger(__name__)
 
 
+def get_execute_after(sub: Abonnement, now: datetime) -> datetime:
+    """
+    Hold back messages for subscriptions that receive batches, so they can be sent
+    together with the messages that follow them.
+    """
+    if sub.sends_batches:
+        return now + timedelta(seconds=sub.batch_linger)
+    return now
+
+
 class FiltersField(fields.DictField):
     child = fields.CharField(
         label=_("kenmerk"),
@@ -45,8 +66,8 @@ class FiltersField(fields.DictField):
     )
 
     def to_representation(self, instance):
-        qs = instance.all()
-        return dict(qs.values_list("key", "value"))
+        # iterate over the related manager, to use the prefetched filters
+        return {filter.key: filter.value for filter in instance.all()}
 
     def to_internal_value(self, data):
         return [self.Meta.model(key=k, value=v) for k, v in data.items()]
@@ -160,12 +181,13 @@ class AbonnementSerializer(serializers.HyperlinkedModelSerializer):
 
     def validate(self, attrs):
         validated_attrs = super().validate(attrs)
+        kanalen = kanaal_registry.get()
         for group_data in validated_attrs.get("filter_groups", []):
             kanaal_data = group_data["kanaal"]
 
             # check kanaal exists
             try:
-                kanaal = Kanaal.objects.get(naam=kanaal_data["naam"])
+                kanaal = get_kanaal(kanaal_data["naam"], kanalen)
             except ObjectDoesNotExist:
                 raise serializers.ValidationError(
                     {"naam": _("Kanaal met deze naam bestaat niet.")},
@@ -190,11 +212,12 @@ class AbonnementSerializer(serializers.HyperlinkedModelSerializer):
         return validated_attrs
 
     def _create_kanalen_filters(self, abonnement, validated_data):
+        kanalen = kanaal_registry.get()
         for group_data in validated_data:
             kanaal_data = group_data.pop("kanaal")
             filters: list[Filter] = group_data.pop("filters", [])
 
-            kanaal = Kanaal.objects.get(naam=kanaal_data["naam"])
+            kanaal = get_kanaal(kanaal_data["naam"], kanalen)
             filter_group = FilterGroup.objects.create(
                 kanaal=kanaal, abonnement=abonnement
             )
@@ -238,12 +261,86 @@ class AbonnementSerializer(serializers.HyperlinkedModelSerializer):
         return abonnement
 
 
+class MessageListSerializer(serializers.ListSerializer):
+    """
+    Publish a batch of notifications.
+
+    The kanalen and the subscriptions are looked up once for the whole batch and the
+    deliveries of all notifications are scheduled in a single query.
+    """
+
+    def to_internal_value(self, data):
+        self.kanalen = kanaal_registry.get()
+        self.routing_index = notification_routing_index.get()
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        validated_data = super().run_child_validation(data)
+        subs = self.child._get_subs(validated_data, self.routing_index)
+        self.child._validate_source(validated_data, subs)
+        return validated_data
+
+    @transaction.atomic
+    def create(
+        self, validated_data: list[NotificationMessage]
+    ) -> list[NotificationMessage]:
+        all_subs = [
+            self.child._get_subs(msg, self.routing_index) for msg in validated_data
+        ]
+        notificaties: list[Notificatie | None] = [None] * len(validated_data)
+        if settings.LOG_NOTIFICATIONS_IN_DB:
+            notificaties = Notificatie.objects.bulk_create(
+                Notificatie(
+                    forwarded_msg=msg,
+                    kanaal=get_kanaal(msg["kanaal"], self.kanalen),
+                    aanmaakdatum=msg["aanmaakdatum"],
+                    actie=msg["actie"],
+                    resource=msg["resource"],
+                    pending_count=len(subs),
+                )
+                for msg, subs in zip(validated_data, all_subs, strict=True)
+            )
+            add_facets(notificaties)
+
+        # the messages are new, so they do not have earlier attempts
+        attempt = 1 if settings.LOG_NOTIFICATIONS_IN_DB else 0
+        now = timezone.now()
+        routed = []
+        for msg, subs, notificatie in zip(
+            validated_data, all_subs, notificaties, strict=True
+        ):
+            self.child._log(msg)
+            if subs:
+                payload = Payload(type=NotificationTypes.notification, data=msg)
+                routed.append((subs, payload, notificatie))
+
+        # the message is stored once for all subscriptions
+        Payload.objects.bulk_create(payload for _, payload, _ in routed)
+        ScheduledNotification.objects.bulk_create(
+            scheduled_notif
+            for subs, payload, notificatie in routed
+            for scheduled_notif in self.child._get_scheduled_notifications(
+                subs, payload, notificatie, attempt, now
+            )
+        )
+        if routed:
+            notify_dispatcher()
+        return validated_data
+
+
 class MessageSerializer(NotificatieSerializer):
+    class Meta:
+        list_serializer_class = MessageListSerializer
+
+    def _get_kanaal(self, naam: str) -> Kanaal:
+        # the messages of a batch use the registry of the list serializer
+        return get_kanaal(naam, getattr(self.parent, "kanalen", None))
+
     def validate(self, attrs):
         validated_attrs = super().validate(attrs)
         # check if exchange exists
         try:
-            kanaal = Kanaal.objects.get(naam=validated_attrs["kanaal"])
+            kanaal = self._get_kanaal(validated_attrs["kanaal"])
         except ObjectDoesNotExist:
             raise serializers.ValidationError(
                 {"kanaal": _("Kanaal met deze naam bestaat niet.")},
@@ -261,22 +358,34 @@ class MessageSerializer(NotificatieSerializer):
         # ensure we're still camelCasing
         return camelize(validated_attrs)
 
-    def _get_subs(self, msg) -> set[Abonnement]:
-        # define subs
-        msg_filters = msg["kenmerken"]
-        subs = set()
-        filter_groups = (
-            FilterGroup.objects.filter(
-                kanaal__naam=msg["kanaal"],
-            )
-            .select_related("abonnement")
-            .prefetch_related("filters")
-        )
-        for group in filter_groups:
-            if group.match_pattern(msg_filters):
-                subs.add(group.abonnement)
+    def _get_subs(
+        self, msg, routing_index: NotificationRoutingIndex | None = None
+    ) -> set[Abonnement]:
+        if routing_index is None:
+            routing_index = notification_routing_index.get()
+        return routing_index.get_subs(msg["kanaal"], msg["kenmerken"])
 
-        return subs
+    def _get_scheduled_notifications(
+        self,
+        subs: set[Abonnement],
+        payload: Payload,
+        notificatie: Notificatie | None,
+        attempt: int,
+        now: datetime,
+    ) -> list[ScheduledNotification]:
+        return [
+            ScheduledNotification(
+                type=NotificationTypes.notification
+                if not sub.send_cloudevents
+                else NotificationTypes.cloudevent,
+                payload=payload,
+                execute_after=get_execute_after(sub, now),
+                attempt=attempt,
+                notificatie=notificatie,
+                sub=sub,
+            )
+            for sub in subs
+        ]
 
     def _schedule_notification(
         self,
@@ -284,40 +393,18 @@ class MessageSerializer(NotificatieSerializer):
         msg: NotificationMessage,
         notificatie: Notificatie | None = None,
     ):
+        if not subs:
+            return
+
+        attempt = notificatie.last_attempt + 1 if notificatie else 0
+        # the message is stored once for all subscriptions
+        payload = Payload.objects.create(type=NotificationTypes.notification, data=msg)
         ScheduledNotification.objects.bulk_create(
-            [
-                ScheduledNotification(
-                    type=NotificationTypes.notification
-                    if not sub.send_cloudevents
-                    else NotificationTypes.cloudevent,
-                    task_args=msg
-                    if not sub.send_cloudevents
-                    else self._transform_to_cloudevent(msg),
-                    execute_after=timezone.now(),
-                    attempt=notificatie.last_attempt + 1 if notificatie else 0,
-                    notificatie=notificatie,
-                    sub=sub,
-                )
-                for sub in subs
-            ]
+            self._get_scheduled_notifications(
+                subs, payload, notificatie, attempt, timezone.now()
+            )
         )
-
-    def _transform_to_cloudevent(self, notif: NotificationMessage) -> CloudEventKwargs:
-        return {
-            "id": str(uuid.uuid4()),
-            "source": notif["source"],
-            "specversion": settings.CLOUDEVENT_SPECVERSION,
-            "type": f"nl.overheid.{notif['kanaal']}.{notif['resource']}.{notif['actie']}",
-            "datacontenttype": "application/json",
-            "subject": notif["resourceUrl"].rsplit("/", 1)[
-                1
-            ],  # TODO the whole resourceUrl would make the location of the resource clearer.
-            "time": notif["aanmaakdatum"].strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "data": {
-                **notif["kenmerken"],
-                "hoofdObject": notif["hoofdObject"],
-            },
-        }
+        notify_dispatcher()
 
     def _validate_source(self, validated_data, subs) -> None:
         if not validated_data.get("source"):
@@ -335,19 +422,7 @@ class MessageSerializer(NotificatieSerializer):
                     )
                 )
 
-    def create(self, validated_data: NotificationMessage) -> NotificationMessage:
-        notificatie: Notificatie | None = validated_data.pop("notificatie", None)
-
-        if not notificatie and settings.LOG_NOTIFICATIONS_IN_DB:
-            # creation of the notification
-            kanaal = Kanaal.objects.get(naam=validated_data["kanaal"])
-            notificatie = Notificatie.objects.create(
-                forwarded_msg=validated_data, kanaal=kanaal
-            )
-
-        subs = self._get_subs(validated_data)
-        self._validate_source(validated_data, subs)
-
+    def _log(self, validated_data: NotificationMessage) -> None:
         with structlog.contextvars.bound_contextvars(
             channel_name=validated_data["kanaal"],
             resource=validated_data["resource"],
@@ -359,7 +434,26 @@ class MessageSerializer(NotificatieSerializer):
             additional_attributes=validated_data.get("kenmerken"),
         ):
             logger.info("notification_received")
+
+    def create(self, validated_data: NotificationMessage) -> NotificationMessage:
+        notificatie: Notificatie | None = validated_data.pop("notificatie", None)
+        resent = notificatie is not None
+
+        subs = self._get_subs(validated_data)
+        if not notificatie and settings.LOG_NOTIFICATIONS_IN_DB:
+            # creation of the notification
+            kanaal = self._get_kanaal(validated_data["kanaal"])
+            notificatie = Notificatie.objects.create(
+                forwarded_msg=validated_data, kanaal=kanaal, pending_count=len(subs)
+            )
+            add_facets([notificatie])
+
+        self._validate_source(validated_data, subs)
+
+        self._log(validated_data)
         self._schedule_notification(subs, validated_data, notificatie)
+        if resent and subs:
+            update_delivery_summaries(Notificatie, [notificatie.pk])
         return validated_data
 
     @classmethod
@@ -371,6 +465,75 @@ class MessageSerializer(NotificatieSerializer):
             serializer.save(notificatie=obj)
 
 
+class CloudEventListSerializer(serializers.ListSerializer):
+    """
+    Publish a batch of cloudevents.
+
+    The subscriptions are looked up once for the whole batch and the deliveries of
+    all cloudevents are scheduled in a single query.
+    """
+
+    def to_internal_value(self, data):
+        self.routing_index = cloudevent_routing_index.get()
+        return super().to_internal_value(data)
+
+    def validate(self, attrs: list[CloudEventKwargs]) -> list[CloudEventKwargs]:
+        # the cloudevents are only checked against the existing ones per item
+        indexes: dict[tuple[str, str], list[int]] = defaultdict(list)
+        for index, msg in enumerate(attrs):
+            indexes[(msg["id"], msg["source"])].append(index)
+
+        if duplicates := [group for group in indexes.values() if len(group) > 1]:
+            raise serializers.ValidationError(
+                [
+                    _(
+                        "The cloudevents at positions {indexes} have the same id "
+                        "and source."
+                    ).format(indexes=", ".join(str(index) for index in group))
+                    for group in duplicates
+                ],
+                code="unique",
+            )
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data: list[CloudEventKwargs]) -> list[CloudEventKwargs]:
+        all_subs = [
+            self.child._get_subs(msg, self.routing_index) for msg in validated_data
+        ]
+        cloudevents: list[CloudEvent | None] = [None] * len(validated_data)
+        if settings.LOG_NOTIFICATIONS_IN_DB:
+            cloudevents = CloudEvent.objects.bulk_create(
+                CloudEvent(**attrs, pending_count=len(subs))
+                for attrs, subs in zip(validated_data, all_subs, strict=True)
+            )
+
+        # the messages are new, so they do not have earlier attempts
+        attempt = 1 if settings.LOG_NOTIFICATIONS_IN_DB else 0
+        now = timezone.now()
+        routed = []
+        for msg, subs, cloudevent in zip(
+            validated_data, all_subs, cloudevents, strict=True
+        ):
+            self.child._log(msg)
+            if subs:
+                payload = Payload(type=NotificationTypes.cloudevent, data=msg)
+                routed.append((subs, payload, cloudevent))
+
+        # the message is stored once for all subscriptions
+        Payload.objects.bulk_create(payload for _, payload, _ in routed)
+        ScheduledNotification.objects.bulk_create(
+            scheduled_notif
+            for subs, payload, cloudevent in routed
+            for scheduled_notif in self.child._get_scheduled_notifications(
+                subs, payload, cloudevent, attempt, now
+            )
+        )
+        if routed:
+            notify_dispatcher()
+        return validated_data
+
+
 class CloudEventSerializer(serializers.ModelSerializer):
     source = URIRefField(help_text=get_help_text("datamodel.CloudEvent", "source"))
     dataschema = URIField(
@@ -387,22 +550,39 @@ class CloudEventSerializer(serializers.ModelSerializer):
     class Meta:
         model = CloudEvent
         fields = "__all__"
+        list_serializer_class = CloudEventListSerializer
 
-    def _get_subs(self, msg: CloudEventKwargs) -> set[Abonnement]:
-        msg_filters = msg.get("data", {})
-        subs: set[Abonnement] = set()
-        filter_groups = (
-            CloudEventFilterGroup.objects.select_related("abonnement")
-            .prefetch_related("filters")
-            .annotate(type=Value(msg["type"], CharField()))
-            .filter(
-                type__contains=F("type_substring"), abonnement__send_cloudevents=True
+    def _get_subs(
+        self,
+        msg: CloudEventKwargs,
+        routing_index: CloudEventRoutingIndex | None = None,
+    ) -> set[Abonnement]:
+        msg_filters = msg.get("data")
+        if not isinstance(msg_filters, dict):
+            msg_filters = {}
+        if routing_index is None:
+            routing_index = cloudevent_routing_index.get()
+        return routing_index.get_subs(msg["type"], msg_filters)
+
+    def _get_scheduled_notifications(
+        self,
+        subs: set[Abonnement],
+        payload: Payload,
+        cloudevent: CloudEvent | None,
+        attempt: int,
+        now: datetime,
+    ) -> list[ScheduledNotification]:
+        return [
+            ScheduledNotification(
+                type=NotificationTypes.cloudevent,
+                payload=payload,
+                execute_after=get_execute_after(sub, now),
+                attempt=attempt,
+                cloudevent=cloudevent,
+                sub=sub,
             )
-        )
-        for group in filter_groups:
-            if group.match_pattern(msg_filters):
-                subs.add(group.abonnement)
-        return subs
+            for sub in subs
+        ]
 
     def _schedule_cloudevent(
         self,
@@ -410,19 +590,18 @@ class CloudEventSerializer(serializers.ModelSerializer):
         msg: CloudEventKwargs,
         cloudevent: CloudEvent | None = None,
     ):
+        if not subs:
+            return
+
+        attempt = cloudevent.last_attempt + 1 if cloudevent else 0
+        # the message is stored once for all subscriptions
+        payload = Payload.objects.create(type=NotificationTypes.cloudevent, data=msg)
         ScheduledNotification.objects.bulk_create(
-            [
-                ScheduledNotification(
-                    type=NotificationTypes.cloudevent,
-                    task_args=msg,
-                    execute_after=timezone.now(),
-                    attempt=cloudevent.last_attempt + 1 if cloudevent else 0,
-                    cloudevent=cloudevent,
-                    sub=sub,
-                )
-                for sub in subs
-            ]
+            self._get_scheduled_notifications(
+                subs, payload, cloudevent, attempt, timezone.now()
+            )
         )
+        notify_dispatcher()
 
     def _log(self, validated_data: CloudEventKwargs) -> None:
         with structlog.contextvars.bound_contextvars(
@@ -434,13 +613,13 @@ class CloudEventSerializer(serializers.ModelSerializer):
             logger.info("cloudevent_received")
 
     def create(self, validated_data: CloudEventKwargs) -> CloudEventKwargs:
+        subs = self._get_subs(validated_data)
         if settings.LOG_NOTIFICATIONS_IN_DB:
-            cloudevent = super().create(validated_data)
+            cloudevent = super().create({**validated_data, "pending_count": len(subs)})
         else:
             cloudevent = None
 
         self._log(validated_data)
-        subs = self._get_subs(validated_data)
         self._schedule_cloudevent(subs, validated_data, cloudevent)
         return validated_data
 
@@ -448,6 +627,8 @@ class CloudEventSerializer(serializers.ModelSerializer):
         self._log(validated_data)
         subs = self._get_subs(validated_data)
         self._schedule_cloudevent(subs, validated_data, instance)
+        if subs:
+            update_delivery_summaries(CloudEvent, [instance.pk])
         return validated_data
 
     @classmethod
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from vng_api_common.authorizations.models import (
+    Applicatie,
+    AuthorizationsConfig,
+    Autorisatie,
+)
+from vng_api_common.models import JWTSecret
+
+from nrc.datamodel.models import (
+    Abonnement,
+    CloudEventFilter,
+    CloudEventFilterGroup,
+    Filter,
+    FilterGroup,
+    Kanaal,
+)
+
+from .auth import invalidate_auth, resolving_scopes
+from .routing import invalidate_routing
+
+# the kanaal registry (see `nrc.api.kanalen`) shares the routing version
+ROUTING_MODELS = (
+    Kanaal,
+    Abonnement,
+    FilterGroup,
+    Filter,
+    CloudEventFilterGroup,
+    CloudEventFilter,
+)
+
+AUTH_MODELS = (
+    JWTSecret,
+    Applicatie,
+    Autorisatie,
+    AuthorizationsConfig,
+)
+
+
+def invalidate_routing_on_change(sender, **kwargs) -> None:
+    # Invalidate right away so the change is visible in the current transaction,
+    # and again after the commit to discard indexes that other processes built
+    # before the change was visible to them.
+    invalidate_routing()
+    transaction.on_commit(invalidate_routing)
+
+
+for model in ROUTING_MODELS:
+    post_save.connect(
+        invalidate_routing_on_change,
+        sender=model,
+        dispatch_uid=f"{model._meta.label_lower}.post_save.invalidate_routing",
+    )
+    post_delete.connect(
+        invalidate_routing_on_change,
+        sender=model,
+        dispatch_uid=f"{model._meta.label_lower}.post_delete.invalidate_routing",
+    )
+
+
+def invalidate_auth_on_change(sender, **kwargs) -> None:
+    # the applicaties and autorisaties that are stored while resolving the scopes
+    # of a client are the ones that are cached
+    if resolving_scopes.get():
+        return
+
+    invalidate_auth()
+    transaction.on_commit(invalidate_auth)
+
+
+for model in AUTH_MODELS:
+    post_save.connect(
+        invalidate_auth_on_change,
+        sender=model,
+        dispatch_uid=f"{model._meta.label_lower}.post_save.invalidate_auth",
+    )
+    post_delete.connect(
+        invalidate_auth_on_change,
+        sender=model,
+        dispatch_uid=f"{model._meta.label_lower}.post_delete.invalidate_auth",
+    )
@@ -0,0 +1,140 @@
+"""
+Delivery summaries of the logged notifications and cloudevents.
+
+The admin shows whether the deliveries of a message succeeded. Instead of aggregating
+the (many) responses of every message on each page view, the results are stored on the
+message itself (see `nrc.datamodel.models.DeliverySummary`):
+
+* ``delivered_count``/``failed_count``: the number of subscriptions of which the
+  latest response succeeded or failed
+* ``pending_count``: the number of scheduled deliveries without a response for their
+  attempt yet
+* ``last_attempt_at``: when the latest responses were recorded
+
+The summaries are updated for the messages of which responses were recorded (see
+`nrc.api.responses`), with a few queries per flush of the response buffer. The messages
+are locked while their summaries are recalculated, so concurrent flushes (of different
+workers) for the same messages can not store outdated counts.
+
+The summaries are recalculated, not updated with the new responses: the latest response
+of every subscription is read from an index on (message, subscription, attempt), so a
+flush reads all responses of the messages it recorded responses for. This is cheap for
+the usual number of subscriptions per message, but grows with the subscriptions and
+retries of a message.
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from nrc.datamodel.models import (
+    CloudEvent,
+    CloudEventResponse,
+    Notificatie,
+    NotificatieResponse,
+    ScheduledNotification,
+)
+
+Message = Notificatie | CloudEvent
+
+RESPONSE_MODELS: dict[type[Message], type[NotificatieResponse | CloudEventResponse]] = {
+    Notificatie: NotificatieResponse,
+    CloudEvent: CloudEventResponse,
+}
+
+
+def is_delivered(response_status: int | None) -> bool:
+    return response_status is not None and 200 <= response_status < 300
+
+
+def get_latest_responses(
+    model: type[Message], ids: list[int]
+) -> Iterable[tuple[int, int, int | None]]:
+    """
+    Return the message id, subscription id and response status of the latest response
+    of every subscription to the messages.
+    """
+    field = model._meta.model_name
+    return (
+        RESPONSE_MODELS[model]
+        .objects.filter(**{f"{field}__in": ids})
+        .order_by(f"{field}_id", "abonnement_id", "-attempt", "-pk")
+        .distinct(f"{field}_id", "abonnement_id")
+        .values_list(f"{field}_id", "abonnement_id", "response_status")
+    )
+
+
+def update_delivery_summaries(
+    model: type[Message],
+    ids: list[int],
+    last_attempt_at: datetime | None = None,
+) -> None:
+    """
+    Recalculate the delivery summaries of the messages from their responses and
+    scheduled notifications.
+
+    ``last_attempt_at`` is only set if responses were recorded for the messages.
+    """
+    if not ids:
+        return
+
+    with transaction.atomic():
+        # the rows are locked in order of their pk, to prevent deadlocks between
+        # concurrent updates
+        list(
+            model.objects.filter(pk__in=ids)
+            .order_by("pk")
+            .select_for_update()
+            .values_list("pk", flat=True)
+        )
+        _update_delivery_summaries(model, ids, last_attempt_at)
+
+
+def _update_delivery_summaries(
+    model: type[Message], ids: list[int], last_attempt_at: datetime | None
+) -> None:
+    response_model = RESPONSE_MODELS[model]
+    # `notificatie` or `cloudevent`, for both the responses and scheduled notifications
+    field = model._meta.model_name
+
+    delivered, failed = Counter(), Counter()
+    for message_id, _, response_status in get_latest_responses(model, ids):
+        if is_delivered(response_status):
+            delivered[message_id] += 1
+        else:
+            failed[message_id] += 1
+
+    pending = Counter(
+        ScheduledNotification.objects.filter(**{f"{field}__in": ids})
+        .exclude(
+            Exists(
+                response_model.objects.filter(
+                    **{field: OuterRef(field)},
+                    abonnement=OuterRef("sub"),
+                    attempt=OuterRef("attempt"),
+                )
+            )
+        )
+        .values_list(f"{field}_id", flat=True)
+    )
+
+    fields = ["delivered_count", "failed_count", "pending_count"]
+    if last_attempt_at:
+        fields.append("last_attempt_at")
+
+    model.objects.bulk_update(
+        [
+            model(
+                pk=message_id,
+                delivered_count=delivered[message_id],
+                failed_count=failed[message_id],
+                pending_count=pending[message_id],
+                last_attempt_at=last_attempt_at,
+            )
+            for message_id in set(ids)
+        ],
+        fields=fields,
+    )
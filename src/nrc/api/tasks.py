@@ -1,11 +1,14 @@
 import json
-from datetime import timedelta
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import batched
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.management import call_command
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -18,20 +21,36 @@ from notifications_api_common.exponential_backoff import (
 )
 from notifications_api_common.models import NotificationsConfig
 from oauthlib.oauth2.rfc6749.errors import OAuth2Error
+from rest_framework.exceptions import ValidationError
 from structlog.contextvars import bind_contextvars
-from zgw_consumers.client import build_client
-from zgw_consumers.models import Service
 
 from nrc.celery import app
 from nrc.datamodel.models import (
     Abonnement,
-    CloudEvent,
     CloudEventResponse,
     NotificatieResponse,
     NotificationTypes,
+    Payload,
+    ReceivedMessage,
     ScheduledNotification,
 )
 
+from .bulk_delivery import Delivery, deliver
+from .callback_checks import check_callback_urls
+from .circuit_breaker import CircuitBreaker, get_open_circuits, is_available
+from .clients import get_client
+from .metrics import (
+    delivery_delay_histogram,
+    delivery_expired_counter,
+    delivery_retries_counter,
+    record_delivery_duration,
+    scheduler_claim_duration_histogram,
+    scheduler_claimed_histogram,
+)
+from .payloads import get_task_args
+from .resend import claim_resend_job, get_stale_jobs, run_resend_job
+from .responses import response_buffer
+from .serializers import CloudEventSerializer, MessageSerializer
 from .types import (
     CloudEventKwargs,
     SendNotificationTaskKwargs,
@@ -40,27 +59,31 @@ from .types import (
 logger = structlog.stdlib.get_logger(__name__)
 
 
-class NotificationException(Exception):
+class DeliveryException(Exception):
+    def __init__(self, message: str, response_status: int):
+        super().__init__(message)
+        self.response_status = response_status
+
+
+class NotificationException(DeliveryException):
     pass
 
 
-class CloudEventException(Exception):
+class CloudEventException(DeliveryException):
     pass
 
 
-def service_from_abonnement(abonnement: Abonnement) -> Service:
-    return Service(
-        api_root=abonnement.callback_url,
-        auth_type=abonnement.auth_type,
-        header_key="Authorization",
-        header_value=abonnement.auth,
-        client_id=abonnement.client_id,
-        secret=abonnement.secret,
-        oauth2_token_url=abonnement.oauth2_token_url,
-        oauth2_scope=abonnement.oauth2_scope,
-        client_certificate=abonnement.client_certificate,
-        server_certificate=abonnement.server_certificate,
+def _record_delivery_result(
+    circuit_breaker: CircuitBreaker, exception: Exception | None
+) -> None:
+    # a subscription that responds with a client error is available
+    response_status = (
+        exception.response_status if isinstance(exception, DeliveryException) else None
     )
+    if exception is None or is_available(response_status):
+        circuit_breaker.record_success()
+    else:
+        circuit_breaker.record_failure()
 
 
 def deliver_message(sub: Abonnement, msg: SendNotificationTaskKwargs, **kwargs) -> None:
@@ -81,9 +104,11 @@ def deliver_message(sub: Abonnement, msg: SendNotificationTaskKwargs, **kwargs)
         subscription_callback=sub.callback_url,
     )
 
+    # the response status (if a response was received) and the exception of a failure
+    response_init_kwargs = {}
+    start = time.monotonic()
     try:
-        service = service_from_abonnement(sub)
-        client = build_client(service)
+        client = get_client(sub)
 
         response = client.post(
             sub.callback_url,
@@ -106,7 +131,7 @@ def deliver_message(sub: Abonnement, msg: SendNotificationTaskKwargs, **kwargs)
                 task_attempt_count=task_attempt_count,
                 notification_attempt_count=notification_attempt_count,
             )
-            raise NotificationException(exception_message)
+            raise NotificationException(exception_message, response.status_code)
         else:
             logger.info(
                 "notification_successful",
@@ -128,14 +153,27 @@ def deliver_message(sub: Abonnement, msg: SendNotificationTaskKwargs, **kwargs)
             task_attempt_count=task_attempt_count,
         )
         raise
+    except Exception as e:
+        # unexpected errors are recorded in the response as well
+        response_init_kwargs.setdefault(
+            "exception", (str(e) or type(e).__name__)[:1000]
+        )
+        raise
     finally:
+        record_delivery_duration(
+            time.monotonic() - start,
+            response_init_kwargs.get("response_status"),
+            NotificationTypes.notification,
+        )
         # Only log if a top-level object is provided
         if notificatie_id:
-            NotificatieResponse.objects.create(
-                notificatie_id=notificatie_id,
-                abonnement=sub,
-                attempt=notification_attempt_count,
-                **response_init_kwargs,
+            response_buffer.add(
+                NotificatieResponse(
+                    notificatie_id=notificatie_id,
+                    abonnement_id=sub.id,
+                    attempt=notification_attempt_count,
+                    **response_init_kwargs,
+                )
             )
 
 
@@ -154,9 +192,11 @@ def deliver_cloudevent(sub: Abonnement, cloudevent: CloudEventKwargs, **kwargs)
     cloudevent_attempt_count = kwargs.get("attempt", 1)
     bind_contextvars(subscription_pk=sub.id, subscription_callback=sub.callback_url)
 
+    # the response status (if a response was received) and the exception of a failure
+    response_init_kwargs = {}
+    start = time.monotonic()
     try:
-        service = service_from_abonnement(sub)
-        client = build_client(service)
+        client = get_client(sub)
 
         response = client.post(
             sub.callback_url,
@@ -179,7 +219,7 @@ def deliver_cloudevent(sub: Abonnement, cloudevent: CloudEventKwargs, **kwargs)
                 task_attempt_count=task_attempt_count,
                 cloudevent_attempt_count=cloudevent_attempt_count,
             )
-            raise CloudEventException(exception_message)
+            raise CloudEventException(exception_message, response.status_code)
         else:
             logger.info(
                 "cloudevent_successful",
@@ -201,24 +241,132 @@ def deliver_cloudevent(sub: Abonnement, cloudevent: CloudEventKwargs, **kwargs)
             task_attempt_count=task_attempt_count,
         )
         raise
+    except Exception as e:
+        # unexpected errors are recorded in the response as well
+        response_init_kwargs.setdefault(
+            "exception", (str(e) or type(e).__name__)[:1000]
+        )
+        raise
     finally:
+        record_delivery_duration(
+            time.monotonic() - start,
+            response_init_kwargs.get("response_status"),
+            NotificationTypes.cloudevent,
+        )
         # Only log if a top-level object is provided
         if cloudevent_id:
-            CloudEventResponse.objects.create(
-                cloudevent=CloudEvent.objects.get(id=cloudevent_id),
-                abonnement=sub,
-                attempt=cloudevent_attempt_count,
-                **response_init_kwargs,
+            response_buffer.add(
+                CloudEventResponse(
+                    cloudevent_id=cloudevent_id,
+                    abonnement_id=sub.id,
+                    attempt=cloudevent_attempt_count,
+                    **response_init_kwargs,
+                )
             )
         elif notificatie_id:
-            NotificatieResponse.objects.create(
-                notificatie_id=notificatie_id,
-                abonnement=sub,
-                attempt=cloudevent_attempt_count,
-                **response_init_kwargs,
+            response_buffer.add(
+                NotificatieResponse(
+                    notificatie_id=notificatie_id,
+                    abonnement_id=sub.id,
+                    attempt=cloudevent_attempt_count,
+                    **response_init_kwargs,
+                )
             )
 
 
+def deliver_cloudevent_batch(
+    sub: Abonnement, scheduled_notifs: list[ScheduledNotification]
+) -> None:
+    """
+    send multiple cloud events to subscriber in a single request, using the batched
+    content mode
+
+    The delivery-result is logged in "CloudEventResponse" (or "NotificatieResponse")
+    for each of the cloudevents
+    """
+    bind_contextvars(
+        subscription_pk=sub.id,
+        subscription_callback=sub.callback_url,
+        batch_size=len(scheduled_notifs),
+    )
+
+    # the response status (if a response was received) and the exception of a failure
+    response_init_kwargs = {}
+    start = time.monotonic()
+    try:
+        client = get_client(sub)
+
+        response = client.post(
+            sub.callback_url,
+            data=json.dumps(
+                [
+                    get_task_args(scheduled_notif)
+                    for scheduled_notif in scheduled_notifs
+                ],
+                cls=DjangoJSONEncoder,
+            ),
+            headers={
+                "Content-Type": "application/cloudevents-batch+json",
+            },
+            timeout=settings.NOTIFICATION_REQUESTS_TIMEOUT,
+        )
+        response_init_kwargs = {"response_status": response.status_code}
+
+        if not 200 <= response.status_code < 300:
+            exception_message = _(
+                "Could not send cloudevent batch: status {status_code} - {response}"
+            ).format(status_code=response.status_code, response=response.text)
+            response_init_kwargs["exception"] = exception_message[:1000]
+            logger.warning(
+                "cloudevent_batch_failed", http_status_code=response.status_code
+            )
+            raise CloudEventException(exception_message, response.status_code)
+        else:
+            logger.info("cloudevent_batch_successful")
+    except (
+        requests.RequestException,
+        OAuth2Error,
+        urllib3.exceptions.MaxRetryError,
+        requests.exceptions.ConnectionError,
+        urllib3.exceptions.NameResolutionError,
+    ) as e:
+        response_init_kwargs = {"exception": str(e)}
+        logger.exception("cloudevent_batch_error", exc_info=e)
+        raise
+    except Exception as e:
+        # unexpected errors are recorded in the response as well
+        response_init_kwargs.setdefault(
+            "exception", (str(e) or type(e).__name__)[:1000]
+        )
+        raise
+    finally:
+        record_delivery_duration(
+            time.monotonic() - start,
+            response_init_kwargs.get("response_status"),
+            "cloudevent_batch",
+        )
+        for scheduled_notif in scheduled_notifs:
+            # Only log if a top-level object is provided
+            if scheduled_notif.cloudevent_id:
+                response_buffer.add(
+                    CloudEventResponse(
+                        cloudevent_id=scheduled_notif.cloudevent_id,
+                        abonnement_id=sub.id,
+                        attempt=scheduled_notif.attempt,
+                        **response_init_kwargs,
+                    )
+                )
+            elif scheduled_notif.notificatie_id:
+                response_buffer.add(
+                    NotificatieResponse(
+                        notificatie_id=scheduled_notif.notificatie_id,
+                        abonnement_id=sub.id,
+                        attempt=scheduled_notif.attempt,
+                        **response_init_kwargs,
+                    )
+                )
+
+
 @app.task
 def clean_old_notifications() -> None:
     """
@@ -227,6 +375,59 @@ def clean_old_notifications() -> None:
     call_command("clean_old_notifications")
 
 
+@app.task
+def clean_payloads() -> None:
+    """
+    Deletes the payloads that are no longer used by any scheduled notification.
+
+    Recent payloads are kept, their scheduled notifications might not be created
+    yet.
+    """
+    cutoff = timezone.now() - timedelta(hours=1)
+    deleted, _ = (
+        Payload.objects.filter(created_at__lt=cutoff)
+        .exclude(Exists(ScheduledNotification.objects.filter(payload=OuterRef("pk"))))
+        .delete()
+    )
+    logger.info("clean_payloads", deleted=deleted)
+
+
+@app.task
+def resend_messages(resend_job_id: int) -> None:
+    """
+    Resends the notifications or cloudevents of a `ResendJob` (see `nrc.api.resend`).
+    """
+    if (job := claim_resend_job(resend_job_id)) is None:
+        # the job does not exist, is finished or is already running
+        logger.info("resend_job_not_claimed", resend_job_pk=resend_job_id)
+        return None
+
+    run_resend_job(job)
+
+
+@app.task
+def resume_resend_jobs() -> None:
+    """
+    Resumes the resend jobs that were interrupted (see `nrc.api.resend`).
+    """
+    for resend_job_id in get_stale_jobs().values_list("pk", flat=True):
+        logger.info("resend_job_resumed", resend_job_pk=resend_job_id)
+        resend_messages.delay(resend_job_id)
+
+
+@app.task
+def check_callbacks(abonnement_ids: list[int] | None = None) -> None:
+    """
+    Checks the callback URLs of the subscriptions, or of all subscriptions if no ids
+    are given (see `nrc.api.callback_checks`).
+    """
+    abonnementen = Abonnement.objects.all()
+    if abonnement_ids is not None:
+        abonnementen = abonnementen.filter(pk__in=abonnement_ids)
+
+    check_callback_urls(abonnementen.only("callback_url", "auth"))
+
+
 @app.task
 def send_to_sub(scheduled_notif_id: int, task_kwargs):
     """
@@ -238,15 +439,18 @@ def send_to_sub(scheduled_notif_id: int, task_kwargs):
 
     If the requests fails the scheduled notification will updated so that it can be run again.
     After the notification_delivery_max_retries is reached or the request was successful
-    the ScheduledNotification will be deleted.
+    the ScheduledNotification will be deleted, together with its response (see
+    `nrc.api.responses`).
     """
     try:
-        scheduled_notif = ScheduledNotification.objects.get(id=scheduled_notif_id)
+        scheduled_notif = ScheduledNotification.objects.select_related("payload").get(
+            id=scheduled_notif_id
+        )
     except ScheduledNotification.DoesNotExist:
         logger.error("scheduled_notification_does_not_exist")
         return None
 
-    msg = scheduled_notif.task_args
+    msg = get_task_args(scheduled_notif)
 
     if scheduled_notif.type == NotificationTypes.notification:
         bind_contextvars(
@@ -267,6 +471,15 @@ def send_to_sub(scheduled_notif_id: int, task_kwargs):
             subject=msg.get("subject"),
         )
 
+    circuit_breaker = CircuitBreaker(scheduled_notif.sub_id)
+    if retry_at := circuit_breaker.retry_at():
+        logger.info("scheduled_notification_deferred", retry_at=retry_at)
+        _defer_scheduled_notifications(
+            {scheduled_notif.sub_id: retry_at}, [scheduled_notif.id]
+        )
+        return None
+
+    _record_delivery_delay([scheduled_notif])
     try:
         if scheduled_notif.sub.send_cloudevents:
             deliver_cloudevent(
@@ -276,15 +489,90 @@ def send_to_sub(scheduled_notif_id: int, task_kwargs):
             )
         else:
             deliver_message(scheduled_notif.sub, msg, **task_kwargs)
-    except Exception:
+    except Exception as e:
+        _record_delivery_result(circuit_breaker, e)
         _fail_scheduled_notification(scheduled_notif)
     else:
-        scheduled_notif.delete()
+        _record_delivery_result(circuit_breaker, None)
+        response_buffer.finish(scheduled_notif.id)
+
+
+def _record_delivery_delay(scheduled_notifs: list[ScheduledNotification]) -> None:
+    now = timezone.now()
+    for scheduled_notif in scheduled_notifs:
+        # retries are delayed on purpose, so only the first attempt is recorded
+        if scheduled_notif.task_attempt == 0 and scheduled_notif.payload:
+            delivery_delay_histogram.record(
+                (now - scheduled_notif.payload.created_at).total_seconds(),
+                {"type": scheduled_notif.type},
+            )
 
 
-def _fail_scheduled_notification(scheduled_notif: ScheduledNotification):
+def _defer_scheduled_notifications(
+    retry_at_by_sub: dict[int, datetime], claimed_ids: list[int]
+) -> None:
+    """
+    Postpone the scheduled notifications of subscriptions with an open circuit.
+
+    Both the claimed scheduled notifications and the ones that are waiting are
+    deferred. Scheduled notifications that are in progress in other tasks are left
+    alone.
+
+    A deferral counts as a (failed) attempt, so the scheduled notifications of a
+    subscription that keeps failing expire after ``notification_delivery_max_retries``
+    attempts, like they would without the circuit breaker.
+    """
     config = NotificationsConfig.get_solo()
 
+    for sub_id, retry_at in retry_at_by_sub.items():
+        deferred = ScheduledNotification.objects.filter(
+            Q(in_progress=False) | Q(id__in=claimed_ids),
+            sub_id=sub_id,
+            execute_after__lt=retry_at,
+        )
+
+        expired = list(
+            deferred.filter(
+                task_attempt__gte=config.notification_delivery_max_retries
+            ).only("id", "type", "attempt", "sub_id", "notificatie_id", "cloudevent_id")
+        )
+        if expired:
+            logger.debug(
+                "deferred_notifications_max_retries",
+                subscription_pk=sub_id,
+                expired=len(expired),
+            )
+            for scheduled_notif in expired:
+                delivery_expired_counter.add(1, {"type": scheduled_notif.type})
+            # claimed until they are deleted with their responses (see
+            # `nrc.api.responses`)
+            ScheduledNotification.objects.filter(
+                id__in=[scheduled_notif.id for scheduled_notif in expired]
+            ).update(in_progress=True, execute_after=timezone.now())
+            # the deliveries are logged as failed, also if no request was ever sent
+            _record_deliveries(
+                [
+                    Delivery(
+                        scheduled_notif=scheduled_notif,
+                        exception=str(
+                            _("Not sent: the circuit of the subscription is open")
+                        ),
+                    )
+                    for scheduled_notif in expired
+                ]
+            )
+            response_buffer.finish(*[scheduled_notif.id for scheduled_notif in expired])
+
+        deferred.update(
+            in_progress=False,
+            execute_after=retry_at,
+            task_attempt=F("task_attempt") + 1,
+        )
+
+
+def _schedule_retry(
+    scheduled_notif: ScheduledNotification, config: NotificationsConfig
+) -> None:
     scheduled_notif.execute_after += timedelta(
         seconds=get_exponential_backoff_interval(
             factor=config.notification_delivery_retry_backoff,
@@ -295,18 +583,251 @@ def _fail_scheduled_notification(scheduled_notif: ScheduledNotification):
         )
     )
     scheduled_notif.task_attempt += 1
+    scheduled_notif.in_progress = False
+
+
+def _fail_scheduled_notification(scheduled_notif: ScheduledNotification):
+    config = NotificationsConfig.get_solo()
+
+    _schedule_retry(scheduled_notif, config)
     if scheduled_notif.task_attempt > config.notification_delivery_max_retries:
         logger.debug(
             "execute_notifications_max_retries", scheduled_notif=scheduled_notif
         )
-        scheduled_notif.delete()
+        delivery_expired_counter.add(1, {"type": scheduled_notif.type})
+        response_buffer.finish(scheduled_notif.id)
     else:
-        scheduled_notif.in_progress = False
+        delivery_retries_counter.add(1, {"type": scheduled_notif.type})
         scheduled_notif.save(
             update_fields=["execute_after", "in_progress", "task_attempt"]
         )
 
 
+def _fail_scheduled_notifications(scheduled_notifs: list[ScheduledNotification]):
+    """
+    Bulk variant of `_fail_scheduled_notification`.
+    """
+    config = NotificationsConfig.get_solo()
+
+    expired_ids, retries = [], []
+    for scheduled_notif in scheduled_notifs:
+        _schedule_retry(scheduled_notif, config)
+        if scheduled_notif.task_attempt > config.notification_delivery_max_retries:
+            logger.debug(
+                "execute_notifications_max_retries", scheduled_notif=scheduled_notif
+            )
+            delivery_expired_counter.add(1, {"type": scheduled_notif.type})
+            expired_ids.append(scheduled_notif.id)
+        else:
+            delivery_retries_counter.add(1, {"type": scheduled_notif.type})
+            retries.append(scheduled_notif)
+
+    response_buffer.finish(*expired_ids)
+    ScheduledNotification.objects.bulk_update(
+        retries, fields=["execute_after", "in_progress", "task_attempt"]
+    )
+
+
+def _record_deliveries(deliveries: list[Delivery]) -> None:
+    responses = []
+    for delivery in deliveries:
+        scheduled_notif = delivery.scheduled_notif
+        response_kwargs = {
+            "abonnement_id": scheduled_notif.sub_id,
+            "attempt": scheduled_notif.attempt,
+            "exception": delivery.exception,
+            "response_status": delivery.response_status,
+        }
+        # Only log if a top-level object is provided
+        if scheduled_notif.cloudevent_id:
+            responses.append(
+                CloudEventResponse(
+                    cloudevent_id=scheduled_notif.cloudevent_id, **response_kwargs
+                )
+            )
+        elif scheduled_notif.notificatie_id:
+            responses.append(
+                NotificatieResponse(
+                    notificatie_id=scheduled_notif.notificatie_id, **response_kwargs
+                )
+            )
+
+    response_buffer.add(*responses)
+
+
+@app.task
+def send_to_subs(scheduled_notif_ids: list[int]) -> None:
+    """
+    Sends a batch of scheduled notifications concurrently (see `nrc.api.bulk_delivery`).
+
+    The results are recorded in bulk: the successfully delivered scheduled
+    notifications are deleted and the others are rescheduled like in `send_to_sub`.
+    """
+    scheduled_notifs = list(
+        ScheduledNotification.objects.filter(id__in=scheduled_notif_ids).select_related(
+            "payload", "sub__client_certificate", "sub__server_certificate"
+        )
+    )
+    if len(scheduled_notifs) < len(scheduled_notif_ids):
+        logger.error("scheduled_notification_does_not_exist")
+
+    retry_at_by_sub = {
+        sub_id: retry_at
+        for sub_id in {scheduled_notif.sub_id for scheduled_notif in scheduled_notifs}
+        if (retry_at := CircuitBreaker(sub_id).retry_at())
+    }
+    if retry_at_by_sub:
+        _defer_scheduled_notifications(retry_at_by_sub, scheduled_notif_ids)
+        scheduled_notifs = [
+            scheduled_notif
+            for scheduled_notif in scheduled_notifs
+            if scheduled_notif.sub_id not in retry_at_by_sub
+        ]
+
+    _record_delivery_delay(scheduled_notifs)
+    deliveries = deliver(scheduled_notifs)
+
+    # a subscription that responded to any of its deliveries is available, the
+    # result is recorded once per subscription
+    sub_ids = {delivery.scheduled_notif.sub_id for delivery in deliveries}
+    available_sub_ids = {
+        delivery.scheduled_notif.sub_id
+        for delivery in deliveries
+        if delivery.succeeded or is_available(delivery.response_status)
+    }
+    for sub_id in sub_ids:
+        if sub_id in available_sub_ids:
+            CircuitBreaker(sub_id).record_success()
+        else:
+            CircuitBreaker(sub_id).record_failure()
+
+    _record_deliveries(deliveries)
+    response_buffer.finish(
+        *[delivery.scheduled_notif.id for delivery in deliveries if delivery.succeeded]
+    )
+    _fail_scheduled_notifications(
+        [delivery.scheduled_notif for delivery in deliveries if not delivery.succeeded]
+    )
+
+
+@app.task
+def send_batch_to_sub(scheduled_notif_ids: list[int]) -> None:
+    """
+    Sends scheduled cloudevents to a subscription that receives batches, in a single
+    request.
+
+    The scheduled notifications are rescheduled (or deleted) together, like in
+    `send_to_sub`.
+    """
+    scheduled_notifs = list(
+        ScheduledNotification.objects.filter(id__in=scheduled_notif_ids)
+        .select_related("payload", "sub")
+        .order_by("id")
+    )
+    if len(scheduled_notifs) < len(scheduled_notif_ids):
+        logger.error("scheduled_notification_does_not_exist")
+    if not scheduled_notifs:
+        return None
+
+    sub = scheduled_notifs[0].sub
+
+    circuit_breaker = CircuitBreaker(sub.id)
+    if retry_at := circuit_breaker.retry_at():
+        logger.info("scheduled_notification_deferred", retry_at=retry_at)
+        _defer_scheduled_notifications({sub.id: retry_at}, scheduled_notif_ids)
+        return None
+
+    _record_delivery_delay(scheduled_notifs)
+    try:
+        deliver_cloudevent_batch(sub, scheduled_notifs)
+    except Exception as e:
+        _record_delivery_result(circuit_breaker, e)
+        _fail_scheduled_notifications(scheduled_notifs)
+    else:
+        _record_delivery_result(circuit_breaker, None)
+        response_buffer.finish(*scheduled_notif_ids)
+
+
+def receive_messages(type: NotificationTypes, messages: list[dict]) -> None:
+    """
+    Store published (and validated) messages, to be routed by a Celery task.
+    """
+    ReceivedMessage.objects.bulk_create(
+        ReceivedMessage(type=type, data=data) for data in messages
+    )
+    transaction.on_commit(route_received_messages.delay)
+
+
+def _route_received_message(message: ReceivedMessage) -> None:
+    serializer_class = (
+        CloudEventSerializer
+        if message.type == NotificationTypes.cloudevent
+        else MessageSerializer
+    )
+    serializer = serializer_class(data=message.data)
+    if not serializer.is_valid():
+        # e.g. the kanaal was removed after the message was received
+        logger.error(
+            "received_message_invalid",
+            received_message_pk=message.pk,
+            errors=serializer.errors,
+        )
+        return
+
+    try:
+        with transaction.atomic():
+            # creates the scheduled notifications for the subscriptions
+            serializer.save()
+    except ValidationError as e:
+        # the message can only be validated against the subscriptions while it is
+        # routed, e.g. a notification without a source for a subscription that
+        # receives cloudevents. It is dropped, retrying it would fail again.
+        logger.error(
+            "received_message_invalid",
+            received_message_pk=message.pk,
+            errors=e.detail,
+        )
+
+
+@app.task
+def route_received_messages() -> None:
+    """
+    Routes the messages that were received in the async publish mode to the
+    subscriptions, in order.
+
+    The received messages are claimed with ``SKIP LOCKED``, so multiple tasks can
+    route messages in parallel. Invalid messages are logged and dropped, messages that
+    could not be routed because of an unexpected error are kept and retried by the next
+    task.
+    """
+    failed_ids = []
+    while True:
+        with transaction.atomic():
+            messages = list(
+                ReceivedMessage.objects.select_for_update(skip_locked=True)
+                .exclude(id__in=failed_ids)
+                .order_by("id")[: settings.NOTIFICATION_ROUTING_BATCH_SIZE]
+            )
+            if not messages:
+                return None
+
+            routed_ids = []
+            for message in messages:
+                try:
+                    with transaction.atomic():
+                        _route_received_message(message)
+                except Exception:
+                    logger.exception(
+                        "received_message_routing_failed",
+                        received_message_pk=message.pk,
+                    )
+                    failed_ids.append(message.pk)
+                else:
+                    routed_ids.append(message.pk)
+
+            ReceivedMessage.objects.filter(id__in=routed_ids).delete()
+
+
 def _get_task_kwargs(scheduled_notif: ScheduledNotification) -> dict:
     """
     attempt is set once at creation (in serializer), task_attempt will increase when request has failed.
@@ -315,102 +836,186 @@ def _get_task_kwargs(scheduled_notif: ScheduledNotification) -> dict:
         "task_attempt": scheduled_notif.task_attempt,
         "attempt": scheduled_notif.attempt,
     }
-    if scheduled_notif.cloudevent:
+    if scheduled_notif.cloudevent_id:
         task_kwargs.update(
             {
-                "cloudevent_id": scheduled_notif.cloudevent.id,
+                "cloudevent_id": scheduled_notif.cloudevent_id,
             }
         )
-    if scheduled_notif.notificatie:
+    if scheduled_notif.notificatie_id:
         task_kwargs.update(
             {
-                "notificatie_id": scheduled_notif.notificatie.id,
+                "notificatie_id": scheduled_notif.notificatie_id,
             }
         )
 
     return task_kwargs
 
 
-@app.task
-def execute_notifications() -> None:
-    """
-    Starts a task for each queried schedulednotification based on NOTIFICATION_LIMIT and how many are still in progress.
+def _claim_scheduled_notifications(
+    limit: int, now: datetime, cutoff: datetime
+) -> list[ScheduledNotification]:
     """
-    # celery beat will create multiple execute_notifications if the queue is full (even with expire).
-    lock_key = "execute_notifications_lock"
-    acquired = cache.add(lock_key, "1", timeout=settings.NOTIFICATION_SEC_INTERVAL - 1)
-    if not acquired:
-        logger.debug("execute_notifications_blocked")
-        return
+    Atomically mark the scheduled notifications that should be started as in progress.
 
-    config = NotificationsConfig.get_solo()
+    Fetches two types of scheduled notifications:
+    1. Notifications that are not currently in progress and should be executed
+    2. Notifications that are currently in progress but have been for a long time (10 * NOTIFICATION_REQUESTS_TIMEOUT) so task probably failed.
 
-    cutoff = timezone.now() - timedelta(
-        seconds=settings.NOTIFICATION_REQUESTS_TIMEOUT * 10
-    )
+    Rows that are being claimed by a concurrent ``execute_notifications`` are skipped
+    (``FOR UPDATE SKIP LOCKED``), so multiple instances can run in parallel without
+    starting the same scheduled notification twice.
+    """
+    if limit <= 0:
+        return []
 
-    waiting_count = ScheduledNotification.objects.filter(
-        in_progress=False,
-        execute_after__lte=timezone.now(),
-    ).count()
-
-    stuck_count = ScheduledNotification.objects.filter(
-        in_progress=True, execute_after__lte=cutoff
-    ).count()
-
-    in_progress_count = ScheduledNotification.objects.filter(
-        in_progress=True, execute_after__gt=cutoff
-    ).count()
-
-    limit = max(0, int(settings.NOTIFICATION_LIMIT - in_progress_count))
-
-    # Fetches two types of scheduled notifications:
-    # 1. Notifications that are not currently in progress and should be executed
-    # 2. Notifications that are currently in progress but have been for a long time (10 * NOTIFICATION_REQUESTS_TIMEOUT) so task probably failed.
-    scheduled_notifications = (
-        ScheduledNotification.objects.filter(
-            Q(
-                in_progress=False,
-                execute_after__lte=timezone.now(),
+    table = ScheduledNotification._meta.db_table
+    # Both types are selected separately, so the (partial) indexes can be used to
+    # only read the first `limit` rows of each in order instead of the whole table.
+    # execute_after is updated so that if the scheduled notification failed, the timeout gets added to the time it was actually executed and not when the scheduled notification was created.
+    # It is also necessary for scheduled notifications that were stuck (type 2) so that they will not get started again on the next run.
+    return list(
+        ScheduledNotification.objects.raw(
+            f"""
+            WITH pending AS (
+                SELECT id, execute_after, attempt FROM {table}
+                WHERE NOT in_progress AND execute_after <= %(now)s
+                ORDER BY execute_after, attempt
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            ), stuck AS (
+                SELECT id, execute_after, attempt FROM {table}
+                WHERE in_progress AND execute_after <= %(cutoff)s
+                ORDER BY execute_after, attempt
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            ), claimable AS (
+                SELECT id FROM (
+                    SELECT * FROM pending UNION ALL SELECT * FROM stuck
+                ) AS candidates
+                ORDER BY execute_after, attempt
+                LIMIT %(limit)s
             )
-            | Q(in_progress=True, execute_after__lte=cutoff)
+            UPDATE {table} AS scheduled
+            SET in_progress = true, execute_after = %(now)s
+            FROM claimable
+            WHERE scheduled.id = claimable.id
+            RETURNING scheduled.*
+            """,
+            {"now": now, "cutoff": cutoff, "limit": limit},
         )
-        .order_by("execute_after", "attempt")[:limit]
-        .all()
     )
 
-    notification_ids = list(scheduled_notifications.values_list("id", flat=True))
 
-    # execute_after is updated so that if the scheduled notification failed, the timeout gets added to the time it was actually executed and not when the scheduled notification was created.
-    # It is also necessary for scheduled notifications that were stuck (type 2) so that they will not get started again on the next run.
-    ScheduledNotification.objects.filter(
-        id__in=notification_ids,
-    ).update(in_progress=True, execute_after=timezone.now())
+def get_scheduled_notification_counts(now: datetime, cutoff: datetime) -> dict:
+    """
+    Count the waiting, stuck and in progress scheduled notifications.
+
+    Every count only reads one of the partial indexes of `ScheduledNotification`.
+    """
+    return {
+        "waiting": ScheduledNotification.objects.filter(
+            in_progress=False, execute_after__lte=now
+        ).count(),
+        **ScheduledNotification.objects.filter(in_progress=True).aggregate(
+            stuck=Count("id", filter=Q(execute_after__lte=cutoff)),
+            in_progress=Count("id", filter=Q(execute_after__gt=cutoff)),
+        ),
+    }
+
+
+def _get_batch_sizes(sub_ids: set[int]) -> dict[int, int]:
+    """
+    Return the batch sizes of the subscriptions that receive batches.
+    """
+    if not sub_ids:
+        return {}
+
+    return dict(
+        Abonnement.objects.filter(
+            id__in=sub_ids, send_cloudevents=True, batch_size__gt=1
+        ).values_list("id", "batch_size")
+    )
+
+
+@app.task
+def execute_notifications() -> None:
+    """
+    Starts a task for each claimed schedulednotification based on NOTIFICATION_LIMIT and how many are still in progress.
+    """
+    config = NotificationsConfig.get_solo()
+
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.NOTIFICATION_REQUESTS_TIMEOUT * 10)
+
+    counts = get_scheduled_notification_counts(now, cutoff)
+
+    limit = max(0, int(settings.NOTIFICATION_LIMIT - counts["in_progress"]))
+
+    start = time.monotonic()
+    claimed = _claim_scheduled_notifications(limit, now, cutoff)
+    scheduler_claim_duration_histogram.record(time.monotonic() - start)
+    scheduler_claimed_histogram.record(len(claimed))
+
+    # the scheduled notifications for subscriptions with an open circuit are
+    # deferred without starting a task
+    open_circuits = get_open_circuits(
+        {scheduled_notif.sub_id for scheduled_notif in claimed}
+    )
+    _defer_scheduled_notifications(
+        open_circuits, [scheduled_notif.id for scheduled_notif in claimed]
+    )
+
+    batch_sizes = _get_batch_sizes(
+        {scheduled_notif.sub_id for scheduled_notif in claimed} - open_circuits.keys()
+    )
 
     tasks = list()
-    for scheduled_notif in ScheduledNotification.objects.filter(
-        id__in=notification_ids
-    ).iterator():
-        if scheduled_notif.task_attempt > config.notification_delivery_max_retries:
+    bulk_ids = list()
+    batch_ids = defaultdict(list)
+    expired_ids = list()
+    for scheduled_notif in claimed:
+        if scheduled_notif.sub_id in open_circuits:
+            continue
+        elif scheduled_notif.task_attempt > config.notification_delivery_max_retries:
             logger.debug(
                 "execute_notifications_max_retries", scheduled_notif=scheduled_notif
             )
-            scheduled_notif.delete()
-            continue
+            delivery_expired_counter.add(1, {"type": scheduled_notif.type})
+            expired_ids.append(scheduled_notif.id)
+        elif scheduled_notif.sub_id in batch_sizes:
+            batch_ids[scheduled_notif.sub_id].append(scheduled_notif.id)
+        elif settings.NOTIFICATION_DELIVERY_MODE == "bulk":
+            bulk_ids.append(scheduled_notif.id)
         else:
             tasks.append(
                 send_to_sub.s(scheduled_notif.id, _get_task_kwargs(scheduled_notif))
             )
 
+    if expired_ids:
+        ScheduledNotification.objects.filter(id__in=expired_ids).delete()
+
+    started = len(tasks) + len(bulk_ids) + sum(map(len, batch_ids.values()))
+    # in bulk mode a task is started per batch instead of per scheduled notification
+    tasks += [
+        send_to_subs.s(list(batch))
+        for batch in batched(bulk_ids, settings.NOTIFICATION_BULK_BATCH_SIZE)
+    ]
+    # subscriptions that receive batches get a request per batch
+    tasks += [
+        send_batch_to_sub.s(list(batch))
+        for sub_id, ids in batch_ids.items()
+        for batch in batched(ids, batch_sizes[sub_id])
+    ]
+
     if tasks:
         group(tasks)()
 
     logger.info(
         "executed_notifications",
-        waiting=waiting_count,
-        stuck=stuck_count,
-        in_progress=in_progress_count,
-        started=len(tasks),
+        waiting=counts["waiting"],
+        stuck=counts["stuck"],
+        in_progress=counts["in_progress"],
+        started=started,
+        deferred_subscriptions=len(open_circuits),
     )
-
-    cache.delete(lock_key)
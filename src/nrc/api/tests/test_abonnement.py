@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import override_settings
 
 import requests_mock
@@ -14,6 +16,8 @@ from nrc.datamodel.models import (
 )
 from nrc.datamodel.tests.factories import AbonnementFactory, KanaalFactory
 
+from ..pagination import OptionalPageNumberPagination
+
 
 @override_settings(LINK_FETCHER="vng_api_common.mocks.link_fetcher_200")
 class AbonnementenTests(JWTAuthMixin, APITestCase):
@@ -427,3 +431,26 @@ class AbonnementenTests(JWTAuthMixin, APITestCase):
         response = self.client.post(abonnement_create_url, data)
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+    def test_abonnementen_list_paginated(self):
+        AbonnementFactory.create_batch(3)
+        url = get_operation_url("abonnement_list")
+
+        with self.subTest("all results without page"):
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()), 3)
+
+        with (
+            self.subTest("page of results"),
+            patch.object(OptionalPageNumberPagination, "page_size", 2),
+        ):
+            response = self.client.get(url, {"page": 2})
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            self.assertEqual(data["count"], 3)
+            self.assertIsNone(data["next"])
+            self.assertIsNotNone(data["previous"])
+            self.assertEqual(len(data["results"]), 1)
@@ -0,0 +1,167 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.test import override_settings
+
+from djangorestframework_camel_case.util import underscoreize
+from rest_framework import status
+from rest_framework.reverse import reverse_lazy
+from rest_framework.test import APITestCase
+from vng_api_common.conf.api import BASE_REST_FRAMEWORK
+from vng_api_common.tests import JWTAuthMixin
+
+from nrc.api.tasks import route_received_messages
+from nrc.datamodel.models import (
+    CloudEvent,
+    Notificatie,
+    NotificationTypes,
+    ReceivedMessage,
+    ScheduledNotification,
+)
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    CloudEventFilterGroupFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+)
+from nrc.utils.tests.structlog import capture_logs
+
+MSG = {
+    "kanaal": "zaken",
+    "source": "zaken.maykin.nl",
+    "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+    "resource": "status",
+    "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+    "actie": "create",
+    "aanmaakdatum": "2025-01-01T12:00:00Z",
+    "kenmerken": {"bron": "082096752011"},
+}
+
+
+@override_settings(
+    LINK_FETCHER="vng_api_common.mocks.link_fetcher_200",
+    LOG_NOTIFICATIONS_IN_DB=True,
+    NOTIFICATION_PUBLISH_MODE="async",
+)
+class AsyncPublishTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+    notificatie_url = reverse_lazy(
+        "notificaties-list",
+        kwargs={"version": BASE_REST_FRAMEWORK["DEFAULT_VERSION"]},
+    )
+    cloudevent_url = reverse_lazy(
+        "cloudevent-list",
+        kwargs={"version": BASE_REST_FRAMEWORK["DEFAULT_VERSION"]},
+    )
+
+    def setUp(self):
+        super().setUp()
+
+        self.kanaal = KanaalFactory.create(naam="zaken", filters=["bron"])
+        self.abon = AbonnementFactory.create()
+        FilterGroupFactory.create(kanaal=self.kanaal, abonnement=self.abon)
+
+    def test_notificatie_is_routed_by_task(self):
+        with (
+            patch("nrc.api.tasks.route_received_messages.delay") as mock_delay,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            response = self.client.post(self.notificatie_url, MSG)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        mock_delay.assert_called_once()
+        self.assertEqual(ReceivedMessage.objects.get().type, "notification")
+        self.assertFalse(Notificatie.objects.exists())
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+        route_received_messages.run()
+
+        self.assertFalse(ReceivedMessage.objects.exists())
+        notificatie = Notificatie.objects.get()
+        self.assertEqual(notificatie.forwarded_msg["resourceUrl"], MSG["resourceUrl"])
+        scheduled_notif = ScheduledNotification.objects.get()
+        self.assertEqual(scheduled_notif.sub, self.abon)
+        self.assertEqual(scheduled_notif.notificatie, notificatie)
+
+    def test_invalid_notificatie_is_not_accepted(self):
+        response = self.client.post(self.notificatie_url, {**MSG, "kanaal": "other"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ReceivedMessage.objects.exists())
+
+    def test_cloudevent_is_routed_by_task(self):
+        abon = AbonnementFactory.create(send_cloudevents=True)
+        CloudEventFilterGroupFactory.create(
+            type_substring="nl.overheid.zaken", abonnement=abon
+        )
+        event_id = str(uuid4())
+
+        with patch("nrc.api.tasks.route_received_messages.delay"):
+            response = self.client.post(
+                self.cloudevent_url,
+                {
+                    "specversion": "1.0",
+                    "type": "nl.overheid.zaken.zaak.created",
+                    "source": "oz",
+                    "id": event_id,
+                    "datacontenttype": "application/json",
+                    "data": {},
+                },
+                headers={"content-type": "application/cloudevents+json"},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.json()["id"], event_id)
+        self.assertFalse(CloudEvent.objects.exists())
+
+        route_received_messages.run()
+
+        self.assertFalse(ReceivedMessage.objects.exists())
+        cloudevent = CloudEvent.objects.get()
+        self.assertEqual(cloudevent.id, event_id)
+        self.assertEqual(ScheduledNotification.objects.get().sub, abon)
+
+    def test_messages_that_became_invalid_are_dropped(self):
+        ReceivedMessage.objects.create(
+            type=NotificationTypes.notification,
+            data=underscoreize({**MSG, "kanaal": "other"}),
+        )
+
+        with capture_logs() as cap_logs:
+            route_received_messages.run()
+
+        self.assertFalse(ReceivedMessage.objects.exists())
+        self.assertTrue(
+            any(log["event"] == "received_message_invalid" for log in cap_logs)
+        )
+
+    def test_messages_are_kept_on_unexpected_errors(self):
+        message = ReceivedMessage.objects.create(
+            type=NotificationTypes.notification, data=underscoreize(MSG)
+        )
+
+        with patch(
+            "nrc.api.serializers.MessageSerializer.create", side_effect=Exception
+        ):
+            route_received_messages.run()
+
+        self.assertEqual(ReceivedMessage.objects.get(), message)
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+    def test_messages_that_fail_validation_while_routing_are_dropped(self):
+        abon = AbonnementFactory.create(send_cloudevents=True)
+        FilterGroupFactory.create(kanaal=self.kanaal, abonnement=abon)
+        msg = {key: value for key, value in MSG.items() if key != "source"}
+        ReceivedMessage.objects.create(
+            type=NotificationTypes.notification, data=underscoreize(msg)
+        )
+
+        with capture_logs() as cap_logs:
+            route_received_messages.run()
+
+        self.assertFalse(ReceivedMessage.objects.exists())
+        self.assertFalse(Notificatie.objects.exists())
+        self.assertFalse(ScheduledNotification.objects.exists())
+        self.assertTrue(
+            any(log["event"] == "received_message_invalid" for log in cap_logs)
+        )
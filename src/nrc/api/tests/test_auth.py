@@ -2,6 +2,12 @@
 Guarantee that the proper authorization machinery is in place.
 """
 
+from unittest.mock import MagicMock, call, patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 import requests_mock
 from freezegun import freeze_time
 from rest_framework import status
@@ -10,6 +16,7 @@ from vng_api_common.tests import AuthCheckMixin, JWTAuthMixin, reverse
 
 from nrc.datamodel.tests.factories import AbonnementFactory, KanaalFactory
 
+from ..metrics import auth_cache_hits_counter, auth_cache_misses_counter
 from ..scopes import SCOPE_NOTIFICATIES_CONSUMEREN, SCOPE_NOTIFICATIES_PUBLICEREN
 
 
@@ -325,3 +332,75 @@ class JWTIatTests(JWTAuthMixin, APITestCase):
 
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(API_AUTH_CACHE_TIMEOUT=300)
+class AuthCacheTests(JWTAuthMixin, APITestCase):
+    scopes = [SCOPE_NOTIFICATIES_CONSUMEREN]
+
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        self.url = reverse("kanaal-list")
+
+    def _get_auth_queries(self) -> list[str]:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            query["sql"]
+            for query in context.captured_queries
+            if any(
+                table in query["sql"]
+                for table in ("jwtsecret", "applicatie", "autorisatie")
+            )
+        ]
+
+    def test_authorization_is_cached(self):
+        self.assertNotEqual(self._get_auth_queries(), [])
+
+        self.assertEqual(self._get_auth_queries(), [])
+
+    @patch.object(auth_cache_misses_counter, "add")
+    @patch.object(auth_cache_hits_counter, "add")
+    def test_cache_metrics(self, mock_hits_add: MagicMock, mock_misses_add: MagicMock):
+        self.client.get(self.url)
+
+        mock_hits_add.assert_not_called()
+        mock_misses_add.assert_has_calls(
+            [call(1, {"type": "payload"}), call(1, {"type": "scopes"})]
+        )
+        mock_misses_add.reset_mock()
+
+        self.client.get(self.url)
+
+        mock_misses_add.assert_not_called()
+        mock_hits_add.assert_has_calls(
+            [call(1, {"type": "payload"}), call(1, {"type": "scopes"})]
+        )
+
+    def test_changed_autorisaties_are_applied(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.autorisatie.scopes = []
+        self.autorisatie.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.applicatie.heeft_alle_autorisaties = True
+        self.applicatie.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_other_token_is_verified(self):
+        self.client.get(self.url)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
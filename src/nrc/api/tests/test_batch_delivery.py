@@ -0,0 +1,131 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+import requests_mock
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.reverse import reverse_lazy
+from rest_framework.test import APITestCase
+from vng_api_common.conf.api import BASE_REST_FRAMEWORK
+from vng_api_common.tests import JWTAuthMixin
+
+from nrc.api.clients import client_cache
+from nrc.api.tasks import execute_notifications
+from nrc.datamodel.models import CloudEventResponse, ScheduledNotification
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    CloudEventFilterGroupFactory,
+)
+
+
+@override_settings(
+    LINK_FETCHER="vng_api_common.mocks.link_fetcher_200",
+    LOG_NOTIFICATIONS_IN_DB=True,
+    CELERY_TASK_ALWAYS_EAGER=True,
+)
+@freeze_time("2025-01-01T12:00:00")
+class BatchDeliveryTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+    cloudevent_url = reverse_lazy(
+        "cloudevent-list",
+        kwargs={"version": BASE_REST_FRAMEWORK["DEFAULT_VERSION"]},
+    )
+
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        self.addCleanup(client_cache.clear)
+
+        self.abon = AbonnementFactory.create(
+            callback_url="https://example.local/callback",
+            send_cloudevents=True,
+            batch_size=2,
+            batch_linger=5,
+        )
+        CloudEventFilterGroupFactory.create(
+            type_substring="nl.overheid.zaken", abonnement=self.abon
+        )
+
+    def _post_cloudevents(self, count: int) -> list[str]:
+        event_ids = []
+        for _ in range(count):
+            event_ids.append(str(uuid4()))
+            response = self.client.post(
+                self.cloudevent_url,
+                {
+                    "specversion": "1.0",
+                    "type": "nl.overheid.zaken.zaak.created",
+                    "source": "oz",
+                    "id": event_ids[-1],
+                    "time": timezone.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "datacontenttype": "application/json",
+                    "data": {},
+                },
+                headers={"content-type": "application/cloudevents+json"},
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return event_ids
+
+    def test_cloudevents_are_held_back(self):
+        self._post_cloudevents(1)
+
+        scheduled_notif = ScheduledNotification.objects.get()
+        self.assertEqual(
+            scheduled_notif.execute_after, timezone.now() + timedelta(seconds=5)
+        )
+
+    def test_cloudevents_are_sent_in_batches(self):
+        event_ids = self._post_cloudevents(3)
+
+        with requests_mock.Mocker() as m:
+            m.post(self.abon.callback_url, status_code=204)
+
+            execute_notifications.run()
+            self.assertEqual(m.call_count, 0)
+
+            with freeze_time("2025-01-01T12:00:05"):
+                execute_notifications.run()
+
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(
+            m.request_history[0].headers["Content-Type"],
+            "application/cloudevents-batch+json",
+        )
+        sent_ids = [
+            [event["id"] for event in request.json()] for request in m.request_history
+        ]
+        self.assertCountEqual(
+            [id for batch in sent_ids for id in batch],
+            event_ids,
+        )
+        self.assertCountEqual([len(batch) for batch in sent_ids], [2, 1])
+
+        self.assertFalse(ScheduledNotification.objects.exists())
+        self.assertEqual(CloudEventResponse.objects.count(), 3)
+
+    def test_failed_batch_is_rescheduled(self):
+        self._post_cloudevents(2)
+
+        with (
+            freeze_time("2025-01-01T12:00:05"),
+            requests_mock.Mocker() as m,
+        ):
+            m.post(self.abon.callback_url, status_code=500)
+            execute_notifications.run()
+
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(
+            list(
+                ScheduledNotification.objects.values_list("task_attempt", "in_progress")
+            ),
+            [(1, False), (1, False)],
+        )
+        self.assertEqual(
+            list(CloudEventResponse.objects.values_list("response_status", flat=True)),
+            [500, 500],
+        )
@@ -0,0 +1,217 @@
+from collections import deque
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+import httpx
+from privates.test import temp_private_root
+from structlog.testing import capture_logs
+
+from nrc.datamodel.models import (
+    NotificatieResponse,
+    NotificationTypes,
+    ScheduledNotification,
+)
+from nrc.datamodel.tests.factories import AbonnementFactory, NotificatieFactory
+
+from ..clients import client_cache, get_client
+from ..tasks import execute_notifications, send_to_subs
+
+MSG = {
+    "kanaal": "zaken",
+    "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+    "resource": "status",
+    "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+    "actie": "create",
+    "aanmaakdatum": "2018-01-01T17:00:00Z",
+    "kenmerken": {},
+}
+
+
+def mock_async_client(handler):
+    async_client = httpx.AsyncClient
+
+    def build_client(**kwargs):
+        return async_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    return patch("nrc.api.bulk_delivery.httpx.AsyncClient", side_effect=build_client)
+
+
+@temp_private_root()
+@override_settings(NOTIFICATION_DELIVERY_MODE="bulk", NOTIFICATION_BULK_BATCH_SIZE=2)
+class BulkDeliveryTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        self.addCleanup(client_cache.clear)
+
+    def _schedule(self, sub, **kwargs) -> ScheduledNotification:
+        return ScheduledNotification.objects.create(
+            type=NotificationTypes.notification,
+            task_args=MSG,
+            execute_after=timezone.now() - timedelta(seconds=5),
+            attempt=1,
+            sub=sub,
+            **kwargs,
+        )
+
+    def test_execute_notifications_starts_task_per_batch(self):
+        sub = AbonnementFactory.create()
+        scheduled_notifs = [self._schedule(sub) for _ in range(5)]
+
+        def capture_group(generator):
+            deque(generator, 0)
+            return MagicMock()
+
+        with (
+            patch("nrc.api.tasks.group", side_effect=capture_group),
+            patch("nrc.api.tasks.send_to_sub") as mock_send_to_sub,
+            patch("nrc.api.tasks.send_to_subs") as mock_send_to_subs,
+        ):
+            execute_notifications.run()
+
+        mock_send_to_sub.s.assert_not_called()
+        batches = [call.args[0] for call in mock_send_to_subs.s.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertCountEqual(
+            [id for batch in batches for id in batch],
+            [scheduled_notif.id for scheduled_notif in scheduled_notifs],
+        )
+
+    def test_send_to_subs(self):
+        sub_ok = AbonnementFactory.create(
+            callback_url="https://ok.example.com/callback", auth="Token foo"
+        )
+        sub_error = AbonnementFactory.create(
+            callback_url="https://error.example.com/callback"
+        )
+        notificatie = NotificatieFactory.create()
+        delivered = self._schedule(sub_ok, notificatie=notificatie)
+        failed = self._schedule(sub_error, notificatie=notificatie)
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            if request.url.host == "ok.example.com":
+                return httpx.Response(204)
+            return httpx.Response(500, text="error")
+
+        with mock_async_client(handler):
+            send_to_subs.run([delivered.id, failed.id])
+
+        self.assertEqual(len(requests), 2)
+        request = next(r for r in requests if r.url.host == "ok.example.com")
+        self.assertEqual(request.headers["Authorization"], "Token foo")
+        self.assertEqual(request.headers["Content-Type"], "application/json")
+
+        self.assertFalse(ScheduledNotification.objects.filter(id=delivered.id).exists())
+        failed.refresh_from_db()
+        self.assertEqual(failed.task_attempt, 1)
+        self.assertFalse(failed.in_progress)
+
+        responses = NotificatieResponse.objects.order_by("response_status")
+        self.assertEqual(
+            [(r.abonnement, r.response_status) for r in responses],
+            [(sub_ok, 204), (sub_error, 500)],
+        )
+        self.assertEqual(responses[0].exception, "")
+        self.assertEqual(
+            responses[1].exception, "Could not send notification: status 500 - error"
+        )
+
+    def test_send_to_subs_connection_error(self):
+        sub = AbonnementFactory.create(callback_url="https://example.com/callback")
+        scheduled_notif = self._schedule(sub, notificatie=NotificatieFactory.create())
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("connection refused")
+
+        with mock_async_client(handler):
+            send_to_subs.run([scheduled_notif.id])
+
+        scheduled_notif.refresh_from_db()
+        self.assertEqual(scheduled_notif.task_attempt, 1)
+        response = NotificatieResponse.objects.get()
+        self.assertIsNone(response.response_status)
+        self.assertEqual(response.exception, "connection refused")
+
+    def test_send_to_subs_logs_requests(self):
+        sub = AbonnementFactory.create(callback_url="https://example.com/callback")
+        scheduled_notif = self._schedule(sub, notificatie=NotificatieFactory.create())
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(500, text="error")
+
+        with mock_async_client(handler), capture_logs() as cap_logs:
+            send_to_subs.run([scheduled_notif.id])
+
+        log = next(log for log in cap_logs if log["event"] == "bulk_delivery_failed")
+        self.assertEqual(log["http_method"], "POST")
+        self.assertEqual(log["http_url"], "https://example.com/callback")
+        self.assertEqual(log["http_status_code"], 500)
+        self.assertIsInstance(log["duration"], float)
+
+    def test_send_to_subs_unexpected_preparation_error(self):
+        sub_ok = AbonnementFactory.create(
+            callback_url="https://ok.example.com/callback"
+        )
+        sub_error = AbonnementFactory.create(
+            callback_url="https://error.example.com/callback"
+        )
+        notificatie = NotificatieFactory.create()
+        delivered = self._schedule(sub_ok, notificatie=notificatie)
+        failed = self._schedule(sub_error, notificatie=notificatie)
+
+        def get_client_or_fail(sub):
+            if sub == sub_error:
+                raise KeyError("auth")
+            return get_client(sub)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(204)
+
+        with (
+            mock_async_client(handler),
+            patch("nrc.api.bulk_delivery.get_client", side_effect=get_client_or_fail),
+        ):
+            send_to_subs.run([delivered.id, failed.id])
+
+        # only the delivery that could not be prepared failed
+        self.assertFalse(ScheduledNotification.objects.filter(id=delivered.id).exists())
+        failed.refresh_from_db()
+        self.assertEqual(failed.task_attempt, 1)
+        response = NotificatieResponse.objects.get(abonnement=sub_error)
+        self.assertIsNone(response.response_status)
+        self.assertEqual(response.exception, "'auth'")
+
+    def test_send_to_subs_records_circuit_failure_per_subscription(self):
+        sub = AbonnementFactory.create(callback_url="https://example.com/callback")
+        scheduled_notifs = [self._schedule(sub) for _ in range(2)]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(503)
+
+        with mock_async_client(handler):
+            send_to_subs.run(
+                [scheduled_notif.id for scheduled_notif in scheduled_notifs]
+            )
+
+        self.assertEqual(cache.get(f"circuit_breaker:{sub.id}:failures"), 1)
+
+    def test_send_to_subs_client_error_is_not_a_circuit_failure(self):
+        sub = AbonnementFactory.create(callback_url="https://example.com/callback")
+        scheduled_notif = self._schedule(sub)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(400)
+
+        with mock_async_client(handler):
+            send_to_subs.run([scheduled_notif.id])
+
+        self.assertIsNone(cache.get(f"circuit_breaker:{sub.id}:failures"))
+        scheduled_notif.refresh_from_db()
+        self.assertEqual(scheduled_notif.task_attempt, 1)
@@ -0,0 +1,232 @@
+from uuid import uuid4
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.reverse import reverse_lazy
+from rest_framework.test import APITestCase
+from vng_api_common.conf.api import BASE_REST_FRAMEWORK
+from vng_api_common.tests import JWTAuthMixin
+
+from nrc.datamodel.models import CloudEvent, Notificatie, ScheduledNotification
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    CloudEventFilterGroupFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+)
+
+
+def get_message(kanaal: str = "zaken", **kwargs) -> dict:
+    return {
+        "kanaal": kanaal,
+        "source": "zaken.maykin.nl",
+        "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+        "resource": "status",
+        "resourceUrl": f"https://example.com/zrc/api/v1/statussen/{uuid4()}",
+        "actie": "create",
+        "aanmaakdatum": "2025-01-01T12:00:00Z",
+        "kenmerken": {"bron": "082096752011"},
+        **kwargs,
+    }
+
+
+def get_cloudevent(**kwargs) -> dict:
+    return {
+        "specversion": "1.0",
+        "type": "nl.overheid.zaken.zaak.created",
+        "source": "oz",
+        "id": str(uuid4()),
+        "datacontenttype": "application/json",
+        "data": {},
+        **kwargs,
+    }
+
+
+@override_settings(
+    LINK_FETCHER="vng_api_common.mocks.link_fetcher_200",
+    LOG_NOTIFICATIONS_IN_DB=True,
+)
+class NotificatieBulkTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+    url = reverse_lazy(
+        "notificaties-bulk",
+        kwargs={"version": BASE_REST_FRAMEWORK["DEFAULT_VERSION"]},
+    )
+
+    def setUp(self):
+        super().setUp()
+
+        self.zaken = KanaalFactory.create(naam="zaken", filters=["bron"])
+        documenten = KanaalFactory.create(naam="documenten", filters=["bron"])
+        self.abon = AbonnementFactory.create()
+        FilterGroupFactory.create(kanaal=self.zaken, abonnement=self.abon)
+        FilterGroupFactory.create(kanaal=documenten, abonnement=self.abon)
+
+    def test_publish_notificaties(self):
+        messages = [
+            get_message(),
+            get_message(kanaal="documenten"),
+            get_message(),
+        ]
+
+        response = self.client.post(self.url, messages)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(
+            [msg["resourceUrl"] for msg in response.json()],
+            [msg["resourceUrl"] for msg in messages],
+        )
+        self.assertEqual(
+            list(
+                Notificatie.objects.order_by("pk").values_list(
+                    "kanaal__naam", flat=True
+                )
+            ),
+            ["zaken", "documenten", "zaken"],
+        )
+        self.assertEqual(ScheduledNotification.objects.filter(sub=self.abon).count(), 3)
+
+    def test_queries_do_not_depend_on_the_number_of_notificaties(self):
+        # warm up the routing index and the authentication
+        self.client.post(self.url, [get_message()])
+
+        query_counts = []
+        for count in (1, 10):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    self.url, [get_message() for _ in range(count)]
+                )
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(ScheduledNotification.objects.count(), 12)
+
+    def test_errors_are_reported_per_notificatie(self):
+        messages = [get_message(), get_message(kanaal="unknown"), get_message()]
+
+        response = self.client.post(self.url, messages)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(errors[0], {})
+        self.assertIn("kanaal", errors[1])
+        self.assertEqual(errors[2], {})
+        self.assertFalse(Notificatie.objects.exists())
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+    def test_missing_source_is_reported_per_notificatie(self):
+        cloudevent_sub = AbonnementFactory.create(send_cloudevents=True)
+        FilterGroupFactory.create(kanaal=self.zaken, abonnement=cloudevent_sub)
+        messages = [get_message(), get_message()]
+        del messages[1]["source"]
+
+        response = self.client.post(self.url, messages)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertNotEqual(errors[1], {})
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+    def test_empty_list_is_rejected(self):
+        response = self.client.post(self.url, [])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(NOTIFICATION_PUBLISH_MAX_BATCH_SIZE=2)
+    def test_max_batch_size(self):
+        response = self.client.post(self.url, [get_message() for _ in range(3)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Notificatie.objects.exists())
+
+
+@override_settings(
+    LINK_FETCHER="vng_api_common.mocks.link_fetcher_200",
+    LOG_NOTIFICATIONS_IN_DB=True,
+)
+class CloudEventBatchTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+    url = reverse_lazy(
+        "cloudevent-batch",
+        kwargs={"version": BASE_REST_FRAMEWORK["DEFAULT_VERSION"]},
+    )
+
+    def setUp(self):
+        super().setUp()
+
+        self.abon = AbonnementFactory.create(send_cloudevents=True)
+        CloudEventFilterGroupFactory.create(
+            type_substring="nl.overheid.zaken", abonnement=self.abon
+        )
+
+    def test_publish_cloudevents(self):
+        events = [
+            get_cloudevent(),
+            get_cloudevent(type="nl.overheid.documenten.document.created"),
+        ]
+
+        response = self.client.post(
+            self.url,
+            events,
+            headers={"content-type": "application/cloudevents-batch+json"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response["Content-Type"], "application/cloudevents-batch+json")
+        self.assertEqual(
+            [event["id"] for event in response.json()],
+            [event["id"] for event in events],
+        )
+        self.assertEqual(CloudEvent.objects.count(), 2)
+        scheduled_notif = ScheduledNotification.objects.get()
+        self.assertEqual(scheduled_notif.sub, self.abon)
+        self.assertEqual(scheduled_notif.cloudevent.id, events[0]["id"])
+
+    def test_errors_are_reported_per_cloudevent(self):
+        events = [get_cloudevent(), get_cloudevent(source="")]
+
+        response = self.client.post(
+            self.url,
+            events,
+            headers={"content-type": "application/cloudevents-batch+json"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn("source", errors[1])
+        self.assertFalse(CloudEvent.objects.exists())
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+    def test_duplicate_cloudevents_are_rejected(self):
+        event = get_cloudevent()
+        events = [event, get_cloudevent(), get_cloudevent(id=event["id"])]
+
+        response = self.client.post(
+            self.url,
+            events,
+            headers={"content-type": "application/cloudevents-batch+json"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["non_field_errors"],
+            ["The cloudevents at positions 0, 2 have the same id and source."],
+        )
+        self.assertFalse(CloudEvent.objects.exists())
+
+    def test_single_cloudevent_content_type_is_rejected(self):
+        response = self.client.post(
+            self.url,
+            [get_cloudevent()],
+            headers={"content-type": "application/cloudevents+json"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+import httpx
+from freezegun import freeze_time
+
+from nrc.datamodel.models import CallbackCheck
+from nrc.datamodel.tests.factories import AbonnementFactory
+
+from ..tasks import check_callbacks
+
+
+def mock_async_client(handler):
+    async_client = httpx.AsyncClient
+
+    def build_client(**kwargs):
+        return async_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    return patch("nrc.api.callback_checks.httpx.AsyncClient", side_effect=build_client)
+
+
+@override_settings(NOTIFICATION_CALLBACK_CHECK_CONCURRENCY=2)
+class CheckCallbacksTests(TestCase):
+    def test_check_callbacks(self):
+        reachable = AbonnementFactory.create(
+            callback_url="https://reachable.local/foo", auth="Token 1234"
+        )
+        unreachable = AbonnementFactory.create(
+            callback_url="https://unreachable.local/foo", auth="Token 1234"
+        )
+        timed_out = AbonnementFactory.create(
+            callback_url="https://timeout.local/foo", auth="Token 1234"
+        )
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            match request.url.host:
+                case "reachable.local":
+                    return httpx.Response(204)
+                case "unreachable.local":
+                    return httpx.Response(404)
+            raise httpx.ReadTimeout("timed out")
+
+        with mock_async_client(handler), freeze_time("2025-01-01T12:00:00Z"):
+            check_callbacks()
+
+        self.assertEqual(len(requests), 3)
+        self.assertEqual(requests[0].headers["Authorization"], "Token 1234")
+
+        reachable_check = CallbackCheck.objects.get(abonnement=reachable)
+        self.assertTrue(reachable_check.reachable)
+        self.assertEqual(reachable_check.response_status, 204)
+        self.assertEqual(
+            reachable_check.checked_at.isoformat(), "2025-01-01T12:00:00+00:00"
+        )
+
+        unreachable_check = CallbackCheck.objects.get(abonnement=unreachable)
+        self.assertFalse(unreachable_check.reachable)
+        self.assertEqual(unreachable_check.response_status, 404)
+
+        timed_out_check = CallbackCheck.objects.get(abonnement=timed_out)
+        self.assertFalse(timed_out_check.reachable)
+        self.assertIsNone(timed_out_check.response_status)
+        self.assertEqual(timed_out_check.exception, "timed out")
+
+    def test_check_selected_callbacks(self):
+        sub, duplicate = AbonnementFactory.create_batch(
+            2, callback_url="https://example.com/foo", auth="Token 1234"
+        )
+        other = AbonnementFactory.create(callback_url="https://example.com/other")
+        CallbackCheck.objects.create(
+            abonnement=sub,
+            reachable=False,
+            response_status=500,
+            checked_at="2025-01-01T12:00:00Z",
+        )
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200)
+
+        with mock_async_client(handler):
+            check_callbacks([sub.pk])
+
+        # subscriptions with the same callback URL and authorization are checked once
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(
+            set(
+                CallbackCheck.objects.values_list(
+                    "abonnement", "reachable", "response_status"
+                )
+            ),
+            {(sub.pk, True, 200), (duplicate.pk, True, 200)},
+        )
+        self.assertFalse(CallbackCheck.objects.filter(abonnement=other).exists())
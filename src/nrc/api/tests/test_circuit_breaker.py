@@ -0,0 +1,212 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+import requests_mock
+from freezegun import freeze_time
+from notifications_api_common.models import NotificationsConfig
+
+from nrc.datamodel.models import (
+    NotificatieResponse,
+    NotificationTypes,
+    ScheduledNotification,
+)
+from nrc.datamodel.tests.factories import AbonnementFactory, NotificatieFactory
+
+from ..circuit_breaker import CircuitBreaker, get_open_circuits
+from ..clients import client_cache
+from ..tasks import execute_notifications, send_to_sub
+
+MSG = {
+    "kanaal": "zaken",
+    "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+    "resource": "status",
+    "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+    "actie": "create",
+    "aanmaakdatum": "2018-01-01T17:00:00Z",
+    "kenmerken": {},
+}
+
+
+@override_settings(
+    NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD=3,
+    NOTIFICATION_CIRCUIT_BREAKER_TIMEOUT=60,
+    NOTIFICATION_CIRCUIT_BREAKER_MAX_TIMEOUT=200,
+    NOTIFICATION_REQUESTS_TIMEOUT=5,
+)
+@freeze_time("2026-01-01T12:00:00Z")
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        self.circuit_breaker = CircuitBreaker(1)
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self.circuit_breaker.record_failure()
+            self.assertIsNone(self.circuit_breaker.retry_at())
+
+        self.circuit_breaker.record_failure()
+
+        retry_at = timezone.now() + timedelta(seconds=60)
+        self.assertEqual(self.circuit_breaker.retry_at(), retry_at)
+        self.assertEqual(get_open_circuits([1, 2]), {1: retry_at})
+
+    def test_success_resets_failures(self):
+        for _ in range(2):
+            self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_success()
+        self.circuit_breaker.record_failure()
+
+        self.assertIsNone(self.circuit_breaker.retry_at())
+
+    def test_half_open_lets_one_probe_through(self):
+        for _ in range(3):
+            self.circuit_breaker.record_failure()
+
+        # the open circuit expires
+        cache.delete("circuit_breaker:1:open")
+
+        self.assertIsNone(self.circuit_breaker.retry_at())
+        self.assertEqual(
+            self.circuit_breaker.retry_at(), timezone.now() + timedelta(seconds=10)
+        )
+
+        self.circuit_breaker.record_success()
+
+        self.assertIsNone(self.circuit_breaker.retry_at())
+        self.assertIsNone(self.circuit_breaker.retry_at())
+
+    def test_failed_probe_doubles_timeout(self):
+        for _ in range(3):
+            self.circuit_breaker.record_failure()
+
+        for timeout in [120, 200]:
+            cache.delete("circuit_breaker:1:open")
+            self.assertIsNone(self.circuit_breaker.retry_at())
+            self.circuit_breaker.record_failure()
+
+            self.assertEqual(
+                self.circuit_breaker.retry_at(),
+                timezone.now() + timedelta(seconds=timeout),
+            )
+
+    @override_settings(NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD=0)
+    def test_disabled(self):
+        circuit_breaker = CircuitBreaker(1)
+        for _ in range(5):
+            circuit_breaker.record_failure()
+
+        self.assertIsNone(circuit_breaker.retry_at())
+        self.assertEqual(get_open_circuits([1]), {})
+
+
+@override_settings(
+    NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD=2,
+    NOTIFICATION_CIRCUIT_BREAKER_TIMEOUT=60,
+    CELERY_TASK_ALWAYS_EAGER=True,
+)
+@freeze_time("2026-01-01T12:00:00Z")
+class CircuitBreakerDeliveryTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        self.addCleanup(client_cache.clear)
+        self.sub = AbonnementFactory.create(callback_url="https://example.com/callback")
+
+    def _schedule(self, **kwargs) -> ScheduledNotification:
+        return ScheduledNotification.objects.create(
+            type=NotificationTypes.notification,
+            task_args=MSG,
+            execute_after=timezone.now(),
+            attempt=1,
+            sub=self.sub,
+            **kwargs,
+        )
+
+    @patch("nrc.api.tasks.get_exponential_backoff_interval", return_value=0)
+    def test_deliveries_are_deferred_when_circuit_is_open(self, mock_backoff):
+        scheduled_notifs = [self._schedule() for _ in range(4)]
+
+        with requests_mock.Mocker() as m:
+            m.post(self.sub.callback_url, status_code=503)
+
+            for scheduled_notif in scheduled_notifs[:2]:
+                send_to_sub.run(scheduled_notif.id, {})
+
+            self.assertEqual(m.call_count, 2)
+
+            with patch("nrc.api.tasks.send_to_sub.s") as mock_send_to_sub:
+                execute_notifications.run()
+
+            self.assertEqual(m.call_count, 2)
+
+        mock_send_to_sub.assert_not_called()
+        retry_at = timezone.now() + timedelta(seconds=60)
+        for scheduled_notif in scheduled_notifs:
+            scheduled_notif.refresh_from_db()
+            self.assertFalse(scheduled_notif.in_progress)
+            self.assertEqual(scheduled_notif.execute_after, retry_at)
+        # deferring counts as an attempt
+        self.assertEqual(
+            [scheduled_notif.task_attempt for scheduled_notif in scheduled_notifs],
+            [2, 2, 1, 1],
+        )
+
+    def test_task_is_deferred_when_circuit_is_open(self):
+        circuit_breaker = CircuitBreaker(self.sub.id)
+        for _ in range(2):
+            circuit_breaker.record_failure()
+        scheduled_notif = self._schedule(in_progress=True)
+        # claimed by another task
+        other = self._schedule(in_progress=True)
+
+        with requests_mock.Mocker() as m:
+            send_to_sub.run(scheduled_notif.id, {})
+
+        self.assertEqual(m.call_count, 0)
+        scheduled_notif.refresh_from_db()
+        self.assertFalse(scheduled_notif.in_progress)
+        self.assertEqual(
+            scheduled_notif.execute_after, timezone.now() + timedelta(seconds=60)
+        )
+        other.refresh_from_db()
+        self.assertTrue(other.in_progress)
+
+    @patch(
+        "nrc.api.tasks.NotificationsConfig.get_solo",
+        return_value=NotificationsConfig(notification_delivery_max_retries=2),
+    )
+    def test_deferred_notification_expires(self, mock_config):
+        circuit_breaker = CircuitBreaker(self.sub.id)
+        for _ in range(2):
+            circuit_breaker.record_failure()
+        scheduled_notif = self._schedule(notificatie=NotificatieFactory.create())
+
+        with (
+            requests_mock.Mocker() as m,
+            patch("nrc.api.tasks.send_to_sub.s") as mock_send_to_sub,
+        ):
+            for _ in range(3):
+                # the deferral has passed, but the circuit is still open
+                ScheduledNotification.objects.filter(id=scheduled_notif.id).update(
+                    execute_after=timezone.now()
+                )
+                execute_notifications.run()
+
+        self.assertEqual(m.call_count, 0)
+        mock_send_to_sub.assert_not_called()
+        self.assertFalse(
+            ScheduledNotification.objects.filter(id=scheduled_notif.id).exists()
+        )
+        response = NotificatieResponse.objects.get()
+        self.assertEqual(response.abonnement, self.sub)
+        self.assertIsNone(response.response_status)
+        self.assertEqual(
+            response.exception, "Not sent: the circuit of the subscription is open"
+        )
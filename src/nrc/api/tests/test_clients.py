@@ -0,0 +1,109 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from privates.test import temp_private_root
+from zgw_consumers.constants import AuthTypes
+
+from nrc.datamodel.tests.factories import AbonnementFactory
+
+from ..clients import ClientCache
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # silence default httpserver logs
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        # the client address (port) identifies the connection
+        self.server.client_addresses.append(self.client_address)
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@temp_private_root()
+class ClientCacheTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.client_cache = ClientCache(max_size=2, max_idle=60, pool_maxsize=5)
+        self.addCleanup(self.client_cache.clear)
+
+    def test_client_is_reused(self):
+        abonnement = AbonnementFactory.create(auth_type=AuthTypes.api_key)
+
+        client = self.client_cache.get_client(abonnement)
+
+        self.assertIs(self.client_cache.get_client(abonnement), client)
+        self.assertEqual(client.get_adapter(abonnement.callback_url)._pool_maxsize, 5)
+
+    def test_client_is_replaced_if_subscription_changed(self):
+        abonnement = AbonnementFactory.create(auth_type=AuthTypes.api_key)
+        client = self.client_cache.get_client(abonnement)
+
+        abonnement.auth = "ApiKey other-key"
+
+        with patch.object(client, "close") as mock_close:
+            new_client = self.client_cache.get_client(abonnement)
+
+        self.assertIsNot(new_client, client)
+        self.assertIs(self.client_cache.get_client(abonnement), new_client)
+        # the client can still be in use by another thread
+        mock_close.assert_not_called()
+
+    def test_least_recently_used_client_is_evicted(self):
+        abonnement1, abonnement2, abonnement3 = AbonnementFactory.create_batch(
+            3, auth_type=AuthTypes.api_key
+        )
+        client1 = self.client_cache.get_client(abonnement1)
+        client2 = self.client_cache.get_client(abonnement2)
+        # mark the first client as recently used
+        self.client_cache.get_client(abonnement1)
+
+        with patch.object(client2, "close") as mock_close:
+            self.client_cache.get_client(abonnement3)
+
+        mock_close.assert_not_called()
+        self.assertIs(self.client_cache.get_client(abonnement1), client1)
+
+    def test_idle_client_is_evicted(self):
+        abonnement = AbonnementFactory.create(auth_type=AuthTypes.api_key)
+
+        with patch("nrc.api.clients.time.monotonic", return_value=1000):
+            client = self.client_cache.get_client(abonnement)
+
+        with (
+            patch("nrc.api.clients.time.monotonic", return_value=1061),
+            patch.object(client, "close") as mock_close,
+        ):
+            new_client = self.client_cache.get_client(abonnement)
+
+        self.assertIsNot(new_client, client)
+        mock_close.assert_not_called()
+
+    def test_connection_is_reused(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        server.daemon_threads = True
+        server.client_addresses = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        host, port = server.server_address[:2]
+        abonnement = AbonnementFactory.create(
+            callback_url=f"http://{host}:{port}/callback", auth_type=AuthTypes.no_auth
+        )
+
+        for _ in range(2):
+            client = self.client_cache.get_client(abonnement)
+            response = client.post(abonnement.callback_url, data="{}", timeout=5)
+            self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(len(server.client_addresses), 2)
+        self.assertEqual(server.client_addresses[0], server.client_addresses[1])
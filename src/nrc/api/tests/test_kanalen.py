@@ -0,0 +1,93 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.reverse import reverse_lazy
+from rest_framework.test import APITestCase
+from vng_api_common.conf.api import BASE_REST_FRAMEWORK
+from vng_api_common.tests import JWTAuthMixin
+
+from nrc.datamodel.models import Kanaal
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+)
+
+from ..kanalen import get_kanaal, kanaal_registry
+
+
+class KanaalRegistryTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.kanaal = KanaalFactory.create(naam="zaken", filters=["bron"])
+
+    def test_registry_is_reused_until_kanaal_changes(self):
+        self.assertEqual(get_kanaal("zaken"), self.kanaal)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_kanaal("zaken").filters, ["bron"])
+
+        self.kanaal.filters = ["bron", "zaaktype"]
+        self.kanaal.save()
+
+        self.assertEqual(get_kanaal("zaken").filters, ["bron", "zaaktype"])
+
+    def test_deleted_kanaal(self):
+        kanaal_registry.get()
+
+        self.kanaal.delete()
+
+        with self.assertRaises(Kanaal.DoesNotExist):
+            get_kanaal("zaken")
+
+    def test_kanaal_missing_from_registry(self):
+        kanalen = kanaal_registry.get()
+        # e.g. created by another process, before the registry is rebuilt
+        Kanaal.objects.bulk_create([Kanaal(naam="besluiten")])
+
+        self.assertEqual(get_kanaal("besluiten", kanalen).naam, "besluiten")
+        with self.assertRaises(Kanaal.DoesNotExist):
+            get_kanaal("documenten", kanalen)
+
+
+@override_settings(
+    LINK_FETCHER="vng_api_common.mocks.link_fetcher_200",
+    LOG_NOTIFICATIONS_IN_DB=True,
+)
+class PublishKanaalQueriesTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+    notificatie_url = reverse_lazy(
+        "notificaties-list",
+        kwargs={"version": BASE_REST_FRAMEWORK["DEFAULT_VERSION"]},
+    )
+
+    def test_publish_does_not_query_kanaal(self):
+        kanaal = KanaalFactory.create(naam="zaken", filters=["bron"])
+        FilterGroupFactory.create(kanaal=kanaal, abonnement=AbonnementFactory.create())
+        msg = {
+            "kanaal": "zaken",
+            "source": "zaken.maykin.nl",
+            "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+            "resource": "status",
+            "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+            "actie": "create",
+            "aanmaakdatum": "2025-01-01T12:00:00Z",
+            "kenmerken": {"bron": "082096752011"},
+        }
+        # builds the registry
+        self.client.post(self.notificatie_url, msg)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.notificatie_url, msg)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in context.captured_queries
+                if 'FROM "datamodel_kanaal"' in query["sql"]
+            ]
+        )
@@ -1,4 +1,9 @@
-from unittest.mock import MagicMock, patch
+from datetime import timedelta
+from unittest.mock import ANY, MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
 import requests_mock
 from rest_framework import status
@@ -8,13 +13,20 @@ from vng_api_common.tests import (
     reverse,
 )
 
-from nrc.datamodel.tests.factories import KanaalFactory
+from nrc.datamodel.models import NotificationTypes, Payload, ScheduledNotification
+from nrc.datamodel.tests.factories import AbonnementFactory, KanaalFactory
 
 from ..metrics import (
     abonnement_create_counter,
+    count_scheduled_notifications,
+    delivery_delay_histogram,
+    delivery_duration_histogram,
+    delivery_retries_counter,
     kanaal_create_counter,
     notificaties_publish_counter,
+    scheduler_claimed_histogram,
 )
+from ..tasks import deliver_message, execute_notifications
 
 
 class NotificatiesMetricsTests(JWTAuthMixin, APITestCase):
@@ -83,3 +95,120 @@ class NotificatiesMetricsTests(JWTAuthMixin, APITestCase):
 
         self.assertEqual(response.status_code, 201)
         mock_add.assert_called_once_with(1)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class DeliveryMetricsTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+
+        self.sub = AbonnementFactory.create(callback_url="https://example.com/callback")
+        self.payload = Payload.objects.create(
+            type=NotificationTypes.notification,
+            data={
+                "kanaal": "zaken",
+                "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+                "resource": "status",
+                "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+                "actie": "create",
+                "aanmaakdatum": "2025-01-01T12:00:00Z",
+                "kenmerken": {},
+            },
+        )
+
+    def _schedule(self, **kwargs) -> ScheduledNotification:
+        kwargs.setdefault("execute_after", timezone.now())
+        return ScheduledNotification.objects.create(
+            type=NotificationTypes.notification,
+            payload=self.payload,
+            sub=self.sub,
+            **kwargs,
+        )
+
+    @patch.object(delivery_delay_histogram, "record")
+    @patch.object(delivery_duration_histogram, "record")
+    def test_successful_delivery(
+        self, mock_duration_record: MagicMock, mock_delay_record: MagicMock
+    ):
+        self._schedule()
+
+        with requests_mock.Mocker() as m:
+            m.post(self.sub.callback_url, status_code=204)
+
+            execute_notifications.run()
+
+        mock_duration_record.assert_called_once_with(
+            ANY,
+            {
+                "status_class": "2xx",
+                "type": NotificationTypes.notification,
+            },
+        )
+        mock_delay_record.assert_called_once_with(
+            ANY, {"type": NotificationTypes.notification}
+        )
+        self.assertGreaterEqual(mock_delay_record.call_args.args[0], 0)
+
+    @patch.object(delivery_retries_counter, "add")
+    @patch.object(delivery_delay_histogram, "record")
+    @patch.object(delivery_duration_histogram, "record")
+    def test_failed_delivery(
+        self,
+        mock_duration_record: MagicMock,
+        mock_delay_record: MagicMock,
+        mock_retries_add: MagicMock,
+    ):
+        # retries are not recorded as the first attempt
+        self._schedule(task_attempt=1)
+
+        with requests_mock.Mocker() as m:
+            m.post(self.sub.callback_url, status_code=503)
+
+            execute_notifications.run()
+
+        self.assertEqual(mock_duration_record.call_args.args[1]["status_class"], "5xx")
+        mock_delay_record.assert_not_called()
+        mock_retries_add.assert_called_once_with(
+            1, {"type": NotificationTypes.notification}
+        )
+
+    @patch.object(delivery_duration_histogram, "record")
+    def test_unexpected_delivery_error(self, mock_duration_record: MagicMock):
+        with (
+            patch("nrc.api.tasks.get_client", side_effect=ValueError("invalid")),
+            self.assertRaisesMessage(ValueError, "invalid"),
+        ):
+            deliver_message(self.sub, self.payload.data)
+
+        mock_duration_record.assert_called_once()
+
+    @patch.object(scheduler_claimed_histogram, "record")
+    def test_claimed_scheduled_notifications(self, mock_record: MagicMock):
+        self._schedule()
+        self._schedule(execute_after=timezone.now() + timedelta(hours=1))
+
+        with requests_mock.Mocker() as m:
+            m.post(self.sub.callback_url, status_code=204)
+
+            execute_notifications.run()
+
+        mock_record.assert_called_once_with(1)
+
+    def test_scheduled_notification_counts(self):
+        self._schedule()
+        self._schedule(in_progress=True)
+        self._schedule(
+            in_progress=True, execute_after=timezone.now() - timedelta(days=1)
+        )
+
+        observations = count_scheduled_notifications(MagicMock())
+
+        self.assertEqual(
+            {
+                observation.attributes["state"]: observation.value
+                for observation in observations
+            },
+            {"waiting": 1, "in_progress": 1, "stuck": 1},
+        )
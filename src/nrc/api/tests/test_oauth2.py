@@ -0,0 +1,230 @@
+import threading
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+import requests
+import requests_mock
+from freezegun import freeze_time
+
+from ..oauth2 import CachedOAuth2Auth, TokenUnavailable, _release_lock, get_token
+
+TOKEN_URL = "https://auth.example/token"
+
+
+class OAuth2TokenCacheTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+
+    def test_token_is_shared(self):
+        with requests_mock.Mocker() as m:
+            token_endpoint = m.post(
+                TOKEN_URL, json={"access_token": "mock-token", "expires_in": 3600}
+            )
+            callback = m.post("https://example.com/callback", status_code=204)
+
+            for _ in range(3):
+                session = requests.Session()
+                session.auth = CachedOAuth2Auth(
+                    token_url=TOKEN_URL, client_id="client", secret="secret", scope=""
+                )
+                session.post("https://example.com/callback")
+
+        self.assertEqual(token_endpoint.call_count, 1)
+        self.assertEqual(callback.call_count, 3)
+        self.assertEqual(
+            callback.last_request.headers["Authorization"], "Bearer mock-token"
+        )
+
+    def test_token_is_cached_per_client_and_scope(self):
+        with requests_mock.Mocker() as m:
+            token_endpoint = m.post(
+                TOKEN_URL, json={"access_token": "mock-token", "expires_in": 3600}
+            )
+
+            get_token(TOKEN_URL, "client", "secret", "")
+            get_token(TOKEN_URL, "client", "secret", "scope")
+            get_token(TOKEN_URL, "other-client", "secret", "")
+            get_token(TOKEN_URL, "client", "secret", "")
+
+        self.assertEqual(token_endpoint.call_count, 3)
+
+    def test_token_is_cached_per_secret(self):
+        with requests_mock.Mocker() as m:
+            token_endpoint = m.post(
+                TOKEN_URL,
+                [
+                    {"json": {"access_token": "token-1", "expires_in": 3600}},
+                    {"json": {"access_token": "token-2", "expires_in": 3600}},
+                ],
+            )
+            callback = m.post("https://example.com/callback", status_code=204)
+
+            # subscriptions that only differ in their secret
+            for secret in ("secret", "other-secret", "secret"):
+                session = requests.Session()
+                session.auth = CachedOAuth2Auth(
+                    token_url=TOKEN_URL, client_id="client", secret=secret, scope=""
+                )
+                session.post("https://example.com/callback")
+
+        self.assertEqual(token_endpoint.call_count, 2)
+        self.assertEqual(
+            [request.headers["Authorization"] for request in callback.request_history],
+            ["Bearer token-1", "Bearer token-2", "Bearer token-1"],
+        )
+
+    def test_token_is_refreshed_before_it_expires(self):
+        with requests_mock.Mocker() as m:
+            token_endpoint = m.post(
+                TOKEN_URL,
+                [
+                    {"json": {"access_token": "token-1", "expires_in": 300}},
+                    {"json": {"access_token": "token-2", "expires_in": 300}},
+                ],
+            )
+
+            with freeze_time("2026-01-01T12:00:00") as frozen_time:
+                token = get_token(TOKEN_URL, "client", "secret", "")
+                self.assertEqual(token["access_token"], "token-1")
+
+                frozen_time.tick(260)
+                token = get_token(TOKEN_URL, "client", "secret", "")
+                self.assertEqual(token["access_token"], "token-1")
+
+                frozen_time.tick(20)
+                token = get_token(TOKEN_URL, "client", "secret", "")
+                self.assertEqual(token["access_token"], "token-2")
+
+        self.assertEqual(token_endpoint.call_count, 2)
+
+    def test_concurrent_refreshes_fetch_one_token(self):
+        fetched = threading.Event()
+
+        def slow_fetch_token(session, **kwargs):
+            fetched.wait(timeout=1)
+            return {"access_token": "mock-token", "expires_in": 3600}
+
+        with patch(
+            "nrc.api.oauth2.OAuth2Session.fetch_token",
+            autospec=True,
+            side_effect=slow_fetch_token,
+        ) as mock_fetch_token:
+            threads = [
+                threading.Thread(
+                    target=get_token, args=(TOKEN_URL, "client", "secret", "")
+                )
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            fetched.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mock_fetch_token.call_count, 1)
+
+    def test_wait_for_token_fetched_by_other_process(self):
+        cache_key = "oauth2_token:lock-test"
+
+        def fetch_by_other_process(seconds):
+            cache.set(
+                cache_key,
+                {
+                    "access_token": "other-token",
+                    "expires_at": 2**40,
+                    "refresh_at": 2**40,
+                },
+            )
+
+        # another process holds the lock
+        cache.add(f"{cache_key}:lock", "1")
+
+        with (
+            patch("nrc.api.oauth2.get_token_cache_key", return_value=cache_key),
+            patch("nrc.api.oauth2.time.sleep", side_effect=fetch_by_other_process),
+            patch("nrc.api.oauth2._fetch_token") as mock_fetch_token,
+        ):
+            token = get_token(TOKEN_URL, "client", "secret", "")
+
+        self.assertEqual(token["access_token"], "other-token")
+        mock_fetch_token.assert_not_called()
+
+    def test_short_lived_token_is_cached(self):
+        with requests_mock.Mocker() as m:
+            token_endpoint = m.post(
+                TOKEN_URL, json={"access_token": "mock-token", "expires_in": 20}
+            )
+
+            with freeze_time("2026-01-01T12:00:00") as frozen_time:
+                get_token(TOKEN_URL, "client", "secret", "")
+                frozen_time.tick(5)
+                get_token(TOKEN_URL, "client", "secret", "")
+                # refreshed after half of its lifetime
+                frozen_time.tick(6)
+                get_token(TOKEN_URL, "client", "secret", "")
+
+        self.assertEqual(token_endpoint.call_count, 2)
+
+    def test_failed_fetch_is_not_retried_immediately(self):
+        with requests_mock.Mocker() as m:
+            token_endpoint = m.post(TOKEN_URL, status_code=500)
+
+            with self.assertRaises(Exception):
+                get_token(TOKEN_URL, "client", "secret", "")
+            with self.assertRaises(TokenUnavailable):
+                get_token(TOKEN_URL, "client", "secret", "")
+
+        self.assertEqual(token_endpoint.call_count, 1)
+
+    def test_token_is_not_fetched_without_lock(self):
+        cache_key = "oauth2_token:lock-test"
+        # another process holds the lock, and does not store a token
+        cache.add(f"{cache_key}:lock", "other")
+
+        with (
+            patch("nrc.api.oauth2.get_token_cache_key", return_value=cache_key),
+            patch("nrc.api.oauth2.get_fetch_lock_timeout", return_value=0),
+            patch("nrc.api.oauth2._fetch_token") as mock_fetch_token,
+        ):
+            with self.assertRaises(TokenUnavailable):
+                get_token(TOKEN_URL, "client", "secret", "")
+
+        mock_fetch_token.assert_not_called()
+
+    def test_lock_is_only_released_by_its_owner(self):
+        # the lock expired, and was acquired by another process
+        cache.set("oauth2_token:lock-test:lock", "other")
+
+        _release_lock("oauth2_token:lock-test:lock", "expired-owner")
+
+        self.assertEqual(cache.get("oauth2_token:lock-test:lock"), "other")
+
+    def test_rejected_token_is_not_reused(self):
+        with requests_mock.Mocker() as m:
+            token_endpoint = m.post(
+                TOKEN_URL,
+                [
+                    {"json": {"access_token": "token-1", "expires_in": 3600}},
+                    {"json": {"access_token": "token-2", "expires_in": 3600}},
+                ],
+            )
+            callback = m.post(
+                "https://example.com/callback",
+                [{"status_code": 401}, {"status_code": 204}],
+            )
+
+            session = requests.Session()
+            session.auth = CachedOAuth2Auth(
+                token_url=TOKEN_URL, client_id="client", secret="secret", scope=""
+            )
+            session.post("https://example.com/callback")
+            session.post("https://example.com/callback")
+
+        self.assertEqual(token_endpoint.call_count, 2)
+        self.assertEqual(
+            callback.last_request.headers["Authorization"], "Bearer token-2"
+        )
@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+import requests_mock
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.reverse import reverse_lazy
+from rest_framework.test import APITestCase
+from vng_api_common.conf.api import BASE_REST_FRAMEWORK
+from vng_api_common.tests import JWTAuthMixin
+
+from nrc.datamodel.models import NotificationTypes, Payload, ScheduledNotification
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+)
+
+from ..clients import client_cache
+from ..payloads import get_task_args
+from ..tasks import clean_payloads, execute_notifications
+
+MSG = {
+    "kanaal": "zaken",
+    "source": "zaken.maykin.nl",
+    "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+    "resource": "status",
+    "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+    "actie": "create",
+    "aanmaakdatum": "2025-01-01T12:00:00Z",
+    "kenmerken": {"bron": "082096752011"},
+}
+
+
+@override_settings(
+    LINK_FETCHER="vng_api_common.mocks.link_fetcher_200",
+    LOG_NOTIFICATIONS_IN_DB=True,
+    CELERY_TASK_ALWAYS_EAGER=True,
+)
+class PayloadTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+    notificatie_url = reverse_lazy(
+        "notificaties-list",
+        kwargs={"version": BASE_REST_FRAMEWORK["DEFAULT_VERSION"]},
+    )
+
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        self.addCleanup(client_cache.clear)
+
+        kanaal = KanaalFactory.create(naam="zaken", filters=["bron"])
+        self.subs = [
+            AbonnementFactory.create(callback_url="https://example.local/1"),
+            AbonnementFactory.create(callback_url="https://example.local/2"),
+            AbonnementFactory.create(
+                callback_url="https://example.local/3", send_cloudevents=True
+            ),
+            AbonnementFactory.create(
+                callback_url="https://example.local/4", send_cloudevents=True
+            ),
+        ]
+        for sub in self.subs:
+            FilterGroupFactory.create(kanaal=kanaal, abonnement=sub)
+
+    def test_message_is_stored_once(self):
+        response = self.client.post(self.notificatie_url, MSG)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        payload = Payload.objects.get()
+        self.assertEqual(payload.type, NotificationTypes.notification)
+        self.assertEqual(payload.data["resourceUrl"], MSG["resourceUrl"])
+        self.assertEqual(
+            set(
+                ScheduledNotification.objects.values_list(
+                    "payload", "task_args", "type"
+                )
+            ),
+            {
+                (payload.pk, None, NotificationTypes.notification),
+                (payload.pk, None, NotificationTypes.cloudevent),
+            },
+        )
+
+    def test_cloudevent_is_built_when_sent(self):
+        self.client.post(self.notificatie_url, MSG)
+        payload = Payload.objects.get()
+
+        with requests_mock.Mocker() as m:
+            for sub in self.subs:
+                m.post(sub.callback_url, status_code=204)
+
+            execute_notifications.run()
+
+        self.assertEqual(m.call_count, 4)
+        requests = {request.url: request for request in m.request_history}
+        self.assertEqual(
+            requests["https://example.local/1"].json()["resourceUrl"],
+            MSG["resourceUrl"],
+        )
+        for url in ("https://example.local/3", "https://example.local/4"):
+            self.assertEqual(
+                requests[url].json(),
+                {
+                    "id": str(payload.uuid),
+                    "source": "zaken.maykin.nl",
+                    "specversion": "1.0",
+                    "type": "nl.overheid.zaken.status.create",
+                    "datacontenttype": "application/json",
+                    "subject": "721c9",
+                    "time": "2025-01-01T12:00:00Z",
+                    "data": {
+                        "bron": "082096752011",
+                        "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+                    },
+                },
+            )
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+
+class GetTaskArgsTests(TestCase):
+    def test_scheduled_without_payload(self):
+        scheduled_notif = ScheduledNotification(
+            type=NotificationTypes.notification, task_args=MSG
+        )
+
+        self.assertEqual(get_task_args(scheduled_notif), MSG)
+
+
+@freeze_time("2026-01-01T12:00:00Z")
+class CleanPayloadsTests(TestCase):
+    def test_unused_payloads_are_deleted(self):
+        sub = AbonnementFactory.create()
+        with freeze_time("2026-01-01T10:00:00Z"):
+            unused = Payload.objects.create(
+                type=NotificationTypes.notification, data={}
+            )
+            used = Payload.objects.create(type=NotificationTypes.notification, data={})
+        recent = Payload.objects.create(type=NotificationTypes.notification, data={})
+        ScheduledNotification.objects.create(
+            type=NotificationTypes.notification,
+            payload=used,
+            execute_after=timezone.now() + timedelta(minutes=5),
+            sub=sub,
+        )
+
+        clean_payloads.run()
+
+        self.assertFalse(Payload.objects.filter(pk=unused.pk).exists())
+        self.assertCountEqual(
+            Payload.objects.values_list("pk", flat=True), [used.pk, recent.pk]
+        )
@@ -1,8 +1,13 @@
 from datetime import datetime
 
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
+from rest_framework import status
 from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+from vng_api_common.tests import JWTAuthMixin, get_operation_url
 
 from nrc.datamodel.models import Abonnement
 from nrc.datamodel.tests.factories import (
@@ -64,13 +69,15 @@ class MessageSerializerQueryTests(TestCase):
                     value="zeer_geheim",
                 )
 
-                with self.assertNumQueries(3):
+                # builds the routing index
+                serializer.create(msg)
+
+                with self.assertNumQueries(2):
                     """
-                    Expected three queries:
+                    Expected two queries, the subscriptions are taken from the routing index:
 
-                    (1) SELECT datamodel_filtergroup based on kanaal
-                    (2) SELECT datamodel_filter for the results from query 1
-                    (3) INSERT INTO datamodel_schedulednotification
+                    (1) INSERT INTO datamodel_payload
+                    (2) INSERT INTO datamodel_schedulednotification
                     """
                     serializer.create(msg)
 
@@ -120,12 +127,13 @@ class MessageSerializerQueryTests(TestCase):
                     value="zeer_geheim",
                 )
 
-                with self.assertNumQueries(2):
-                    """
-                    Expected two queries:
+                # builds the routing index
+                with self.assertRaises(ValidationError):
+                    serializer.create(msg)
 
-                    (1) SELECT datamodel_filtergroup based on kanaal
-                    (2) SELECT datamodel_filter for the results from query 1
+                with self.assertNumQueries(0):
+                    """
+                    Expected no queries, the subscriptions are taken from the routing index
                     """
                     with self.assertRaises(ValidationError):
                         serializer.create(msg)
@@ -180,12 +188,70 @@ class CloudEventSerializerQueryTests(TestCase):
                     value="zeer_geheim",
                 )
 
-                with self.assertNumQueries(3):
+                # builds the routing index
+                serializer.create(event)
+
+                with self.assertNumQueries(2):
                     """
-                    Expected three queries:
-                    (1) SELECT datamodel_cloudeventfiltergroup based on type_substring
-                        and send_cloudevents=true for the related Abonnement
-                    (2) SELECT datamodel_cloudeventfilter for the results from query 1
-                    (3) INSERT INTO datamodel_schedulednotification
+                    Expected two queries, the subscriptions are taken from the routing index:
+
+                    (1) INSERT INTO datamodel_payload
+                    (2) INSERT INTO datamodel_schedulednotification
                     """
                     serializer.create(event)
+
+
+class AbonnementAPIQueryTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+
+    def _create_abonnementen(self, num_subscriptions: int):
+        kanaal = KanaalFactory.create()
+        for abonnement in AbonnementFactory.create_batch(num_subscriptions):
+            FilterFactory.create(
+                filter_group__abonnement=abonnement, filter_group__kanaal=kanaal
+            )
+            CloudEventFilterFactory.create(
+                cloud_event_filter_group__abonnement=abonnement
+            )
+
+    def _get_num_queries(self, url: str, **params) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_queries(self):
+        """
+        Verify that the number of queries performed when listing the subscriptions
+        is constant, regardless of the number of subscriptions in the database
+        """
+        url = get_operation_url("abonnement_list")
+        self._create_abonnementen(1)
+        expected_num_queries = self._get_num_queries(url)
+
+        for num_subscriptions in (10, 100):
+            with self.subTest(num_subscriptions=num_subscriptions):
+                Abonnement.objects.all().delete()
+                self._create_abonnementen(num_subscriptions)
+
+                self.assertEqual(self._get_num_queries(url), expected_num_queries)
+                # a page adds a count query
+                self.assertEqual(
+                    self._get_num_queries(url, page=1), expected_num_queries + 1
+                )
+
+    def test_retrieve_queries(self):
+        self._create_abonnementen(1)
+        abonnement = Abonnement.objects.get()
+        FilterFactory.create_batch(
+            5, filter_group__abonnement=abonnement, filter_group__kanaal__filters=[]
+        )
+        url = get_operation_url("abonnement_read", uuid=abonnement.uuid)
+        expected_num_queries = self._get_num_queries(url)
+
+        CloudEventFilterFactory.create_batch(
+            5, cloud_event_filter_group__abonnement=abonnement
+        )
+
+        self.assertEqual(self._get_num_queries(url), expected_num_queries)
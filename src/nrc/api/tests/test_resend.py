@@ -0,0 +1,264 @@
+from datetime import UTC, datetime, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from nrc.datamodel.models import (
+    Notificatie,
+    NotificationTypes,
+    ResendJob,
+    ResendJobStatus,
+    ScheduledNotification,
+)
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    CloudEventFactory,
+    CloudEventFilterGroupFactory,
+    CloudEventResponseFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+    NotificatieFactory,
+    NotificatieResponseFactory,
+)
+
+from ..resend import STALE_JOB_TIMEOUT
+from ..summaries import update_delivery_summaries
+from ..tasks import resend_messages, resume_resend_jobs
+
+FORWARDED_MSG = {
+    "kanaal": "zaken",
+    "source": "zaken.maykin.nl",
+    "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+    "resource": "status",
+    "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+    "actie": "create",
+    "aanmaakdatum": "2025-01-01T12:00:00Z",
+    "kenmerken": {},
+}
+
+
+@override_settings(NOTIFICATION_RESEND_CHUNK_SIZE=2)
+class ResendJobTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+
+        kanaal = KanaalFactory.create(naam="zaken")
+        self.delivered, self.failed = AbonnementFactory.create_batch(2)
+        for sub in (self.delivered, self.failed):
+            FilterGroupFactory.create(kanaal=kanaal, abonnement=sub)
+
+        self.notificaties = NotificatieFactory.create_batch(
+            3, kanaal=kanaal, forwarded_msg=FORWARDED_MSG
+        )
+        for notificatie in self.notificaties:
+            NotificatieResponseFactory.create(
+                notificatie=notificatie, abonnement=self.delivered, response_status=204
+            )
+            NotificatieResponseFactory.create(
+                notificatie=notificatie, abonnement=self.failed, response_status=500
+            )
+
+    def _create_job(self, **kwargs) -> ResendJob:
+        return ResendJob.objects.create(
+            type=NotificationTypes.notification,
+            message_ids=[notificatie.pk for notificatie in self.notificaties],
+            **kwargs,
+        )
+
+    def test_resend_notifications(self):
+        job = self._create_job()
+
+        resend_messages(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ResendJobStatus.finished)
+        self.assertEqual(job.total, 3)
+        self.assertEqual(job.processed, 3)
+        self.assertEqual(job.scheduled, 6)
+        self.assertIsNotNone(job.finished_at)
+
+        scheduled_notifs = ScheduledNotification.objects.all()
+        self.assertEqual(
+            {scheduled_notif.sub for scheduled_notif in scheduled_notifs},
+            {self.delivered, self.failed},
+        )
+        for scheduled_notif in scheduled_notifs:
+            self.assertEqual(scheduled_notif.attempt, 2)
+            self.assertEqual(scheduled_notif.payload.data, FORWARDED_MSG)
+
+        # the deliveries are pending
+        self.assertEqual(
+            set(Notificatie.objects.values_list("pending_count", flat=True)), {2}
+        )
+
+    def test_resend_to_failed_subscriptions(self):
+        job = self._create_job(only_failed=True)
+
+        resend_messages(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.scheduled, 3)
+        self.assertEqual(
+            set(ScheduledNotification.objects.values_list("sub", flat=True)),
+            {self.failed.pk},
+        )
+
+    def test_resend_failed_deliveries_of_time_range(self):
+        # the first notification was redelivered already
+        NotificatieResponseFactory.create(
+            notificatie=self.notificaties[0],
+            abonnement=self.failed,
+            attempt=2,
+            response_status=204,
+        )
+        old = NotificatieFactory.create(
+            kanaal=self.notificaties[0].kanaal,
+            forwarded_msg={**FORWARDED_MSG, "aanmaakdatum": "2024-01-01T12:00:00Z"},
+        )
+        NotificatieResponseFactory.create(
+            notificatie=old, abonnement=self.failed, response_status=500
+        )
+        for notificatie in [*self.notificaties, old]:
+            update_delivery_summaries(Notificatie, [notificatie.pk])
+        job = ResendJob.objects.create(
+            type=NotificationTypes.notification,
+            start=datetime(2024, 6, 1, tzinfo=UTC),
+            only_failed=True,
+        )
+
+        resend_messages(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.total, 2)
+        self.assertEqual(job.processed, 2)
+        self.assertEqual(job.scheduled, 2)
+        scheduled_notifs = ScheduledNotification.objects.all()
+        self.assertEqual(
+            {
+                (scheduled_notif.notificatie, scheduled_notif.sub)
+                for scheduled_notif in scheduled_notifs
+            },
+            {
+                (self.notificaties[1], self.failed),
+                (self.notificaties[2], self.failed),
+            },
+        )
+
+    def test_resend_failed_deliveries_of_removed_filter(self):
+        # the failed deliveries are retried, even if the subscription no longer
+        # matches the notifications
+        self.failed.filter_groups.all().delete()
+        job = self._create_job(only_failed=True)
+
+        resend_messages(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.scheduled, 3)
+        self.assertEqual(
+            set(ScheduledNotification.objects.values_list("sub", flat=True)),
+            {self.failed.pk},
+        )
+
+    def test_resend_to_subscription(self):
+        other_kanaal = KanaalFactory.create(naam="besluiten")
+        NotificatieFactory.create(kanaal=other_kanaal, forwarded_msg=FORWARDED_MSG)
+        job = ResendJob.objects.create(
+            type=NotificationTypes.notification, abonnement=self.delivered
+        )
+
+        resend_messages(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.total, 3)
+        self.assertEqual(job.scheduled, 3)
+        self.assertEqual(
+            set(ScheduledNotification.objects.values_list("sub", flat=True)),
+            {self.delivered.pk},
+        )
+
+    def test_resume_failed_job(self):
+        job = self._create_job(
+            status=ResendJobStatus.failed,
+            total=3,
+            processed=2,
+            last_message_id=self.notificaties[1].pk,
+        )
+
+        resend_messages(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ResendJobStatus.finished)
+        self.assertEqual(job.processed, 3)
+        self.assertEqual(
+            set(ScheduledNotification.objects.values_list("notificatie", flat=True)),
+            {self.notificaties[2].pk},
+        )
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_resume_interrupted_job(self):
+        job = self._create_job(
+            status=ResendJobStatus.running,
+            total=3,
+            processed=2,
+            last_message_id=self.notificaties[1].pk,
+        )
+        # `updated_at` is set on save
+        ResendJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - STALE_JOB_TIMEOUT - timedelta(minutes=1)
+        )
+
+        resume_resend_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ResendJobStatus.finished)
+        self.assertEqual(job.processed, 3)
+        self.assertEqual(
+            set(ScheduledNotification.objects.values_list("notificatie", flat=True)),
+            {self.notificaties[2].pk},
+        )
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_running_job_is_not_run_twice(self):
+        job = self._create_job(status=ResendJobStatus.running)
+
+        resend_messages(job.pk)
+        resume_resend_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ResendJobStatus.running)
+        self.assertEqual(job.processed, 0)
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+    def test_finished_job_is_not_run_again(self):
+        job = self._create_job()
+        resend_messages(job.pk)
+
+        resend_messages(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.scheduled, 6)
+        self.assertEqual(ScheduledNotification.objects.count(), 6)
+
+    def test_resend_cloudevents(self):
+        sub = AbonnementFactory.create(send_cloudevents=True)
+        CloudEventFilterGroupFactory.create(
+            abonnement=sub, type_substring="nl.overheid"
+        )
+        cloudevent = CloudEventFactory.create(
+            time=timezone.now(), datacontenttype="application/json", data="{}"
+        )
+        CloudEventResponseFactory.create(cloudevent=cloudevent, abonnement=sub)
+        job = ResendJob.objects.create(
+            type=NotificationTypes.cloudevent, message_ids=[cloudevent.pk]
+        )
+
+        resend_messages(job.pk)
+
+        scheduled_notif = ScheduledNotification.objects.get()
+        self.assertEqual(scheduled_notif.type, NotificationTypes.cloudevent)
+        self.assertEqual(scheduled_notif.cloudevent, cloudevent)
+        self.assertEqual(scheduled_notif.attempt, 2)
+        self.assertEqual(scheduled_notif.payload.data["id"], cloudevent.id)
@@ -0,0 +1,219 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+import requests_mock
+
+from nrc.datamodel.models import (
+    CloudEventResponse,
+    NotificatieResponse,
+    NotificationTypes,
+    ScheduledNotification,
+)
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    CloudEventFactory,
+    NotificatieFactory,
+)
+
+from ..clients import client_cache
+from ..responses import ResponseBuffer
+from ..tasks import _claim_scheduled_notifications, send_to_sub
+
+
+@override_settings(
+    NOTIFICATION_RESPONSE_BUFFER_SIZE=3, NOTIFICATION_RESPONSE_FLUSH_INTERVAL=60
+)
+class ResponseBufferTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.buffer = ResponseBuffer()
+        self.addCleanup(self.buffer.flush)
+
+        self.abonnement = AbonnementFactory.create()
+        self.notificatie = NotificatieFactory.create()
+        self.cloudevent = CloudEventFactory.create()
+
+    def _notificatie_response(self) -> NotificatieResponse:
+        return NotificatieResponse(
+            notificatie_id=self.notificatie.id,
+            abonnement_id=self.abonnement.id,
+            response_status=204,
+        )
+
+    def test_flush_when_full(self):
+        self.buffer.add(self._notificatie_response())
+        self.buffer.add(
+            CloudEventResponse(
+                cloudevent_id=self.cloudevent.id,
+                abonnement_id=self.abonnement.id,
+                response_status=204,
+            )
+        )
+
+        self.assertEqual(NotificatieResponse.objects.count(), 0)
+        self.assertEqual(CloudEventResponse.objects.count(), 0)
+
+        # the responses are created, and the delivery summaries of the notificatie
+        # and cloudevent updated
+        with self.assertNumQueries(20):
+            self.buffer.add(self._notificatie_response())
+
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(NotificatieResponse.objects.count(), 2)
+        self.assertEqual(CloudEventResponse.objects.count(), 1)
+
+        self.notificatie.refresh_from_db()
+        self.assertEqual(self.notificatie.delivered_count, 1)
+        self.assertIsNotNone(self.notificatie.last_attempt_at)
+        self.cloudevent.refresh_from_db()
+        self.assertEqual(self.cloudevent.delivered_count, 1)
+
+    def test_flush_skips_failing_responses(self):
+        invalid_response = self._notificatie_response()
+        # violates the check constraint of the positive attempt
+        invalid_response.attempt = -1
+
+        # the buffer is full
+        self.buffer.add(
+            invalid_response,
+            self._notificatie_response(),
+            CloudEventResponse(
+                cloudevent_id=self.cloudevent.id,
+                abonnement_id=self.abonnement.id,
+                response_status=204,
+            ),
+        )
+
+        # only the invalid response is lost
+        self.assertEqual(NotificatieResponse.objects.count(), 1)
+        self.assertEqual(CloudEventResponse.objects.count(), 1)
+        self.notificatie.refresh_from_db()
+        self.assertEqual(self.notificatie.delivered_count, 1)
+
+    def test_flush_after_interval(self):
+        with patch("nrc.api.responses.threading.Timer") as mock_timer:
+            self.buffer.add(self._notificatie_response())
+            self.buffer.add(self._notificatie_response())
+
+        mock_timer.assert_called_once_with(60, self.buffer._flush_in_background)
+        mock_timer.return_value.start.assert_called_once()
+
+        self.buffer.flush()
+
+        mock_timer.return_value.cancel.assert_called_once()
+        self.assertEqual(NotificatieResponse.objects.count(), 2)
+
+    def test_flush_empty_buffer(self):
+        with self.assertNumQueries(0):
+            self.buffer.flush()
+
+    def test_finished_scheduled_notifications_are_deleted_on_flush(self):
+        scheduled_notif = ScheduledNotification.objects.create(
+            type=NotificationTypes.notification,
+            execute_after=timezone.now(),
+            sub=self.abonnement,
+            in_progress=True,
+        )
+
+        self.buffer.add(self._notificatie_response())
+        self.buffer.finish(scheduled_notif.id)
+
+        self.assertTrue(ScheduledNotification.objects.exists())
+
+        self.buffer.flush()
+
+        self.assertEqual(NotificatieResponse.objects.count(), 1)
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+
+MSG = {
+    "kanaal": "zaken",
+    "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+    "resource": "status",
+    "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+    "actie": "create",
+    "aanmaakdatum": "2018-01-01T17:00:00Z",
+    "kenmerken": {},
+}
+
+
+@override_settings(
+    # the default buffering (CI writes every result immediately)
+    NOTIFICATION_RESPONSE_BUFFER_SIZE=100,
+    NOTIFICATION_RESPONSE_FLUSH_INTERVAL=60,
+)
+class BufferedDeliveryTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.buffer = ResponseBuffer()
+        self.addCleanup(self.buffer.flush)
+        patcher = patch("nrc.api.tasks.response_buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear)
+        self.addCleanup(client_cache.clear)
+
+        self.abonnement = AbonnementFactory.create(
+            callback_url="https://example.com/callback"
+        )
+        self.notificatie = NotificatieFactory.create(pending_count=1)
+        self.scheduled_notif = ScheduledNotification.objects.create(
+            type=NotificationTypes.notification,
+            task_args=MSG,
+            execute_after=timezone.now(),
+            sub=self.abonnement,
+            notificatie=self.notificatie,
+            in_progress=True,
+        )
+
+    def test_delivered_notification_is_deleted_with_its_response(self):
+        with requests_mock.Mocker() as m:
+            m.post(self.abonnement.callback_url, status_code=204)
+            send_to_sub.run(self.scheduled_notif.id, {})
+
+        # nothing is written until the buffer is flushed
+        self.assertEqual(len(self.buffer), 2)
+        self.assertFalse(NotificatieResponse.objects.exists())
+        self.scheduled_notif.refresh_from_db()
+        self.assertTrue(self.scheduled_notif.in_progress)
+
+        self.buffer.flush()
+
+        self.assertEqual(NotificatieResponse.objects.get().response_status, 204)
+        self.assertFalse(ScheduledNotification.objects.exists())
+        self.notificatie.refresh_from_db()
+        self.assertEqual(self.notificatie.delivered_count, 1)
+        self.assertEqual(self.notificatie.pending_count, 0)
+
+    def test_delivered_notification_is_kept_if_buffer_is_lost(self):
+        with requests_mock.Mocker() as m:
+            m.post(self.abonnement.callback_url, status_code=204)
+            send_to_sub.run(self.scheduled_notif.id, {})
+
+        # the worker is killed before the buffer is flushed, the scheduled
+        # notification is delivered again once it is considered stuck
+        now = timezone.now() + timedelta(minutes=10)
+        claimed = _claim_scheduled_notifications(10, now, now - timedelta(minutes=5))
+
+        self.assertEqual(claimed, [self.scheduled_notif])
+
+    def test_failed_notification_is_rescheduled_immediately(self):
+        with requests_mock.Mocker() as m:
+            m.post(self.abonnement.callback_url, status_code=500)
+            send_to_sub.run(self.scheduled_notif.id, {})
+
+        self.scheduled_notif.refresh_from_db()
+        self.assertFalse(self.scheduled_notif.in_progress)
+        self.assertEqual(self.scheduled_notif.task_attempt, 1)
+        self.assertFalse(NotificatieResponse.objects.exists())
+
+        self.buffer.flush()
+
+        self.assertEqual(NotificatieResponse.objects.get().response_status, 500)
+        self.assertTrue(ScheduledNotification.objects.exists())
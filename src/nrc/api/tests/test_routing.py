@@ -0,0 +1,170 @@
+from django.test import TestCase
+
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    CloudEventFilterFactory,
+    CloudEventFilterGroupFactory,
+    FilterFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+)
+
+from ..routing import (
+    CloudEventRoutingIndex,
+    NotificationRoutingIndex,
+    SubstringMatcher,
+    get_routing_version,
+    invalidate_routing,
+    notification_routing_index,
+)
+
+
+class NotificationRoutingIndexTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.kanaal = KanaalFactory.create(
+            naam="zaken", filters=["bron", "object_type", "vertrouwelijkheidaanduiding"]
+        )
+
+    def test_get_subs(self):
+        no_filters = FilterGroupFactory.create(kanaal=self.kanaal)
+        wildcard = FilterGroupFactory.create(kanaal=self.kanaal)
+        FilterFactory.create(filter_group=wildcard, key="bron", value="*")
+        matching = FilterGroupFactory.create(kanaal=self.kanaal)
+        FilterFactory.create(filter_group=matching, key="bron", value="1234")
+        FilterFactory.create(filter_group=matching, key="object_type", value="zaak")
+        other_value = FilterGroupFactory.create(kanaal=self.kanaal)
+        FilterFactory.create(filter_group=other_value, key="bron", value="1234")
+        FilterFactory.create(filter_group=other_value, key="object_type", value="other")
+        missing_kenmerk = FilterGroupFactory.create(kanaal=self.kanaal)
+        FilterFactory.create(
+            filter_group=missing_kenmerk,
+            key="vertrouwelijkheidaanduiding",
+            value="geheim",
+        )
+        other_kanaal = FilterGroupFactory.create()
+
+        index = NotificationRoutingIndex.build()
+
+        subs = index.get_subs("zaken", {"bron": "1234", "objectType": "zaak"})
+
+        self.assertEqual(
+            subs,
+            {
+                no_filters.abonnement,
+                wildcard.abonnement,
+                matching.abonnement,
+                # filters for kenmerken that are not in the message are ignored
+                missing_kenmerk.abonnement,
+            },
+        )
+        self.assertEqual(
+            index.get_subs(other_kanaal.kanaal.naam, {}), {other_kanaal.abonnement}
+        )
+        self.assertEqual(index.get_subs("unknown", {}), set())
+
+    def test_matches_filter_group_match_pattern(self):
+        msg_filters = {"bron": "1234", "objectType": "zaak"}
+        for filters in (
+            {},
+            {"bron": "1234"},
+            {"bron": "*", "object_type": "zaak"},
+            {"bron": "4321", "object_type": "zaak"},
+            {"object_type": "zaak", "vertrouwelijkheidaanduiding": "geheim"},
+        ):
+            with self.subTest(filters=filters):
+                group = FilterGroupFactory.create(kanaal=self.kanaal)
+                for key, value in filters.items():
+                    FilterFactory.create(filter_group=group, key=key, value=value)
+
+                subs = NotificationRoutingIndex.build().get_subs("zaken", msg_filters)
+
+                self.assertEqual(
+                    group.abonnement in subs, group.match_pattern(msg_filters)
+                )
+
+    def test_index_is_reused_until_invalidated(self):
+        FilterGroupFactory.create(kanaal=self.kanaal)
+
+        index = notification_routing_index.get()
+
+        with self.assertNumQueries(0):
+            self.assertIs(notification_routing_index.get(), index)
+
+        invalidate_routing()
+
+        self.assertIsNot(notification_routing_index.get(), index)
+
+    def test_subscription_changes_invalidate_index(self):
+        abonnement = AbonnementFactory.create()
+        group = FilterGroupFactory.create(kanaal=self.kanaal, abonnement=abonnement)
+
+        changes = {
+            "create filter": lambda: FilterFactory.create(filter_group=group),
+            "update filter group": lambda: group.save(),
+            "update abonnement": lambda: abonnement.save(),
+            "update kanaal": lambda: self.kanaal.save(),
+            "delete filters": lambda: group.filters.all().delete(),
+            "delete filter group": lambda: group.delete(),
+        }
+        for description, change in changes.items():
+            with self.subTest(description):
+                version = get_routing_version()
+
+                change()
+
+                self.assertNotEqual(get_routing_version(), version)
+
+
+class SubstringMatcherTests(TestCase):
+    def test_find(self):
+        patterns = ["nl.overheid", "zaak", "zaken.zaak", "created", "he", "she", "hers"]
+        matcher = SubstringMatcher(patterns)
+
+        for text in (
+            "nl.overheid.zaken.zaak.created",
+            "nl.overheid.zaken.status.created",
+            "ushers",
+            "",
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(
+                    matcher.find(text),
+                    {pattern for pattern in patterns if pattern in text},
+                )
+
+
+class CloudEventRoutingIndexTests(TestCase):
+    def test_get_subs(self):
+        prefix = CloudEventFilterGroupFactory.create(
+            type_substring="nl.overheid.zaken", abonnement__send_cloudevents=True
+        )
+        suffix = CloudEventFilterGroupFactory.create(
+            type_substring="zaak.created", abonnement__send_cloudevents=True
+        )
+        filtered = CloudEventFilterGroupFactory.create(
+            type_substring="nl.overheid", abonnement__send_cloudevents=True
+        )
+        CloudEventFilterFactory.create(
+            cloud_event_filter_group=filtered, key="zaaktype", value="1234"
+        )
+        CloudEventFilterGroupFactory.create(
+            type_substring="nl.overheid", abonnement__send_cloudevents=False
+        )
+        CloudEventFilterGroupFactory.create(
+            type_substring="nl.overheid.zaken.status", abonnement__send_cloudevents=True
+        )
+
+        index = CloudEventRoutingIndex.build()
+
+        self.assertEqual(
+            index.get_subs("nl.overheid.zaken.zaak.created", {"zaaktype": "1234"}),
+            {prefix.abonnement, suffix.abonnement, filtered.abonnement},
+        )
+        self.assertEqual(
+            index.get_subs("nl.overheid.zaken.zaak.created", {"zaaktype": "4321"}),
+            {prefix.abonnement, suffix.abonnement},
+        )
+        self.assertEqual(index.get_subs("nl.overheid", {}), {filtered.abonnement})
+        self.assertEqual(index.get_subs("com.example", {}), set())
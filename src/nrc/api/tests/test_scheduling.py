@@ -1,8 +1,10 @@
+import threading
 from collections import deque
 from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
-from django.test import override_settings
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
 from django.utils import timezone
 
 from freezegun import freeze_time
@@ -104,3 +106,49 @@ class TestScheduling(APITestCase):
             mock_group.side_effect = capture_group
             execute_notifications.run()
             self.assertEqual(mock_send_to_sub.s.call_count, 0)
+
+
+def capture_group(generator):
+    deque(generator, 0)  # this consumes the generator, triggering .s() calls
+    return MagicMock()
+
+
+class TestConcurrentScheduling(TransactionTestCase):
+    def test_locked_notifications_are_skipped(self):
+        sub = AbonnementFactory.create()
+        a, b = [
+            ScheduledNotification.objects.create(
+                in_progress=False,
+                execute_after=timezone.now() - timedelta(seconds=5),
+                task_args={},
+                attempt=1,
+                type=NotificationTypes.notification,
+                sub=sub,
+            )
+            for _ in range(2)
+        ]
+
+        def run_concurrently():
+            try:
+                execute_notifications.run()
+            finally:
+                connection.close()
+
+        with (
+            patch("nrc.api.tasks.group", side_effect=capture_group),
+            patch("nrc.api.tasks.send_to_sub") as mock_send_to_sub,
+        ):
+            # a concurrent claim holds the lock on `a`
+            with transaction.atomic():
+                list(ScheduledNotification.objects.select_for_update().filter(id=a.id))
+
+                thread = threading.Thread(target=run_concurrently)
+                thread.start()
+                thread.join()
+
+        scheduled_notif_ids = [
+            call.args[0] for call in mock_send_to_sub.s.call_args_list
+        ]
+        self.assertEqual(scheduled_notif_ids, [b.id])
+        a.refresh_from_db()
+        self.assertFalse(a.in_progress)
@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+import requests_mock
+from rest_framework import status
+from rest_framework.test import APITestCase
+from vng_api_common.tests import JWTAuthMixin, reverse
+
+from nrc.datamodel.models import (
+    CloudEvent,
+    Notificatie,
+    NotificationTypes,
+    Payload,
+    ScheduledNotification,
+)
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    CloudEventFactory,
+    CloudEventResponseFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+    NotificatieFactory,
+    NotificatieResponseFactory,
+)
+
+from ..summaries import update_delivery_summaries
+from ..tasks import execute_notifications
+
+
+class UpdateDeliverySummariesTests(TestCase):
+    def test_latest_attempt_per_subscription(self):
+        notificatie = NotificatieFactory.create()
+        retried, failed, errored = AbonnementFactory.create_batch(3)
+        NotificatieResponseFactory.create(
+            notificatie=notificatie, abonnement=retried, attempt=1, response_status=500
+        )
+        NotificatieResponseFactory.create(
+            notificatie=notificatie, abonnement=retried, attempt=2, response_status=204
+        )
+        NotificatieResponseFactory.create(
+            notificatie=notificatie, abonnement=failed, response_status=404
+        )
+        NotificatieResponseFactory.create(
+            notificatie=notificatie,
+            abonnement=errored,
+            response_status=None,
+            exception="Connection refused",
+        )
+
+        with self.assertNumQueries(6):
+            update_delivery_summaries(Notificatie, [notificatie.pk])
+
+        notificatie.refresh_from_db()
+        self.assertEqual(notificatie.delivered_count, 1)
+        self.assertEqual(notificatie.failed_count, 2)
+        self.assertEqual(notificatie.pending_count, 0)
+        self.assertIsNone(notificatie.last_attempt_at)
+
+    def test_pending_deliveries(self):
+        cloudevent = CloudEventFactory.create()
+        attempted, pending = AbonnementFactory.create_batch(2)
+        payload = Payload.objects.create(type=NotificationTypes.cloudevent, data={})
+        for sub in (attempted, pending):
+            ScheduledNotification.objects.create(
+                type=NotificationTypes.cloudevent,
+                payload=payload,
+                cloudevent=cloudevent,
+                sub=sub,
+                attempt=1,
+            )
+        # the delivery failed and is retried
+        CloudEventResponseFactory.create(
+            cloudevent=cloudevent, abonnement=attempted, response_status=503
+        )
+
+        update_delivery_summaries(CloudEvent, [cloudevent.pk])
+
+        cloudevent.refresh_from_db()
+        self.assertEqual(cloudevent.delivered_count, 0)
+        self.assertEqual(cloudevent.failed_count, 1)
+        self.assertEqual(cloudevent.pending_count, 1)
+
+    def test_no_messages(self):
+        with self.assertNumQueries(0):
+            update_delivery_summaries(Notificatie, [])
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, LOG_NOTIFICATIONS_IN_DB=True)
+class DeliverySummaryTests(JWTAuthMixin, APITestCase):
+    heeft_alle_autorisaties = True
+
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+
+        kanaal = KanaalFactory.create(naam="zaken")
+        self.delivered = AbonnementFactory.create(
+            callback_url="https://example.com/delivered"
+        )
+        self.failed = AbonnementFactory.create(
+            callback_url="https://example.com/failed"
+        )
+        for sub in (self.delivered, self.failed):
+            FilterGroupFactory.create(kanaal=kanaal, abonnement=sub)
+
+    def test_summary_of_published_notification(self):
+        response = self.client.post(
+            reverse("notificaties-list"),
+            {
+                "kanaal": "zaken",
+                "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+                "resource": "status",
+                "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22",
+                "actie": "create",
+                "aanmaakdatum": "2025-01-01T12:00:00Z",
+                "kenmerken": {},
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        notificatie = Notificatie.objects.get()
+        self.assertEqual(notificatie.pending_count, 2)
+        self.assertIsNone(notificatie.last_attempt_at)
+
+        with requests_mock.Mocker() as m:
+            m.post(self.delivered.callback_url, status_code=204)
+            m.post(self.failed.callback_url, status_code=500)
+
+            execute_notifications.run()
+
+        notificatie.refresh_from_db()
+        self.assertEqual(notificatie.delivered_count, 1)
+        self.assertEqual(notificatie.failed_count, 1)
+        self.assertEqual(notificatie.pending_count, 0)
+        self.assertIsNotNone(notificatie.last_attempt_at)
@@ -3,6 +3,7 @@ import random
 import string
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import override_settings
 from django.utils import timezone
 from django.utils.translation import gettext as _
@@ -29,6 +30,12 @@ from ..types import CloudEventKwargs, SendNotificationTaskKwargs
 @temp_private_root()
 @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
 class NotifCeleryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        # OAuth2 access tokens are cached
+        self.addCleanup(cache.clear)
+
     def test_notificatie_invalid_response_retry(self):
         """
         Verify that a ScheduledNotification is created when the sending of the notification didn't
@@ -101,6 +108,38 @@ class NotifCeleryTests(APITestCase):
         self.assertEqual(scheduled_notif.in_progress, False)
         self.assertEqual(scheduled_notif.sub, abon)
 
+    def test_notificatie_unexpected_error_is_recorded(self):
+        abon = AbonnementFactory.create()
+        notif = NotificatieFactory.create()
+        ScheduledNotification.objects.create(
+            type=NotificationTypes.notification,
+            task_args={
+                "kanaal": "zaken",
+                "source": "zaken.maykin.nl",
+                "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+                "resource": "status",
+                "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+                "actie": "create",
+                "aanmaakdatum": "2018-01-01T17:00:00Z",
+                "kenmerken": {},
+            },
+            execute_after=timezone.now(),
+            notificatie=notif,
+            attempt=1,
+            sub=abon,
+        )
+
+        with patch("nrc.api.tasks.get_client", side_effect=ValueError("invalid")):
+            execute_notifications.run()
+
+        notif_response = NotificatieResponse.objects.get()
+        self.assertIsNone(notif_response.response_status)
+        self.assertEqual(notif_response.exception, "invalid")
+
+        scheduled_notif = ScheduledNotification.objects.get()
+        self.assertEqual(scheduled_notif.task_attempt, 1)
+        self.assertFalse(scheduled_notif.in_progress)
+
     def test_notificatie_request_exception_retry(self):
         """
         Verify that a ScheduledNotification is created when the sending of the notification didn't
@@ -572,6 +611,12 @@ class NotifCeleryTests(APITestCase):
 @temp_private_root()
 @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
 class CloudEventCeleryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        # OAuth2 access tokens are cached
+        self.addCleanup(cache.clear)
+
     def test_cloudevent_invalid_response_retry(self):
         """
         Verify that a ScheduledNotification is called when the sending of the cloudevent didn't
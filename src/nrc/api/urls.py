@@ -16,6 +16,7 @@ from .viewsets import (
     CloudEventViewSet,
     KanaalViewSet,
     NotificatieAPIView,
+    NotificatieBulkAPIView,
 )
 
 router = routers.DefaultRouter()
@@ -60,6 +61,11 @@ urlpatterns = [
                     NotificatieAPIView.as_view(),
                     name="notificaties-list",
                 ),
+                path(
+                    "notificaties/bulk",
+                    NotificatieBulkAPIView.as_view(),
+                    name="notificaties-bulk",
+                ),
                 path("", include(router.urls)),
                 path("", include("vng_api_common.notifications.api.urls")),
             ]
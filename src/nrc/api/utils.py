@@ -20,3 +20,11 @@ class CloudEventJSONParser(JSONParser):
 
 class CloudEventJSONRenderer(JSONRenderer):
     media_type = "application/cloudevents+json"
+
+
+class CloudEventBatchJSONParser(JSONParser):
+    media_type = "application/cloudevents-batch+json"
+
+
+class CloudEventBatchJSONRenderer(JSONRenderer):
+    media_type = "application/cloudevents-batch+json"
@@ -6,6 +6,21 @@ from django.utils.translation import gettext_lazy as _
 import requests
 from rest_framework import serializers
 
+# sent to check whether a callback URL can receive notifications
+TEST_NOTIFICATION = {
+    "kanaal": "test",
+    "hoofdObject": "http://some.hoofdobject.nl/",
+    "resource": "some_resource",
+    "resourceUrl": "http://some.resource.nl/",
+    "actie": "create",
+    "aanmaakdatum": "2019-01-01T12:00:00Z",
+    "kenmerken": {},
+}
+
+
+def is_reachable(response_status: int) -> bool:
+    return 200 <= response_status <= 209
+
 
 class CallbackURLValidator:
     requires_context = True
@@ -25,19 +40,11 @@ class CallbackURLValidator:
 
         response = requests.post(
             url,
-            json={
-                "kanaal": "test",
-                "hoofdObject": "http://some.hoofdobject.nl/",
-                "resource": "some_resource",
-                "resourceUrl": "http://some.resource.nl/",
-                "actie": "create",
-                "aanmaakdatum": "2019-01-01T12:00:00Z",
-                "kenmerken": {},
-            },
+            json=TEST_NOTIFICATION,
             headers={"AUTHORIZATION": auth},
         )
 
-        if not (200 <= response.status_code <= 209):
+        if not is_reachable(response.status_code):
             raise serializers.ValidationError(self.message, code=self.code)
 
 
@@ -59,15 +66,7 @@ class CallbackURLAuthValidator:
 
         response = requests.post(
             url,
-            json={
-                "kanaal": "test",
-                "hoofdObject": "http://some.hoofdobject.nl/",
-                "resource": "some_resource",
-                "resourceUrl": "http://some.resource.nl/",
-                "actie": "create",
-                "aanmaakdatum": "2019-01-01T12:00:00Z",
-                "kenmerken": {},
-            },
+            json=TEST_NOTIFICATION,
         )
 
         if response.status_code != 403 and response.status_code != 401:
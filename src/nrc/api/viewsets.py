@@ -1,11 +1,21 @@
+from django.conf import settings
+from django.db.models import Prefetch
+
 import structlog
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import mixins, status, views, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from vng_api_common.permissions import AuthScopesRequired, ClientIdRequired
 from vng_api_common.viewsets import CheckQueryParamsMixin
 
-from nrc.datamodel.models import Abonnement, CloudEvent, Kanaal
+from nrc.datamodel.models import (
+    Abonnement,
+    CloudEvent,
+    FilterGroup,
+    Kanaal,
+    NotificationTypes,
+)
 from nrc.utils.help_text import mark_experimental
 
 from .filters import KanaalFilter
@@ -14,6 +24,7 @@ from .metrics import (
     kanaal_create_counter,
     notificaties_publish_counter,
 )
+from .pagination import OptionalPageNumberPagination
 from .scopes import (
     SCOPE_NOTIFICATIES_CONSUMEREN,
     SCOPE_NOTIFICATIES_PUBLICEREN,
@@ -24,7 +35,13 @@ from .serializers import (
     KanaalSerializer,
     MessageSerializer,
 )
-from .utils import CloudEventJSONParser, CloudEventJSONRenderer
+from .tasks import receive_messages
+from .utils import (
+    CloudEventBatchJSONParser,
+    CloudEventBatchJSONRenderer,
+    CloudEventJSONParser,
+    CloudEventJSONRenderer,
+)
 
 logger = structlog.stdlib.get_logger(__name__)
 
@@ -47,8 +64,17 @@ class AbonnementViewSet(CheckQueryParamsMixin, viewsets.ModelViewSet):
     ontvangen die op dat KANAAL gepubliceerd worden.
     """
 
-    queryset = Abonnement.objects.all()
+    queryset = Abonnement.objects.order_by("pk").prefetch_related(
+        Prefetch(
+            "filter_groups",
+            queryset=FilterGroup.objects.select_related("kanaal").prefetch_related(
+                "filters"
+            ),
+        ),
+        "cloudevent_filtergroups__filters",
+    )
     serializer_class = AbonnementSerializer
+    pagination_class = OptionalPageNumberPagination
     lookup_field = "uuid"
     permission_classes = (AuthScopesRequired, ClientIdRequired)
     required_scopes = {
@@ -132,9 +158,12 @@ class NotificatieAPIView(views.APIView):
         if serializer.is_valid():
             data = serializer.validated_data
 
-            # post to message queue
-            # send to abonnement
-            serializer.save()
+            if settings.NOTIFICATION_PUBLISH_MODE == "async":
+                # routed to the subscriptions by a Celery task
+                receive_messages(NotificationTypes.notification, [request.data])
+            else:
+                # send to abonnement
+                serializer.save()
 
             notificaties_publish_counter.add(1)
 
@@ -142,11 +171,92 @@ class NotificatieAPIView(views.APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@extend_schema(
+    summary=mark_experimental("Publiceer meerdere notificaties."),
+    request=MessageSerializer(many=True),
+    responses={201: MessageSerializer(many=True)},
+)
+class NotificatieBulkAPIView(NotificatieAPIView):
+    """
+    Publiceren van meerdere NOTIFICATIEs tegelijk.
+
+    De NOTIFICATIEs worden samen gevalideerd en gepubliceerd. Als een van de
+    NOTIFICATIEs ongeldig is wordt geen enkele NOTIFICATIE gepubliceerd en bevat
+    het antwoord de validatiefouten per NOTIFICATIE, in de volgorde van het verzoek.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.NOTIFICATION_PUBLISH_MAX_BATCH_SIZE,
+        )
+        if serializer.is_valid():
+            data = serializer.validated_data
+
+            if settings.NOTIFICATION_PUBLISH_MODE == "async":
+                # routed to the subscriptions by a Celery task
+                receive_messages(NotificationTypes.notification, request.data)
+            else:
+                # send to abonnementen
+                serializer.save()
+
+            notificaties_publish_counter.add(len(data))
+
+            return Response(data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 @extend_schema(summary=mark_experimental("Publiceer een cloud event"))
 class CloudEventViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
-    required_scopes = {"create": SCOPE_NOTIFICATIES_PUBLICEREN}
+    required_scopes = {
+        "create": SCOPE_NOTIFICATIES_PUBLICEREN,
+        "batch": SCOPE_NOTIFICATIES_PUBLICEREN,
+    }
     serializer_class = CloudEventSerializer
     queryset = CloudEvent.objects.all()
 
     parser_classes = (CloudEventJSONParser,)
     renderer_classes = (CloudEventJSONRenderer,)
+
+    def perform_create(self, serializer):
+        if settings.NOTIFICATION_PUBLISH_MODE == "async":
+            # routed to the subscriptions by a Celery task
+            receive_messages(NotificationTypes.cloudevent, [serializer.initial_data])
+        else:
+            serializer.save()
+
+    @extend_schema(
+        summary=mark_experimental("Publiceer een batch cloud events"),
+        description=(
+            "De cloud events worden samen gevalideerd en gepubliceerd. Als een van de "
+            "cloud events ongeldig is wordt geen enkel cloud event gepubliceerd en "
+            "bevat het antwoord de validatiefouten per cloud event, in de volgorde "
+            "van het verzoek."
+        ),
+        request=CloudEventSerializer(many=True),
+        responses={201: CloudEventSerializer(many=True)},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=(CloudEventBatchJSONParser,),
+        renderer_classes=(CloudEventBatchJSONRenderer,),
+    )
+    def batch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.NOTIFICATION_PUBLISH_MAX_BATCH_SIZE,
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        if settings.NOTIFICATION_PUBLISH_MODE == "async":
+            # routed to the subscriptions by a Celery task
+            receive_messages(NotificationTypes.cloudevent, serializer.initial_data)
+        else:
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
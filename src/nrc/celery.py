@@ -6,7 +6,12 @@ from django.conf import settings
 
 import structlog
 from celery import Celery, bootsteps
-from celery.signals import setup_logging, worker_ready, worker_shutdown
+from celery.signals import (
+    setup_logging,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
 from django_structlog.celery.steps import DjangoStructLogInitStep
 
 from nrc.setup import setup_env
@@ -146,6 +151,15 @@ def worker_ready(**_):
 @worker_shutdown.connect
 def worker_shutdown(**_):
     READINESS_FILE.unlink(missing_ok=True)
+    flush_response_buffer()
+
+
+@worker_process_shutdown.connect
+def flush_response_buffer(**_):
+    # write the delivery results that are still buffered by this process
+    from nrc.api.responses import response_buffer
+
+    response_buffer.flush()
 
 
 app.steps["worker"].add(LivenessProbe)
@@ -24,3 +24,10 @@ CACHES = {
 mute_logging(LOGGING)
 
 TEST_CALLBACK_AUTH = False
+
+# write delivery results immediately, so tests can assert them (the default buffering
+# is tested in `nrc.api.tests.test_responses`)
+NOTIFICATION_RESPONSE_BUFFER_SIZE = 1
+
+# rolling back the test database does not invalidate cached authorizations
+API_AUTH_CACHE_TIMEOUT = 0
@@ -37,7 +37,7 @@ INSTALLED_APPS = INSTALLED_APPS + [
 
 MIDDLEWARE.insert(
     MIDDLEWARE.index("django.contrib.auth.middleware.AuthenticationMiddleware") + 1,
-    "vng_api_common.authorizations.middleware.AuthMiddleware",
+    "nrc.api.auth.AuthMiddleware",
 )
 MIDDLEWARE += ["vng_api_common.middleware.APIVersionHeaderMiddleware"]
 
@@ -67,6 +67,107 @@ NOTIFICATION_REQUESTS_TIMEOUT = config(
     ),
 )
 
+NOTIFICATION_CLIENT_CACHE_SIZE = config(
+    "NOTIFICATION_CLIENT_CACHE_SIZE",
+    default=200,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of HTTP clients (one per subscription) that are kept "
+            "per worker process to reuse connections when delivering notifications."
+        ),
+        group="Notifications",
+    ),
+)
+
+NOTIFICATION_CLIENT_MAX_IDLE = config(
+    "NOTIFICATION_CLIENT_MAX_IDLE",
+    default=300,
+    documentation=DocumentationParams(
+        help_text=(
+            "The number of seconds after which an unused HTTP client of a subscription "
+            "is dropped (and its connections are closed)."
+        ),
+        group="Notifications",
+    ),
+)
+
+NOTIFICATION_CLIENT_POOL_MAXSIZE = config(
+    "NOTIFICATION_CLIENT_POOL_MAXSIZE",
+    default=10,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of connections that are kept open per HTTP client "
+            "of a subscription."
+        ),
+        group="Notifications",
+    ),
+)
+
+NOTIFICATION_RESPONSE_BUFFER_SIZE = config(
+    "NOTIFICATION_RESPONSE_BUFFER_SIZE",
+    default=100,
+    documentation=DocumentationParams(
+        help_text=(
+            "The number of delivery results that are collected by a worker before "
+            "they are written to the database. Use 1 to write every result "
+            "immediately."
+        ),
+        group="Notifications",
+    ),
+)
+
+NOTIFICATION_RESPONSE_FLUSH_INTERVAL = config(
+    "NOTIFICATION_RESPONSE_FLUSH_INTERVAL",
+    default=5,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of seconds that delivery results are kept by a worker "
+            "before they are written to the database."
+        ),
+        group="Notifications",
+    ),
+)
+
+
+NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD = config(
+    "NOTIFICATION_CIRCUIT_BREAKER_THRESHOLD",
+    default=10,
+    documentation=DocumentationParams(
+        help_text=(
+            "The number of consecutive failed deliveries to a subscription after "
+            "which its notifications are deferred without sending requests. A "
+            "deferral counts as a failed delivery attempt, so the notifications still "
+            "expire after the configured number of retries. Use 0 to disable the "
+            "circuit breaker."
+        ),
+        group="Notifications",
+    ),
+)
+
+NOTIFICATION_CIRCUIT_BREAKER_TIMEOUT = config(
+    "NOTIFICATION_CIRCUIT_BREAKER_TIMEOUT",
+    default=60,
+    documentation=DocumentationParams(
+        help_text=(
+            "The number of seconds that notifications to a failing subscription are "
+            "deferred before a single delivery is tried again. This is doubled every "
+            "time that delivery fails as well."
+        ),
+        group="Notifications",
+    ),
+)
+
+NOTIFICATION_CIRCUIT_BREAKER_MAX_TIMEOUT = config(
+    "NOTIFICATION_CIRCUIT_BREAKER_MAX_TIMEOUT",
+    default=3600,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of seconds that notifications to a failing "
+            "subscription are deferred."
+        ),
+        group="Notifications",
+    ),
+)
 
 CLOUDEVENT_SPECVERSION = "1.0"
 
@@ -118,6 +219,19 @@ NOTIFICATION_SEC_INTERVAL = max(
     ),
 )
 
+NOTIFICATION_DISPATCHER_ENABLED = config(
+    "NOTIFICATION_DISPATCHER_ENABLED",
+    default=False,
+    documentation=DocumentationParams(
+        help_text=(
+            "Notify the dispatcher (started with the ``run_dispatcher`` management "
+            "command) when notifications are scheduled, so their delivery is started "
+            "right away instead of by the next ``execute_notifications`` task."
+        ),
+        group="Celery",
+    ),
+)
+
 NOTIFICATION_LIMIT = config(
     "NOTIFICATION_LIMIT",
     default=500,
@@ -127,6 +241,113 @@ NOTIFICATION_LIMIT = config(
     ),
 )
 
+NOTIFICATION_PUBLISH_MODE = config(
+    "NOTIFICATION_PUBLISH_MODE",
+    default="sync",
+    documentation=DocumentationParams(
+        help_text=(
+            "How published notifications and cloudevents are handled. With ``sync`` "
+            "they are routed to the subscriptions during the API request, with "
+            "``async`` they are only validated and stored during the request and "
+            "routed by a Celery task, so the response time does not depend on the "
+            "number of subscriptions."
+        ),
+        group="Celery",
+    ),
+)
+
+NOTIFICATION_PUBLISH_MAX_BATCH_SIZE = config(
+    "NOTIFICATION_PUBLISH_MAX_BATCH_SIZE",
+    default=1000,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of notifications or cloudevents that can be "
+            "published in a single request to the bulk endpoints."
+        ),
+        group="Notifications",
+    ),
+)
+
+NOTIFICATION_ROUTING_BATCH_SIZE = config(
+    "NOTIFICATION_ROUTING_BATCH_SIZE",
+    default=100,
+    documentation=DocumentationParams(
+        help_text=(
+            "The number of received messages that are routed per transaction if "
+            "``NOTIFICATION_PUBLISH_MODE`` is ``async``."
+        ),
+        group="Celery",
+    ),
+)
+
+NOTIFICATION_DELIVERY_MODE = config(
+    "NOTIFICATION_DELIVERY_MODE",
+    default="tasks",
+    documentation=DocumentationParams(
+        help_text=(
+            "How scheduled notifications are delivered. With ``tasks`` a Celery task "
+            "is started for every notification, with ``bulk`` a Celery task is started "
+            "per ``NOTIFICATION_BULK_BATCH_SIZE`` notifications, which are delivered "
+            "concurrently. The requests of the ``bulk`` mode are not logged as "
+            "outgoing requests (``LOG_REQUESTS``), only in the application logs."
+        ),
+        group="Celery",
+    ),
+)
+
+NOTIFICATION_BULK_BATCH_SIZE = config(
+    "NOTIFICATION_BULK_BATCH_SIZE",
+    default=200,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of notifications that are delivered by one Celery "
+            "task if ``NOTIFICATION_DELIVERY_MODE`` is ``bulk``."
+        ),
+        group="Celery",
+    ),
+)
+
+NOTIFICATION_BULK_HOST_CONCURRENCY = config(
+    "NOTIFICATION_BULK_HOST_CONCURRENCY",
+    default=20,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of concurrent requests to the same host per Celery "
+            "task if ``NOTIFICATION_DELIVERY_MODE`` is ``bulk``. Keep "
+            "``NOTIFICATION_BULK_BATCH_SIZE / NOTIFICATION_BULK_HOST_CONCURRENCY * "
+            "NOTIFICATION_REQUESTS_TIMEOUT`` below ``CELERY_TASK_SOFT_TIME_LIMIT``."
+        ),
+        group="Celery",
+    ),
+)
+
+NOTIFICATION_RESEND_CHUNK_SIZE = config(
+    "NOTIFICATION_RESEND_CHUNK_SIZE",
+    default=500,
+    documentation=DocumentationParams(
+        help_text=(
+            "The number of notifications or cloudevents that are resent per "
+            "transaction by the resend actions of the admin."
+        ),
+        group="Celery",
+    ),
+)
+
+NOTIFICATION_CALLBACK_CHECK_CONCURRENCY = config(
+    "NOTIFICATION_CALLBACK_CHECK_CONCURRENCY",
+    default=20,
+    documentation=DocumentationParams(
+        help_text=(
+            "The maximum number of concurrent requests when the callback URLs of the "
+            "subscriptions are checked from the admin. The check takes about "
+            "``number of callback URLs / NOTIFICATION_CALLBACK_CHECK_CONCURRENCY * "
+            "NOTIFICATION_REQUESTS_TIMEOUT`` seconds at most, keep it below "
+            "``CELERY_TASK_SOFT_TIME_LIMIT``."
+        ),
+        group="Celery",
+    ),
+)
+
 
 CELERY_REDIS_SOCKET_TIMEOUT = config(
     "CELERY_REDIS_SOCKET_TIMEOUT",
@@ -159,7 +380,22 @@ CELERY_BEAT_SCHEDULE = {
             - 1,  # added for when worker is offline and queue gets filled with tasks
         },
     },
+    "clean-payloads": {
+        "task": "nrc.api.tasks.clean_payloads",
+        "schedule": crontab(minute=0),
+    },
+    "resume-resend-jobs": {
+        "task": "nrc.api.tasks.resume_resend_jobs",
+        "schedule": crontab(minute="*/5"),
+    },
 }
+if NOTIFICATION_PUBLISH_MODE == "async":
+    # routes the received messages for which the task was lost
+    CELERY_BEAT_SCHEDULE["route-received-messages"] = {
+        "task": "nrc.api.tasks.route_received_messages",
+        "schedule": timedelta(seconds=NOTIFICATION_SEC_INTERVAL),
+        "options": {"expires": NOTIFICATION_SEC_INTERVAL - 1},
+    }
 CELERY_RESULT_EXPIRES = config(
     "CELERY_RESULT_EXPIRES",
     default=3600,
@@ -280,6 +516,18 @@ JWT_EXPIRY = config(
     ),
 )
 
+API_AUTH_CACHE_TIMEOUT = config(
+    "API_AUTH_CACHE_TIMEOUT",
+    default=300,
+    documentation=DocumentationParams(
+        help_text=(
+            "the number of seconds that verified JWTs and the scopes of API clients "
+            "are cached. Changes to JWT secrets, applicaties and autorisaties are "
+            "applied immediately. Use 0 to disable the cache."
+        )
+    ),
+)
+
 #
 # Django-Admin-Index
 #
@@ -1,17 +1,19 @@
+from functools import partial
+
 from django.contrib import admin, messages
-from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db import transaction
+from django.db.models import Q
 from django.http import HttpResponseRedirect
 from django.urls import path, reverse
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
-from requests.exceptions import RequestException
-from rest_framework.exceptions import ValidationError
-
+from nrc.api.resend import MAX_SELECTED_MESSAGES, get_stale_jobs
+from nrc.api.tasks import check_callbacks, resend_messages
 from nrc.api.utils import send_cloudevent, send_notification
-from nrc.api.validators import CallbackURLValidator
 
 from .admin_filters import ActionFilter, ResourceFilter, ResultFilter
+from .facets import add_facets
 from .models import (
     Abonnement,
     CloudEvent,
@@ -23,6 +25,9 @@ from .models import (
     Kanaal,
     Notificatie,
     NotificatieResponse,
+    NotificationTypes,
+    ResendJob,
+    ResendJobStatus,
     ScheduledNotification,
 )
 
@@ -85,35 +90,20 @@ class CloudEventFilterGroupInline(admin.TabularInline):
 )
 def check_callback_url_status(modeladmin, request, queryset):
     """
-    Make a request to the callback URLs of all selected Abonnementen and store the results
-    in the session
-
-    Any subsequent executions of this action will remove the previous results from the session
+    Check the callback URLs of the selected Abonnementen in the background (see
+    `nrc.api.callback_checks`).
     """
-    validator = CallbackURLValidator("callback_url", "auth")
-    callback_statuses = {}
-    for obj in queryset.iterator():
-        # Any other Abonnement that has the same callback URL and auth will be skipped
-        # and gets the same status
-        key = str((obj.callback_url, obj.auth))
-        if key in callback_statuses:
-            continue
-
-        try:
-            validator({"callback_url": obj.callback_url, "auth": obj.auth}, None)
-            callback_statuses[key] = True
-        except (ValidationError, RequestException):
-            callback_statuses[key] = False
+    abonnement_ids = list(queryset.values_list("pk", flat=True))
+    transaction.on_commit(partial(check_callbacks.delay, abonnement_ids))
 
     messages.add_message(
         request,
         messages.SUCCESS,
         _(
-            "Retrieve status for selected subscriptions. "
-            "All previous results have been reset."
+            "The status of the callback URLs of the selected subscriptions is checked "
+            "in the background, reload the page to see the results."
         ),
     )
-    request.session["callback_statuses"] = callback_statuses
 
 
 class StatusCodeFilter(admin.SimpleListFilter):
@@ -124,22 +114,13 @@ class StatusCodeFilter(admin.SimpleListFilter):
         return [("true", "Yes"), ("false", "No"), ("unknown", "Unknown")]
 
     def queryset(self, request, queryset):
-        if not self.value():
-            return queryset
-
-        filtered_ids = []
-        if callback_statuses := request.session.get("callback_statuses"):
-            for obj in queryset.iterator():
-                callback_status = callback_statuses.get(
-                    str((obj.callback_url, obj.auth)), None
-                )
-                if self.value() == "true" and callback_status:
-                    filtered_ids.append(obj.id)
-                elif self.value() == "false" and not callback_status:
-                    filtered_ids.append(obj.id)  # noqa SIM114
-                elif self.value() == "unknown" and callback_status is None:
-                    filtered_ids.append(obj.id)
-            return queryset.filter(id__in=filtered_ids)
+        match self.value():
+            case "true":
+                return queryset.filter(callback_check__reachable=True)
+            case "false":
+                return queryset.filter(callback_check__reachable=False)
+            case "unknown":
+                return queryset.filter(callback_check__isnull=True)
         return queryset
 
 
@@ -149,8 +130,10 @@ class AbonnementAdmin(admin.ModelAdmin):
         "uuid",
         "callback_url",
         "get_callback_url_reachable",
+        "get_callback_url_checked_at",
         "get_kanalen_display",
     )
+    list_select_related = ("callback_check",)
     readonly_fields = ("uuid",)
     list_filter = (StatusCodeFilter,)
     inlines = (FilterGroupInline, CloudEventFilterGroupInline)
@@ -167,17 +150,19 @@ class AbonnementAdmin(admin.ModelAdmin):
         "client_certificate",
         "server_certificate",
         "send_cloudevents",
+        "batch_size",
+        "batch_linger",
     )
 
-    def changelist_view(self, request, extra_context=None):
-        # Store the request object to ensure the custom admin field has access to it
-        self._request = request
-        return super().changelist_view(request, extra_context=extra_context)
-
     def check_all_callback_urls(self, request):
-        queryset = Abonnement.objects.all()
-        check_callback_url_status(self, request, queryset)
-        self.message_user(request, _("Checked status of all callback URLs"))
+        transaction.on_commit(check_callbacks.delay)
+        self.message_user(
+            request,
+            _(
+                "The status of all callback URLs is checked in the background, reload "
+                "the page to see the results."
+            ),
+        )
         return HttpResponseRedirect(request.META.get("HTTP_REFERER"))
 
     def get_urls(self):
@@ -191,13 +176,23 @@ class AbonnementAdmin(admin.ModelAdmin):
         ]
         return custom_urls + urls
 
-    @admin.display(description=_("callback URL reachable?"), boolean=True)
+    @admin.display(
+        description=_("callback URL reachable?"),
+        boolean=True,
+        ordering="callback_check__reachable",
+    )
     def get_callback_url_reachable(self, obj):
-        if callback_statuses := self._request.session.get("callback_statuses"):
-            return callback_statuses.get(str((obj.callback_url, obj.auth)), None)
+        if callback_check := getattr(obj, "callback_check", None):
+            return callback_check.reachable
         return None
 
-    get_callback_url_reachable.boolean = True
+    @admin.display(
+        description=_("callback URL checked at"), ordering="callback_check__checked_at"
+    )
+    def get_callback_url_checked_at(self, obj):
+        if callback_check := getattr(obj, "callback_check", None):
+            return callback_check.checked_at
+        return None
 
     @admin.display(description=_("kanalen"))
     def get_kanalen_display(self, obj):
@@ -273,18 +268,65 @@ class NotificatieResponseInline(admin.TabularInline):
     model = NotificatieResponse
 
 
-@admin.action(description=_("Re-send the selected notifications to all subscriptions"))
-def resend_notifications(modeladmin, request, queryset):
-    # Save all the selected notifications via the modeladmin, triggering
-    # the notification mechanism
-    for notification in queryset:
-        send_notification(notification)
+def schedule_resend(
+    request, queryset, type: NotificationTypes, only_failed: bool = False
+) -> None:
+    """
+    Resend the selected messages in the background (see `nrc.api.resend`).
+    """
+    message_ids = list(
+        queryset.order_by("pk").values_list("pk", flat=True)[
+            : MAX_SELECTED_MESSAGES + 1
+        ]
+    )
+    if len(message_ids) > MAX_SELECTED_MESSAGES:
+        messages.add_message(
+            request,
+            messages.ERROR,
+            mark_safe(
+                _(
+                    "At most {max} messages can be resent at once. To resend more "
+                    'messages, <a href="{url}">create a resend job</a> for their time '
+                    "range."
+                ).format(
+                    max=MAX_SELECTED_MESSAGES,
+                    url=reverse("admin:datamodel_resendjob_add"),
+                )
+            ),
+        )
+        return
+
+    job = ResendJob.objects.create(
+        type=type,
+        message_ids=message_ids,
+        only_failed=only_failed,
+    )
+    transaction.on_commit(partial(resend_messages.delay, job.pk))
 
     messages.add_message(
-        request, messages.SUCCESS, _("Selected notifications have been scheduled.")
+        request,
+        messages.SUCCESS,
+        mark_safe(
+            _(
+                "The resend of the selected messages has been scheduled, see "
+                '<a href="{url}">its progress</a>.'
+            ).format(url=reverse("admin:datamodel_resendjob_change", args=(job.pk,)))
+        ),
     )
 
 
+@admin.action(description=_("Re-send the selected notifications to all subscriptions"))
+def resend_notifications(modeladmin, request, queryset):
+    schedule_resend(request, queryset, NotificationTypes.notification)
+
+
+@admin.action(
+    description=_("Re-send the selected notifications to the failed subscriptions")
+)
+def resend_failed_notifications(modeladmin, request, queryset):
+    schedule_resend(request, queryset, NotificationTypes.notification, only_failed=True)
+
+
 @admin.register(Notificatie)
 class NotificatieAdmin(admin.ModelAdmin):
     list_display = (
@@ -292,11 +334,15 @@ class NotificatieAdmin(admin.ModelAdmin):
         "action",
         "resource",
         "result",
+        "delivered_count",
+        "failed_count",
+        "pending_count",
+        "last_attempt_at",
         "created_date",
         "forwarded_msg",
     )
     inlines = (NotificatieResponseInline,)
-    actions = [resend_notifications]
+    actions = [resend_notifications, resend_failed_notifications]
 
     list_filter = (
         "kanaal",
@@ -304,42 +350,24 @@ class NotificatieAdmin(admin.ModelAdmin):
         ResourceFilter,
         ResultFilter,
     )
-    search_fields = (
-        "kanaal__naam",
-        "forwarded_msg",
-    )
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-
-        latest_attempts = (
-            NotificatieResponse.objects.filter(
-                notificatie=OuterRef("pk"),
-            )
-            .order_by("abonnement", "-attempt")
-            .distinct("abonnement")
-            .values("pk")
-            .filter(Q(response_status__lt=200) | Q(response_status__gte=300))
-        )
-
-        qs = qs.annotate(has_failure=Exists(latest_attempts))
-
-        return qs
+    # the message contains the name of the kanaal, searching it uses a trigram index
+    search_fields = ("forwarded_msg",)
 
     @admin.display(
         description=_("Result"),
         boolean=True,
+        ordering="failed_count",
     )
     def result(self, obj):
-        return not obj.has_failure
+        return obj.failed_count == 0
 
-    @admin.display(description=_("Action"))
+    @admin.display(description=_("Action"), ordering="actie")
     def action(self, obj):
-        return obj.forwarded_msg.get("actie")
+        return obj.actie
 
-    @admin.display(description=_("Resource"))
+    @admin.display(description=_("Resource"), ordering="resource")
     def resource(self, obj):
-        return obj.forwarded_msg.get("resource")
+        return obj.resource
 
     def get_inline_instances(self, request, obj=None):
         # Hide the NotificatieResponseInline when creating a Notification
@@ -352,6 +380,7 @@ class NotificatieAdmin(admin.ModelAdmin):
         Given a model instance save it to the database.
         """
         super().save_model(request, obj, form, change)
+        add_facets([obj])
 
         send_notification(obj)
 
@@ -383,14 +412,14 @@ class CloudEventResponseInline(admin.TabularInline):
 
 @admin.action(description=_("Re-send the selected cloudevents to all subscriptions"))
 def resend_cloudevents(modeladmin, request, queryset):
-    # Save all the selected notifications via the modeladmin, triggering
-    # the notification mechanism
-    for cloudevent in queryset:
-        send_cloudevent(cloudevent)
+    schedule_resend(request, queryset, NotificationTypes.cloudevent)
 
-    messages.add_message(
-        request, messages.SUCCESS, _("Selected cloudevents have been scheduled.")
-    )
+
+@admin.action(
+    description=_("Re-send the selected cloudevents to the failed subscriptions")
+)
+def resend_failed_cloudevents(modeladmin, request, queryset):
+    schedule_resend(request, queryset, NotificationTypes.cloudevent, only_failed=True)
 
 
 @admin.register(CloudEvent)
@@ -401,11 +430,16 @@ class CloudEventAdmin(admin.ModelAdmin):
         "type",
         "subject",
         "result",
+        "delivered_count",
+        "failed_count",
+        "pending_count",
+        "last_attempt_at",
     )
 
     list_filter = (
         "type",
         "source",
+        ResultFilter,
     )
     search_fields = (
         "source",
@@ -414,37 +448,15 @@ class CloudEventAdmin(admin.ModelAdmin):
     )
 
     inlines = (CloudEventResponseInline,)
-    actions = [resend_cloudevents]
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        latest_attempts = (
-            CloudEventResponse.objects.filter(cloudevent=OuterRef(OuterRef("pk")))
-            .order_by("abonnement", "-attempt")
-            .distinct("abonnement")
-            .values("pk")
-        )
-
-        failed_attempts = (
-            CloudEventResponse.objects.filter(pk__in=Subquery(latest_attempts))
-            .filter(Q(response_status__lt=200) | Q(response_status__gte=300))
-            .values("pk")
-        )
-
-        qs = qs.annotate(
-            failed_responses_count=Count(
-                "cloudeventresponse",
-                filter=Q(cloudeventresponse__pk__in=Subquery(failed_attempts)),
-            ),
-        )
-        return qs
+    actions = [resend_cloudevents, resend_failed_cloudevents]
 
     @admin.display(
         description=_("Result"),
         boolean=True,
+        ordering="failed_count",
     )
     def result(self, obj):
-        return obj.failed_responses_count == 0
+        return obj.failed_count == 0
 
     def get_inline_instances(self, request, obj=None):
         if obj is None:
@@ -464,3 +476,79 @@ class ScheduledNotificationAdmin(admin.ModelAdmin):
         "execute_after",
         "attempt",
     )
+    raw_id_fields = ("payload",)
+
+
+@admin.action(description=_("Resume the selected failed or interrupted resend jobs"))
+def resume_resend_jobs(modeladmin, request, queryset):
+    resend_job_ids = list(
+        queryset.filter(
+            Q(status=ResendJobStatus.failed) | Q(pk__in=get_stale_jobs())
+        ).values_list("pk", flat=True)
+    )
+    for resend_job_id in resend_job_ids:
+        transaction.on_commit(partial(resend_messages.delay, resend_job_id))
+
+    messages.add_message(
+        request,
+        messages.SUCCESS,
+        _("{count} resend job(s) will be resumed.").format(count=len(resend_job_ids)),
+    )
+
+
+@admin.register(ResendJob)
+class ResendJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "type",
+        "only_failed",
+        "abonnement",
+        "start",
+        "end",
+        "status",
+        "get_progress_display",
+        "scheduled",
+        "finished_at",
+    )
+    list_filter = ("type", "status")
+    raw_id_fields = ("abonnement",)
+    actions = [resume_resend_jobs]
+    # the messages can be selected by time range and/or subscription when the job is
+    # added, the resend actions of the notifications and cloudevents select them
+    add_fields = ("type", "abonnement", "start", "end", "only_failed")
+    fields = (
+        "type",
+        "abonnement",
+        "start",
+        "end",
+        "only_failed",
+        "status",
+        "get_progress_display",
+        "scheduled",
+        "created_at",
+        "updated_at",
+        "finished_at",
+    )
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return self.add_fields
+        return self.fields
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return ()
+        return self.fields
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(partial(resend_messages.delay, obj.pk))
+
+    @admin.display(description=_("progress"))
+    def get_progress_display(self, obj: ResendJob):
+        return _("{processed} of {total} messages").format(
+            processed=obj.processed, total=obj.total
+        )
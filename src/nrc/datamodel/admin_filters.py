@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
+from .facets import get_facets
+
 
 class BaseFilter(admin.SimpleListFilter):
     title = None
@@ -8,8 +10,7 @@ class BaseFilter(admin.SimpleListFilter):
     field_name = None
 
     def lookups(self, request, model_admin):
-        qs = model_admin.get_queryset(request)
-        choices = qs.values_list(self.field_name, flat=True).distinct()
+        choices = get_facets(self.field_name)
         return (
             (
                 choice,
@@ -28,13 +29,13 @@ class BaseFilter(admin.SimpleListFilter):
 class ActionFilter(BaseFilter):
     title = _("action")
     parameter_name = "actie"
-    field_name = "forwarded_msg__actie"
+    field_name = "actie"
 
 
 class ResourceFilter(BaseFilter):
     title = _("resource")
     parameter_name = "resource"
-    field_name = "forwarded_msg__resource"
+    field_name = "resource"
 
 
 class ResultFilter(admin.SimpleListFilter):
@@ -52,6 +53,6 @@ class ResultFilter(admin.SimpleListFilter):
             return queryset
 
         if self.value() == "success":
-            return queryset.filter(has_failure=False)
+            return queryset.filter(failed_count=0)
         elif self.value() == "failure":
-            return queryset.filter(has_failure=True)
+            return queryset.filter(failed_count__gt=0)
@@ -0,0 +1,91 @@
+"""
+The values of the admin filters of the notifications (see `admin_filters`).
+
+Looking up the distinct values of a column of the notification log on every page view
+is slow on large tables, so the values are cached. The cached values are invalidated
+when a notification with a new value is created, and when notifications are deleted.
+
+The values are cached under a version that is incremented (atomically) to invalidate
+them, so a list of values that was looked up concurrently with the invalidation is
+never used. Whether a value is new is tracked per value with `cache.add` (and per
+process, to skip the cache on the publish path for the values that were already seen).
+"""
+
+import hashlib
+import threading
+import time
+from collections.abc import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notificatie
+
+FACET_FIELDS = ("actie", "resource")
+
+# values only disappear when notifications are deleted, the timeout limits how long
+# the values of (concurrently) deleted notifications are shown, and how long a value
+# that reappears after it was deleted is missing
+FACETS_CACHE_TIMEOUT = 60 * 60
+
+FACETS_VERSION_CACHE_KEY = "notificatie_facets:version"
+
+# the values that were seen by this process, with the (monotonic) time they were seen
+_seen_values: dict[tuple[str, str], float] = {}
+_seen_values_lock = threading.Lock()
+
+
+def _get_version() -> int:
+    # not reset to a previous version if the key is evicted
+    return cache.get_or_set(FACETS_VERSION_CACHE_KEY, time.time_ns, timeout=None)
+
+
+def get_facets_cache_key(field: str, version: int) -> str:
+    return f"notificatie_facets:{field}:{version}"
+
+
+def get_facets(field: str) -> list[str]:
+    cache_key = get_facets_cache_key(field, _get_version())
+    if (facets := cache.get(cache_key)) is None:
+        facets = sorted(
+            Notificatie.objects.exclude(**{field: ""})
+            .order_by()
+            .values_list(field, flat=True)
+            .distinct()
+        )
+        cache.set(cache_key, facets, timeout=FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def _is_new_value(field: str, value: str) -> bool:
+    now = time.monotonic()
+    with _seen_values_lock:
+        seen_at = _seen_values.get((field, value))
+        if seen_at is not None and now - seen_at < FACETS_CACHE_TIMEOUT:
+            return False
+        _seen_values[(field, value)] = now
+
+    digest = hashlib.sha256(value.encode()).hexdigest()
+    return cache.add(
+        f"notificatie_facet:{field}:{digest}", True, timeout=FACETS_CACHE_TIMEOUT
+    )
+
+
+def add_facets(notificaties: Iterable[Notificatie]) -> None:
+    values = {
+        (field, value)
+        for notificatie in notificaties
+        for field in FACET_FIELDS
+        if (value := getattr(notificatie, field))
+    }
+    new_values = [_is_new_value(field, value) for field, value in values]
+    if any(new_values):
+        # the notifications are only found once they are committed
+        transaction.on_commit(invalidate_facets)
+
+
+def invalidate_facets() -> None:
+    try:
+        cache.incr(FACETS_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(FACETS_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
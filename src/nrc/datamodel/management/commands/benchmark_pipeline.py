@@ -0,0 +1,328 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from nrc.api.routing import invalidate_routing
+from nrc.api.serializers import MessageSerializer
+from nrc.api.tasks import execute_notifications
+from nrc.celery import app
+
+from ...models import (
+    Abonnement,
+    Filter,
+    FilterGroup,
+    Kanaal,
+    Payload,
+    ScheduledNotification,
+)
+
+PREFIX = "benchmark"
+
+
+class CallbackServer(ThreadingHTTPServer):
+    """
+    In-process stand-in for the webhooks of the subscriptions (like
+    ``docker/python-webhook``), with a configurable latency and error rate.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float, error_rate: float):
+        super().__init__(("127.0.0.1", 0), CallbackHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        # the time (`time.monotonic`) at which the messages were published, by their
+        # resource URL
+        self.published: dict[str, float] = {}
+        self.latencies: list[float] = []
+        self.status_counts: dict[int, int] = defaultdict(int)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    server: CallbackServer
+    # keep-alive, like the webhooks of the subscriptions
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # silence default httpserver logs
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+
+        status = 500 if random.random() < self.server.error_rate else 204
+        with self.server.lock:
+            self.server.status_counts[status] += 1
+            if status == 204:
+                published = self.server.published.get(json.loads(body)["resourceUrl"])
+                if published is not None:
+                    self.server.latencies.append(time.monotonic() - published)
+
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed kanalen and abonnementen, publish notifications and deliver them to an "
+        "in-process callback server, and report the throughput, latencies and "
+        "queries of every stage. The scheduled notifications that are due are "
+        "delivered in-process, so use a dedicated database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kanalen",
+            type=int,
+            default=5,
+            help="The number of kanalen to seed",
+        )
+        parser.add_argument(
+            "--abonnementen",
+            type=int,
+            default=100,
+            help="The number of abonnementen to seed",
+        )
+        parser.add_argument(
+            "--filter-groups",
+            type=int,
+            default=2,
+            help="The number of filter groups (kanalen) per abonnement",
+        )
+        parser.add_argument(
+            "--zaaktypen",
+            type=int,
+            default=10,
+            help=(
+                "The number of distinct zaaktypen the filter groups and notifications "
+                "are spread over"
+            ),
+        )
+        parser.add_argument(
+            "--notifications",
+            type=int,
+            default=1000,
+            help="The number of notifications to publish",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="The number of seconds the callback server takes to respond",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="The ratio of callbacks that respond with an error",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=300.0,
+            help="The maximum number of seconds to deliver the notifications",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the seeded kanalen and abonnementen",
+        )
+
+    def handle(self, **options):
+        if options["notifications"] < 1:
+            raise CommandError("At least one notification should be published")
+
+        server = CallbackServer(options["latency"], options["error_rate"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        # the tasks started by `execute_notifications` are run in this process
+        always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+
+        kanalen = []
+        try:
+            kanalen = self._seed(server.url, **options)
+            self._benchmark(server, kanalen, **options)
+        finally:
+            app.conf.task_always_eager = always_eager
+            server.shutdown()
+            server.server_close()
+
+            if not options["keep"]:
+                self.stdout.write("Removing the seeded data")
+                names = [kanaal.naam for kanaal in kanalen]
+                # the filter groups and scheduled notifications are deleted in cascade
+                Abonnement.objects.filter(client_id=PREFIX).delete()
+                Kanaal.objects.filter(naam__in=names).delete()
+                Payload.objects.filter(data__kanaal__in=names).delete()
+
+    def _seed(
+        self,
+        callback_url: str,
+        kanalen: int,
+        abonnementen: int,
+        filter_groups: int,
+        zaaktypen: int,
+        **options,
+    ) -> list[Kanaal]:
+        self.stdout.write(
+            f"Seeding {kanalen} kanalen and {abonnementen} abonnementen with "
+            f"{filter_groups} filter groups each"
+        )
+        seeded_kanalen = Kanaal.objects.bulk_create(
+            Kanaal(naam=f"{PREFIX}-{i}", filters=["bron", "zaaktype"])
+            for i in range(kanalen)
+        )
+        subs = Abonnement.objects.bulk_create(
+            Abonnement(
+                callback_url=f"{callback_url}/{i}",
+                auth="Bearer benchmark",
+                client_id=PREFIX,
+            )
+            for i in range(abonnementen)
+        )
+        groups = FilterGroup.objects.bulk_create(
+            FilterGroup(abonnement=sub, kanaal=kanaal)
+            for sub in subs
+            for kanaal in random.sample(
+                seeded_kanalen, min(filter_groups, len(seeded_kanalen))
+            )
+        )
+        Filter.objects.bulk_create(
+            Filter(filter_group=group, key="zaaktype", value=get_zaaktype(zaaktypen))
+            for group in groups
+        )
+        # bulk_create does not send the signals that rebuild the routing indexes
+        invalidate_routing()
+        return seeded_kanalen
+
+    def _benchmark(
+        self,
+        server: CallbackServer,
+        kanalen: list[Kanaal],
+        notifications: int,
+        zaaktypen: int,
+        timeout: float,
+        **options,
+    ):
+        timings: dict[str, list[float]] = defaultdict(list)
+
+        self.stdout.write(f"Publishing {notifications} notifications")
+        with CaptureQueriesContext(connection) as publish_queries:
+            publish_start = time.monotonic()
+            for i in range(notifications):
+                resource_url = f"https://example.com/statussen/{i}"
+                serializer = MessageSerializer(
+                    data={
+                        "kanaal": random.choice(kanalen).naam,
+                        "source": PREFIX,
+                        "hoofd_object": f"https://example.com/zaken/{i}",
+                        "resource": "status",
+                        "resource_url": resource_url,
+                        "actie": "create",
+                        "aanmaakdatum": timezone.now(),
+                        "kenmerken": {
+                            "bron": PREFIX,
+                            "zaaktype": get_zaaktype(zaaktypen),
+                        },
+                    }
+                )
+
+                start = time.monotonic()
+                serializer.is_valid(raise_exception=True)
+                timings["validate"].append(time.monotonic() - start)
+
+                start = time.monotonic()
+                serializer._get_subs(serializer.validated_data)
+                timings["route"].append(time.monotonic() - start)
+
+                start = time.monotonic()
+                server.published[resource_url] = start
+                serializer.save()
+                timings["create"].append(time.monotonic() - start)
+            publish_duration = time.monotonic() - publish_start
+
+        scheduled = ScheduledNotification.objects.filter(sub__client_id=PREFIX)
+        deliveries = scheduled.count()
+        self.stdout.write(f"Delivering {deliveries} scheduled notifications")
+        with CaptureQueriesContext(connection) as execute_queries:
+            execute_start = deadline = time.monotonic()
+            deadline += timeout
+            while time.monotonic() < deadline and (
+                scheduled.filter(
+                    in_progress=False, execute_after__lte=timezone.now()
+                ).exists()
+            ):
+                start = time.monotonic()
+                execute_notifications()
+                timings["execute_notifications"].append(time.monotonic() - start)
+            execute_duration = time.monotonic() - execute_start
+        timings["publish to delivery"] = server.latencies
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"Published {notifications} notifications in {publish_duration:.2f} s "
+            f"({per_second(notifications, publish_duration):.1f} notifications/sec, "
+            f"{len(publish_queries) / notifications:.1f} queries per notification)"
+        )
+        delivered = len(server.latencies)
+        self.stdout.write(
+            f"Delivered {delivered} of {deliveries} scheduled notifications in "
+            f"{execute_duration:.2f} s ({per_second(delivered, execute_duration):.1f} "
+            f"deliveries/sec, {len(execute_queries)} queries), "
+            f"{scheduled.count()} not delivered"
+        )
+        self.stdout.write(
+            "Callback responses: "
+            + ", ".join(
+                f"{status}: {count}"
+                for status, count in sorted(server.status_counts.items())
+            )
+        )
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'stage (ms)':<24}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}"
+        )
+        for stage, values in timings.items():
+            if not values:
+                continue
+            p50, p95, p99 = get_percentiles(values, (50, 95, 99))
+            self.stdout.write(
+                f"{stage:<24}{len(values):>8}"
+                + "".join(
+                    f"{value * 1000:>10.2f}"
+                    for value in (statistics.fmean(values), p50, p95, p99)
+                )
+            )
+
+
+def per_second(count: int, duration: float) -> float:
+    return count / duration if duration else 0.0
+
+
+def get_zaaktype(zaaktypen: int) -> str:
+    return f"https://example.com/zaaktypen/{random.randrange(zaaktypen)}"
+
+
+def get_percentiles(values: list[float], percentiles: tuple[int, ...]) -> list[float]:
+    if len(values) == 1:
+        return [values[0]] * len(percentiles)
+
+    quantiles = statistics.quantiles(values, n=100, method="inclusive")
+    return [quantiles[percentile - 1] for percentile in percentiles]
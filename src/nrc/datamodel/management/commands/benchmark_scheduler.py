@@ -0,0 +1,157 @@
+import random
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from nrc.api.tasks import (
+    _claim_scheduled_notifications,
+    get_scheduled_notification_counts,
+)
+
+from ...models import Abonnement, NotificationTypes, Payload, ScheduledNotification
+
+EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed scheduled notifications and report the query plans and timings of the "
+        "queries of the `execute_notifications` task"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=100_000,
+            help="The number of scheduled notifications to seed",
+        )
+        parser.add_argument(
+            "--due-ratio",
+            type=float,
+            default=0.1,
+            help="The ratio of seeded scheduled notifications that should be executed",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=settings.NOTIFICATION_LIMIT,
+            help="The number of scheduled notifications to claim",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="The number of scheduled notifications to insert per query",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the seeded scheduled notifications",
+        )
+
+    def handle(self, **options):
+        sub = Abonnement.objects.create(
+            callback_url="https://benchmark.invalid/callback"
+        )
+        payload = Payload.objects.create(
+            type=NotificationTypes.notification,
+            data={"kanaal": "benchmark", "resource": "benchmark", "kenmerken": {}},
+        )
+        try:
+            self._seed(
+                sub,
+                payload,
+                options["count"],
+                options["due_ratio"],
+                options["batch_size"],
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {ScheduledNotification._meta.db_table}")
+
+            self._benchmark(options["limit"])
+        finally:
+            if not options["keep"]:
+                self.stdout.write("Removing the seeded scheduled notifications")
+                # the scheduled notifications are deleted in cascade
+                sub.delete()
+                payload.delete()
+
+    def _seed(
+        self,
+        sub: Abonnement,
+        payload: Payload,
+        count: int,
+        due_ratio: float,
+        batch_size: int,
+    ):
+        self.stdout.write(f"Seeding {count} scheduled notifications")
+        now = timezone.now()
+
+        def scheduled_notification():
+            due = random.random() < due_ratio
+            seconds = random.randint(0, 3600) if due else -random.randint(1, 86400)
+            return ScheduledNotification(
+                type=NotificationTypes.notification,
+                payload=payload,
+                execute_after=now - timedelta(seconds=seconds),
+                attempt=random.randint(1, 3),
+                sub=sub,
+            )
+
+        for start in range(0, count, batch_size):
+            ScheduledNotification.objects.bulk_create(
+                scheduled_notification() for _ in range(min(batch_size, count - start))
+            )
+
+    def _benchmark(self, limit: int):
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=settings.NOTIFICATION_REQUESTS_TIMEOUT * 10)
+
+        # capture the queries of the scheduler, without changing the data
+        with CaptureQueriesContext(connection) as context:
+            try:
+                with transaction.atomic():
+                    get_scheduled_notification_counts(now, cutoff)
+                    claimed = _claim_scheduled_notifications(limit, now, cutoff)
+                    raise Rollback
+            except Rollback:
+                pass
+
+        self.stdout.write(f"Claimed {len(claimed)} scheduled notifications\n\n")
+
+        total = 0.0
+        for query in context.captured_queries:
+            sql = query["sql"]
+            if sql.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK")):
+                continue
+
+            plan = self._explain(sql)
+            execution_time = float(EXECUTION_TIME.search(plan).group(1))
+            total += execution_time
+
+            self.stdout.write(sql)
+            self.stdout.write(plan)
+            self.stdout.write("")
+
+        self.stdout.write(self.style.SUCCESS(f"Total execution time: {total:.3f} ms"))
+
+    def _explain(self, sql: str) -> str:
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+                    plan = "\n".join(row[0] for row in cursor.fetchall())
+                raise Rollback
+        except Rollback:
+            pass
+        return plan
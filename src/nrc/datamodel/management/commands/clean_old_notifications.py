@@ -2,31 +2,112 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import models, transaction
 from django.utils import timezone
 
-from ...models import CloudEvent, Notificatie
+from ...facets import invalidate_facets
+from ...models import (
+    CloudEvent,
+    CloudEventResponse,
+    Notificatie,
+    NotificatieResponse,
+    ScheduledNotification,
+)
 
 
 class Command(BaseCommand):
+    help = (
+        "Delete the notifications and cloudevents (and their responses) that are older "
+        "than NOTIFICATION_NUMBER_OF_DAYS_RETAINED days"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="The number of notifications or cloudevents to delete per transaction",
+        )
+
     def handle(self, **options):
         date_limit = timezone.now() - timedelta(
             days=settings.NOTIFICATION_NUMBER_OF_DAYS_RETAINED
         )
+        batch_size = options["batch_size"]
 
-        notifications_filtered = Notificatie.objects.filter(
-            forwarded_msg__aanmaakdatum__lt=date_limit
-        ).delete()
+        notifications_deleted = self._delete_in_batches(
+            Notificatie.objects.filter(
+                models.Q(aanmaakdatum__lt=date_limit)
+                # the column is not filled (yet) for every notification (see
+                # migration 0038), these are found with the IS NULL part of the
+                # index and compared by their forwarded message
+                | models.Q(
+                    aanmaakdatum__isnull=True,
+                    forwarded_msg__aanmaakdatum__lt=date_limit,
+                )
+            ),
+            related=[
+                (NotificatieResponse, "notificatie"),
+                (ScheduledNotification, "notificatie"),
+            ],
+            batch_size=batch_size,
+            name="notifications",
+        )
+        # the values of the admin filters of the deleted notifications
+        if sum(notifications_deleted.values()):
+            invalidate_facets()
 
-        cloudevents_filtered = CloudEvent.objects.filter(time__lt=date_limit).delete()
+        cloudevents_deleted = self._delete_in_batches(
+            CloudEvent.objects.filter(time__lt=date_limit),
+            related=[
+                (CloudEventResponse, "cloudevent"),
+                (ScheduledNotification, "cloudevent"),
+            ],
+            batch_size=batch_size,
+            name="cloudevents",
+        )
 
         self.stdout.write(
-            str(notifications_filtered[0])
-            + " notifications have been deleted : "
-            + str(notifications_filtered[1])
+            f"{sum(notifications_deleted.values())} notifications have been deleted : "
+            f"{notifications_deleted}"
         )
-
         self.stdout.write(
-            str(cloudevents_filtered[0])
-            + " cloudevents have been deleted : "
-            + str(cloudevents_filtered[1])
+            f"{sum(cloudevents_deleted.values())} cloudevents have been deleted : "
+            f"{cloudevents_deleted}"
         )
+
+    def _delete_in_batches(
+        self,
+        queryset: models.QuerySet,
+        related: list[tuple[type[models.Model], str]],
+        batch_size: int,
+        name: str,
+    ) -> dict[str, int]:
+        """
+        Delete the objects of the queryset in batches, each in its own transaction.
+
+        The related objects are deleted with a query per model, instead of being
+        loaded by the deletion collector of Django.
+        """
+        model = queryset.model
+        deleted = {
+            label: 0
+            for label in [related_model._meta.label for related_model, _ in related]
+            + [model._meta.label]
+        }
+        ids_queryset = queryset.order_by("pk").values_list("pk", flat=True)
+
+        while ids := list(ids_queryset[:batch_size]):
+            with transaction.atomic():
+                for related_model, field in related:
+                    count, _ = related_model.objects.filter(
+                        **{f"{field}__in": ids}
+                    ).delete()
+                    deleted[related_model._meta.label] += count
+
+                count, _ = model.objects.filter(pk__in=ids).only("pk").delete()
+                deleted[model._meta.label] += count
+
+            self.stdout.write(f"Deleted {deleted[model._meta.label]} {name}")
+
+        return deleted
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+import structlog
+
+from nrc.api.dispatcher import CHANNEL
+from nrc.api.tasks import execute_notifications
+
+logger = structlog.stdlib.get_logger(__name__)
+
+# seconds to wait before reconnecting after the database connection was lost
+RECONNECT_DELAY = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the deliveries of scheduled notifications as soon as they are created, "
+        "using Postgres LISTEN/NOTIFY"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=settings.NOTIFICATION_SEC_INTERVAL,
+            help=(
+                "The number of seconds after which the scheduled notifications are "
+                "checked if no notifications were scheduled, to start the retries"
+            ),
+        )
+
+    def handle(self, **options):
+        if not settings.NOTIFICATION_DISPATCHER_ENABLED:
+            raise CommandError(
+                "The dispatcher is not notified of scheduled notifications, set "
+                "NOTIFICATION_DISPATCHER_ENABLED to use it."
+            )
+
+        logger.info("dispatcher_started", channel=CHANNEL)
+        while True:
+            try:
+                self._listen()
+                while True:
+                    execute_notifications()
+                    self._wait(options["timeout"])
+            except DatabaseError as exc:
+                logger.warning("dispatcher_connection_lost", exc_info=exc)
+                connection.close()
+                time.sleep(RECONNECT_DELAY)
+
+    def _listen(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+    def _wait(self, timeout: float) -> bool:
+        """
+        Block until notifications are scheduled, or the timeout has passed.
+
+        Returns whether notifications were scheduled.
+        """
+        pg_connection = connection.connection
+        if not any(pg_connection.notifies(timeout=timeout, stop_after=1)):
+            return False
+
+        # the notifications that were scheduled in the meantime are started together
+        for _ in pg_connection.notifies(timeout=0):
+            pass
+        return True
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0025_schedulednotification"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="schedulednotification",
+            index=models.Index(
+                condition=models.Q(("in_progress", False)),
+                fields=["execute_after"],
+                name="schednotif_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedulednotification",
+            index=models.Index(
+                condition=models.Q(("in_progress", True)),
+                fields=["execute_after"],
+                name="schednotif_in_progress_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the indexes are created without locking the table of the scheduled
+    # notifications, which is written to by every delivery
+    atomic = False
+
+    replaces = [
+        ("datamodel", "0026_schedulednotification_indexes"),
+        ("datamodel", "0027_alter_schedulednotification_indexes"),
+    ]
+
+    dependencies = [
+        ("datamodel", "0025_schedulednotification"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="schedulednotification",
+            index=models.Index(
+                condition=models.Q(("in_progress", False)),
+                fields=["execute_after", "attempt"],
+                name="schednotif_pending_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="schedulednotification",
+            index=models.Index(
+                condition=models.Q(("in_progress", True)),
+                fields=["execute_after", "attempt"],
+                name="schednotif_in_progress_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0026_schedulednotification_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="schedulednotification",
+            name="schednotif_pending_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="schedulednotification",
+            name="schednotif_in_progress_idx",
+        ),
+        migrations.AddIndex(
+            model_name="schedulednotification",
+            index=models.Index(
+                condition=models.Q(("in_progress", False)),
+                fields=["execute_after", "attempt"],
+                name="schednotif_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedulednotification",
+            index=models.Index(
+                condition=models.Q(("in_progress", True)),
+                fields=["execute_after", "attempt"],
+                name="schednotif_in_progress_idx",
+            ),
+        ),
+    ]
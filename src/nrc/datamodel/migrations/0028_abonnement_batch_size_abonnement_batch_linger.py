@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0027_alter_schedulednotification_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="abonnement",
+            name="batch_size",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                help_text="**EXPERIMENTEEL** The maximum number of cloudevents that are sent in a single request, using the batched content mode (`application/cloudevents-batch+json`). Only applies if cloudevents are sent, 1 disables batching.",
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name="batch size",
+            ),
+        ),
+        migrations.AddField(
+            model_name="abonnement",
+            name="batch_linger",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="**EXPERIMENTEEL** The number of seconds that cloudevents are held back to be sent in the same batch as the cloudevents that follow them.",
+                verbose_name="batch linger",
+            ),
+        ),
+    ]
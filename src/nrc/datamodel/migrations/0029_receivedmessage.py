@@ -0,0 +1,58 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0028_abonnement_batch_size_abonnement_batch_linger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReceivedMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("notification", "notification"),
+                            ("cloudevent", "cloudevent"),
+                        ],
+                        help_text="type of message",
+                        max_length=255,
+                        verbose_name="type",
+                    ),
+                ),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="the message as it was published",
+                        verbose_name="data",
+                    ),
+                ),
+                (
+                    "received_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="the datetime at which the message was published",
+                        verbose_name="received at",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "received message",
+                "verbose_name_plural": "received messages",
+            },
+        ),
+    ]
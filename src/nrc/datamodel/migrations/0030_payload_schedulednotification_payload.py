@@ -0,0 +1,93 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import uuid
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0029_receivedmessage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Payload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("notification", "notification"),
+                            ("cloudevent", "cloudevent"),
+                        ],
+                        help_text="type of message",
+                        max_length=255,
+                        verbose_name="type",
+                    ),
+                ),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="the contents of the message",
+                        verbose_name="data",
+                    ),
+                ),
+                (
+                    "uuid",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="the id of the cloudevent if a notification is sent as cloudevent",
+                        verbose_name="uuid",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="the datetime at which the message was scheduled",
+                        verbose_name="created at",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "payload",
+                "verbose_name_plural": "payloads",
+            },
+        ),
+        migrations.AddField(
+            model_name="schedulednotification",
+            name="payload",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="the contents of the notification",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="scheduled_notifications",
+                to="datamodel.payload",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="schedulednotification",
+            name="task_args",
+            field=models.JSONField(
+                blank=True,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                help_text="the contents of the notification, if they are not stored in a payload",
+                null=True,
+                verbose_name="task args",
+            ),
+        ),
+    ]
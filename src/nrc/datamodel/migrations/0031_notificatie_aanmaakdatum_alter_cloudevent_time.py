@@ -0,0 +1,44 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0030_payload_schedulednotification_payload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificatie",
+            name="aanmaakdatum",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="the aanmaakdatum of the forwarded message",
+                null=True,
+                verbose_name="aanmaakdatum",
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE datamodel_notificatie
+                SET aanmaakdatum = (forwarded_msg ->> 'aanmaakdatum')::timestamptz
+                WHERE jsonb_typeof(forwarded_msg) = 'object'
+                AND forwarded_msg ->> 'aanmaakdatum' ~ '^\\d{4}-\\d{2}-\\d{2}[T ]\\d{2}:\\d{2}'
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="cloudevent",
+            name="time",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="the timestamp of when the event happened",
+                null=True,
+                verbose_name="time",
+            ),
+        ),
+    ]
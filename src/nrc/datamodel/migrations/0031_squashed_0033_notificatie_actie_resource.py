@@ -0,0 +1,142 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# The columns of 0031-0033, without their indexes and without filling them, because
+# the tables can be large. The columns are filled in 0038, and indexed (concurrently)
+# in 0039. The state is the same as after 0031-0033, so the databases that already
+# applied those migrations are migrated by 0038 and 0039 as well.
+
+NOTIFICATIE_FIELDS = {
+    "aanmaakdatum": models.DateTimeField(
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="the aanmaakdatum of the forwarded message",
+        null=True,
+        verbose_name="aanmaakdatum",
+    ),
+    "actie": models.CharField(
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="the actie of the forwarded message",
+        max_length=100,
+        verbose_name="actie",
+    ),
+    "resource": models.CharField(
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="the resource of the forwarded message",
+        max_length=100,
+        verbose_name="resource",
+    ),
+}
+
+
+def summary_fields():
+    return {
+        "delivered_count": models.PositiveIntegerField(
+            default=0,
+            editable=False,
+            help_text="the number of subscriptions of which the latest delivery attempt succeeded",
+            verbose_name="delivered",
+        ),
+        "failed_count": models.PositiveIntegerField(
+            db_index=True,
+            default=0,
+            editable=False,
+            help_text="the number of subscriptions of which the latest delivery attempt failed",
+            verbose_name="failed",
+        ),
+        "pending_count": models.PositiveIntegerField(
+            default=0,
+            editable=False,
+            help_text="the number of scheduled deliveries that were not attempted yet",
+            verbose_name="pending",
+        ),
+        "last_attempt_at": models.DateTimeField(
+            blank=True,
+            db_index=True,
+            editable=False,
+            help_text="the moment the results of the latest delivery were recorded",
+            null=True,
+            verbose_name="last attempt",
+        ),
+    }
+
+
+def add_field(model_name: str, name: str, field: models.Field):
+    """
+    Add the field to the state, and only create its column.
+    """
+    column = field.clone()
+    column.db_index = False
+    return migrations.SeparateDatabaseAndState(
+        state_operations=[
+            migrations.AddField(model_name=model_name, name=name, field=field)
+        ],
+        database_operations=[
+            migrations.AddField(model_name=model_name, name=name, field=column)
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+    replaces = [
+        ("datamodel", "0031_notificatie_aanmaakdatum_alter_cloudevent_time"),
+        ("datamodel", "0032_delivery_summary"),
+        ("datamodel", "0033_notificatie_actie_resource"),
+    ]
+
+    dependencies = [
+        ("datamodel", "0030_payload_schedulednotification_payload"),
+    ]
+
+    operations = [
+        *(
+            add_field("notificatie", name, field)
+            for name, field in NOTIFICATIE_FIELDS.items()
+        ),
+        *(
+            add_field("cloudevent", name, field)
+            for name, field in summary_fields().items()
+        ),
+        *(
+            add_field("notificatie", name, field)
+            for name, field in summary_fields().items()
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="cloudevent",
+                    name="time",
+                    field=models.DateTimeField(
+                        blank=True,
+                        db_index=True,
+                        help_text="the timestamp of when the event happened",
+                        null=True,
+                        verbose_name="time",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="notificatie",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        django.contrib.postgres.indexes.OpClass(
+                            django.db.models.functions.text.Upper(
+                                django.db.models.functions.comparison.Cast(
+                                    "forwarded_msg", models.TextField()
+                                )
+                            ),
+                            name="gin_trgm_ops",
+                        ),
+                        name="notificatie_msg_trgm_idx",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+def summary_fields(model_name):
+    return [
+        migrations.AddField(
+            model_name=model_name,
+            name="delivered_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="the number of subscriptions of which the latest delivery attempt succeeded",
+                verbose_name="delivered",
+            ),
+        ),
+        migrations.AddField(
+            model_name=model_name,
+            name="failed_count",
+            field=models.PositiveIntegerField(
+                db_index=True,
+                default=0,
+                editable=False,
+                help_text="the number of subscriptions of which the latest delivery attempt failed",
+                verbose_name="failed",
+            ),
+        ),
+        migrations.AddField(
+            model_name=model_name,
+            name="pending_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="the number of scheduled deliveries that were not attempted yet",
+                verbose_name="pending",
+            ),
+        ),
+        migrations.AddField(
+            model_name=model_name,
+            name="last_attempt_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="the moment the results of the latest delivery were recorded",
+                null=True,
+                verbose_name="last attempt",
+            ),
+        ),
+    ]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0031_notificatie_aanmaakdatum_alter_cloudevent_time"),
+    ]
+
+    operations = [
+        *summary_fields("cloudevent"),
+        *summary_fields("notificatie"),
+        # the summaries of the existing messages, from their responses
+        migrations.RunSQL(
+            sql="""
+                UPDATE datamodel_notificatie AS message
+                SET delivered_count = summary.delivered, failed_count = summary.failed
+                FROM (
+                    SELECT
+                        notificatie_id,
+                        COUNT(*) FILTER (
+                            WHERE response_status >= 200 AND response_status < 300
+                        ) AS delivered,
+                        COUNT(*) FILTER (
+                            WHERE response_status IS NULL
+                            OR response_status < 200
+                            OR response_status >= 300
+                        ) AS failed
+                    FROM (
+                        SELECT DISTINCT ON (notificatie_id, abonnement_id)
+                            notificatie_id, response_status
+                        FROM datamodel_notificatieresponse
+                        ORDER BY notificatie_id, abonnement_id, attempt DESC, id DESC
+                    ) AS latest
+                    GROUP BY notificatie_id
+                ) AS summary
+                WHERE message.id = summary.notificatie_id;
+
+                UPDATE datamodel_notificatie AS message
+                SET pending_count = pending.count
+                FROM (
+                    SELECT scheduled.notificatie_id, COUNT(*) AS count
+                    FROM datamodel_schedulednotification AS scheduled
+                    WHERE scheduled.notificatie_id IS NOT NULL
+                    AND NOT EXISTS (
+                        SELECT 1 FROM datamodel_notificatieresponse AS response
+                        WHERE response.notificatie_id = scheduled.notificatie_id
+                        AND response.abonnement_id = scheduled.sub_id
+                        AND response.attempt = scheduled.attempt
+                    )
+                    GROUP BY scheduled.notificatie_id
+                ) AS pending
+                WHERE message.id = pending.notificatie_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE datamodel_cloudevent AS message
+                SET delivered_count = summary.delivered, failed_count = summary.failed
+                FROM (
+                    SELECT
+                        cloudevent_id,
+                        COUNT(*) FILTER (
+                            WHERE response_status >= 200 AND response_status < 300
+                        ) AS delivered,
+                        COUNT(*) FILTER (
+                            WHERE response_status IS NULL
+                            OR response_status < 200
+                            OR response_status >= 300
+                        ) AS failed
+                    FROM (
+                        SELECT DISTINCT ON (cloudevent_id, abonnement_id)
+                            cloudevent_id, response_status
+                        FROM datamodel_cloudeventresponse
+                        ORDER BY cloudevent_id, abonnement_id, attempt DESC, id DESC
+                    ) AS latest
+                    GROUP BY cloudevent_id
+                ) AS summary
+                WHERE message.int_id = summary.cloudevent_id;
+
+                UPDATE datamodel_cloudevent AS message
+                SET pending_count = pending.count
+                FROM (
+                    SELECT scheduled.cloudevent_id, COUNT(*) AS count
+                    FROM datamodel_schedulednotification AS scheduled
+                    WHERE scheduled.cloudevent_id IS NOT NULL
+                    AND NOT EXISTS (
+                        SELECT 1 FROM datamodel_cloudeventresponse AS response
+                        WHERE response.cloudevent_id = scheduled.cloudevent_id
+                        AND response.abonnement_id = scheduled.sub_id
+                        AND response.attempt = scheduled.attempt
+                    )
+                    GROUP BY scheduled.cloudevent_id
+                ) AS pending
+                WHERE message.int_id = pending.cloudevent_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0032_delivery_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificatie",
+            name="actie",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="the actie of the forwarded message",
+                max_length=100,
+                verbose_name="actie",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notificatie",
+            name="resource",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="the resource of the forwarded message",
+                max_length=100,
+                verbose_name="resource",
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE datamodel_notificatie
+                SET
+                    actie = LEFT(COALESCE(forwarded_msg ->> 'actie', ''), 100),
+                    resource = LEFT(COALESCE(forwarded_msg ->> 'resource', ''), 100)
+                WHERE jsonb_typeof(forwarded_msg) = 'object'
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name="notificatie",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "forwarded_msg", models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="notificatie_msg_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0033_notificatie_actie_resource"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResendJob",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("notification", "notification"),
+                            ("cloudevent", "cloudevent"),
+                        ],
+                        help_text="type of the messages",
+                        max_length=255,
+                        verbose_name="type",
+                    ),
+                ),
+                (
+                    "message_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(),
+                        help_text="the ids of the notifications or cloudevents to resend",
+                        size=None,
+                        verbose_name="message ids",
+                    ),
+                ),
+                (
+                    "only_failed",
+                    models.BooleanField(
+                        default=False,
+                        help_text="only resend the messages to the subscriptions of which the latest delivery attempt failed",
+                        verbose_name="only failed",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("running", "running"),
+                            ("finished", "finished"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "processed",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="the number of messages that were handled",
+                        verbose_name="processed",
+                    ),
+                ),
+                (
+                    "scheduled",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="the number of deliveries that were scheduled",
+                        verbose_name="scheduled",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="finished at"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "resend job",
+                "verbose_name_plural": "resend jobs",
+            },
+        ),
+    ]
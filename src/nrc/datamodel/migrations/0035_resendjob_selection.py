@@ -0,0 +1,77 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0034_resendjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="resendjob",
+            name="message_ids",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.BigIntegerField(),
+                blank=True,
+                default=list,
+                help_text="the ids of the notifications or cloudevents to resend",
+                size=None,
+                verbose_name="message ids",
+            ),
+        ),
+        migrations.AddField(
+            model_name="resendjob",
+            name="abonnement",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="only resend the messages to this subscription",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="resend_jobs",
+                to="datamodel.abonnement",
+                verbose_name="abonnement",
+            ),
+        ),
+        migrations.AddField(
+            model_name="resendjob",
+            name="start",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="only resend the messages that were created (`aanmaakdatum` or `time`) at or after this moment",
+                null=True,
+                verbose_name="start",
+            ),
+        ),
+        migrations.AddField(
+            model_name="resendjob",
+            name="end",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="only resend the messages that were created (`aanmaakdatum` or `time`) before this moment",
+                null=True,
+                verbose_name="end",
+            ),
+        ),
+        migrations.AddField(
+            model_name="resendjob",
+            name="total",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="the number of messages to resend, counted when the job starts",
+                verbose_name="total",
+            ),
+        ),
+        migrations.AddField(
+            model_name="resendjob",
+            name="last_message_id",
+            field=models.BigIntegerField(
+                default=0,
+                help_text="the id of the last message that was handled",
+                verbose_name="last message id",
+            ),
+        ),
+    ]
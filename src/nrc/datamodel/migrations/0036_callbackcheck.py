@@ -0,0 +1,59 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0035_resendjob_selection"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CallbackCheck",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "reachable",
+                    models.BooleanField(
+                        db_index=True,
+                        help_text="whether the callback URL accepted the test notification",
+                        verbose_name="reachable",
+                    ),
+                ),
+                (
+                    "response_status",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="response status"
+                    ),
+                ),
+                (
+                    "exception",
+                    models.TextField(blank=True, verbose_name="exception"),
+                ),
+                ("checked_at", models.DateTimeField(verbose_name="checked at")),
+                (
+                    "abonnement",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="callback_check",
+                        to="datamodel.abonnement",
+                        verbose_name="abonnement",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "callback check",
+                "verbose_name_plural": "callback checks",
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datamodel", "0036_callbackcheck"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resendjob",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                help_text="when the job was claimed or its progress was updated, a running job that was not updated for a while is resumed",
+                verbose_name="updated at",
+            ),
+            preserve_default=False,
+        ),
+    ]
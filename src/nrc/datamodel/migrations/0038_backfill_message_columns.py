@@ -0,0 +1,116 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.db import migrations
+
+# the number of messages (by id) that are updated per transaction, so the rows are
+# not locked for the duration of the whole backfill
+BATCH_SIZE = 10_000
+
+NOTIFICATIE_COLUMNS_SQL = """
+    UPDATE datamodel_notificatie
+    SET
+        aanmaakdatum = CASE
+            WHEN forwarded_msg ->> 'aanmaakdatum'
+                ~ '^\\d{4}-\\d{2}-\\d{2}[T ]\\d{2}:\\d{2}'
+            THEN (forwarded_msg ->> 'aanmaakdatum')::timestamptz
+        END,
+        actie = LEFT(COALESCE(forwarded_msg ->> 'actie', ''), 100),
+        resource = LEFT(COALESCE(forwarded_msg ->> 'resource', ''), 100)
+    WHERE id >= %(start)s AND id < %(end)s
+    AND jsonb_typeof(forwarded_msg) = 'object'
+"""
+
+# the summaries of the existing messages, from their responses and scheduled
+# notifications (see `nrc.api.summaries`)
+DELIVERY_COUNTS_SQL = """
+    UPDATE datamodel_{model} AS message
+    SET delivered_count = summary.delivered, failed_count = summary.failed
+    FROM (
+        SELECT
+            {model}_id,
+            COUNT(*) FILTER (
+                WHERE response_status >= 200 AND response_status < 300
+            ) AS delivered,
+            COUNT(*) FILTER (
+                WHERE response_status IS NULL
+                OR response_status < 200
+                OR response_status >= 300
+            ) AS failed
+        FROM (
+            SELECT DISTINCT ON ({model}_id, abonnement_id)
+                {model}_id, response_status
+            FROM datamodel_{model}response
+            WHERE {model}_id >= %(start)s AND {model}_id < %(end)s
+            ORDER BY {model}_id, abonnement_id, attempt DESC, id DESC
+        ) AS latest
+        GROUP BY {model}_id
+    ) AS summary
+    WHERE message.{pk} = summary.{model}_id
+"""
+
+PENDING_COUNT_SQL = """
+    UPDATE datamodel_{model} AS message
+    SET pending_count = pending.count
+    FROM (
+        SELECT scheduled.{model}_id, COUNT(*) AS count
+        FROM datamodel_schedulednotification AS scheduled
+        WHERE scheduled.{model}_id >= %(start)s AND scheduled.{model}_id < %(end)s
+        AND NOT EXISTS (
+            SELECT 1 FROM datamodel_{model}response AS response
+            WHERE response.{model}_id = scheduled.{model}_id
+            AND response.abonnement_id = scheduled.sub_id
+            AND response.attempt = scheduled.attempt
+        )
+        GROUP BY scheduled.{model}_id
+    ) AS pending
+    WHERE message.{pk} = pending.{model}_id
+"""
+
+
+def backfill(table: str, pk: str, *statements: str):
+    def run(apps, schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN({pk}), MAX({pk}) FROM {table}")
+            first, last = cursor.fetchone()
+            if first is None:
+                return
+
+            # every batch is committed separately, the migration is not atomic
+            for start in range(first, last + 1, BATCH_SIZE):
+                for sql in statements:
+                    cursor.execute(sql, {"start": start, "end": start + BATCH_SIZE})
+
+    return run
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("datamodel", "0037_resendjob_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill("datamodel_notificatie", "id", NOTIFICATIE_COLUMNS_SQL),
+            migrations.RunPython.noop,
+        ),
+        migrations.RunPython(
+            backfill(
+                "datamodel_notificatie",
+                "id",
+                DELIVERY_COUNTS_SQL.format(model="notificatie", pk="id"),
+                PENDING_COUNT_SQL.format(model="notificatie", pk="id"),
+            ),
+            migrations.RunPython.noop,
+        ),
+        migrations.RunPython(
+            backfill(
+                "datamodel_cloudevent",
+                "int_id",
+                DELIVERY_COUNTS_SQL.format(model="cloudevent", pk="int_id"),
+                PENDING_COUNT_SQL.format(model="cloudevent", pk="int_id"),
+            ),
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,198 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+# the fields that were indexed with `db_index` by 0031-0033, with their (generated)
+# index names
+INDEXED_FIELDS = [
+    (
+        "notificatie",
+        "aanmaakdatum",
+        models.DateTimeField(
+            blank=True,
+            editable=False,
+            help_text="the aanmaakdatum of the forwarded message",
+            null=True,
+            verbose_name="aanmaakdatum",
+        ),
+        ["datamodel_notificatie_aanmaakdatum_32337d79"],
+    ),
+    (
+        "notificatie",
+        "actie",
+        models.CharField(
+            blank=True,
+            editable=False,
+            help_text="the actie of the forwarded message",
+            max_length=100,
+            verbose_name="actie",
+        ),
+        [
+            "datamodel_notificatie_actie_468c58be",
+            "datamodel_notificatie_actie_468c58be_like",
+        ],
+    ),
+    (
+        "notificatie",
+        "resource",
+        models.CharField(
+            blank=True,
+            editable=False,
+            help_text="the resource of the forwarded message",
+            max_length=100,
+            verbose_name="resource",
+        ),
+        [
+            "datamodel_notificatie_resource_ecca7709",
+            "datamodel_notificatie_resource_ecca7709_like",
+        ],
+    ),
+    (
+        "notificatie",
+        "failed_count",
+        models.PositiveIntegerField(
+            default=0,
+            editable=False,
+            help_text="the number of subscriptions of which the latest delivery attempt failed",
+            verbose_name="failed",
+        ),
+        ["datamodel_notificatie_failed_count_66f47780"],
+    ),
+    (
+        "notificatie",
+        "last_attempt_at",
+        models.DateTimeField(
+            blank=True,
+            editable=False,
+            help_text="the moment the results of the latest delivery were recorded",
+            null=True,
+            verbose_name="last attempt",
+        ),
+        ["datamodel_notificatie_last_attempt_at_5162c276"],
+    ),
+    (
+        "cloudevent",
+        "time",
+        models.DateTimeField(
+            blank=True,
+            help_text="the timestamp of when the event happened",
+            null=True,
+            verbose_name="time",
+        ),
+        ["datamodel_cloudevent_time_1839e5dc"],
+    ),
+    (
+        "cloudevent",
+        "failed_count",
+        models.PositiveIntegerField(
+            default=0,
+            editable=False,
+            help_text="the number of subscriptions of which the latest delivery attempt failed",
+            verbose_name="failed",
+        ),
+        ["datamodel_cloudevent_failed_count_5c48d828"],
+    ),
+    (
+        "cloudevent",
+        "last_attempt_at",
+        models.DateTimeField(
+            blank=True,
+            editable=False,
+            help_text="the moment the results of the latest delivery were recorded",
+            null=True,
+            verbose_name="last attempt",
+        ),
+        ["datamodel_cloudevent_last_attempt_at_46e3d35f"],
+    ),
+]
+
+
+def drop_field_index(
+    model_name: str, name: str, field: models.Field, index_names: list[str]
+):
+    return migrations.SeparateDatabaseAndState(
+        state_operations=[
+            migrations.AlterField(model_name=model_name, name=name, field=field)
+        ],
+        database_operations=[
+            # one statement per index, an index can not be dropped concurrently in a
+            # transaction (block)
+            migrations.RunSQL(
+                sql=f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"',
+                reverse_sql=migrations.RunSQL.noop,
+            )
+            for index_name in index_names
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+    # the indexes are created without locking the (large) tables for writes
+    atomic = False
+
+    dependencies = [
+        ("datamodel", "0038_backfill_message_columns"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="notificatie",
+            index=models.Index(
+                fields=["aanmaakdatum"], name="notificatie_aanmaakdatum_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="notificatie",
+            index=models.Index(fields=["actie"], name="notificatie_actie_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="notificatie",
+            index=models.Index(fields=["resource"], name="notificatie_resource_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="notificatie",
+            index=models.Index(
+                fields=["failed_count"], name="notificatie_failed_count_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="notificatie",
+            index=models.Index(
+                fields=["last_attempt_at"], name="notificatie_last_attempt_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="cloudevent",
+            index=models.Index(fields=["time"], name="cloudevent_time_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="cloudevent",
+            index=models.Index(
+                fields=["failed_count"], name="cloudevent_failed_count_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="cloudevent",
+            index=models.Index(
+                fields=["last_attempt_at"], name="cloudevent_last_attempt_idx"
+            ),
+        ),
+        # requires a superuser, or a database owner on PostgreSQL 13+ (`pg_trgm` is a
+        # trusted extension); skipped if the extension was already created
+        TrigramExtension(),
+        # the index is already in the state (see 0033), and in the database if 0033
+        # was applied instead of the squashed migration
+        migrations.RunSQL(
+            sql="""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS "notificatie_msg_trgm_idx"
+                ON "datamodel_notificatie"
+                USING gin ((UPPER(("forwarded_msg")::text)) gin_trgm_ops)
+            """,
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS "notificatie_msg_trgm_idx"',
+        ),
+        # the indexes of the fields, that were created by 0031-0033 (but not by the
+        # squashed migration), are replaced by the indexes above
+        *(drop_field_index(*field) for field in INDEXED_FIELDS),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:00
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the indexes are created without locking the (large) tables for writes
+    atomic = False
+
+    dependencies = [
+        ("datamodel", "0039_message_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="notificatieresponse",
+            index=models.Index(
+                fields=["notificatie", "abonnement", "-attempt", "-id"],
+                name="notificatieresponse_latest_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="cloudeventresponse",
+            index=models.Index(
+                fields=["cloudevent", "abonnement", "-attempt", "-id"],
+                name="cloudeventresponse_latest_idx",
+            ),
+        ),
+    ]
@@ -1,13 +1,17 @@
 import uuid as _uuid
 
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.serializers.json import DjangoJSONEncoder
-from django.core.validators import RegexValidator
+from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
-from django.db.models import Max, QuerySet
+from django.db.models import Max, Q, QuerySet
+from django.db.models.functions import Cast, Upper
 from django.utils.translation import gettext_lazy as _
 
 from djangorestframework_camel_case.util import camelize
+from rest_framework.exceptions import ValidationError
 from rest_framework.fields import DateTimeField
 from simple_certmanager.models import Certificate
 from zgw_consumers.constants import AuthTypes
@@ -88,7 +92,7 @@ class Abonnement(models.Model):
         help_text=_("The client ID used to construct the JSON Web Token"),
     )
     # TODO (next major release):
-    # from nrc.api.tasks impoort service_from_abonnement
+    # from nrc.api.clients import service_from_abonnement
     #
     # Refactor Abonnement to reference a Service directly instead of instantiating
     # a temporary Service from Abonnement data.
@@ -149,6 +153,28 @@ class Abonnement(models.Model):
         ),
         default=False,
     )
+    batch_size = models.PositiveSmallIntegerField(
+        _("batch size"),
+        help_text=mark_experimental(
+            _(
+                "The maximum number of cloudevents that are sent in a single request, "
+                "using the batched content mode (`application/cloudevents-batch+json`). "
+                "Only applies if cloudevents are sent, 1 disables batching."
+            )
+        ),
+        default=1,
+        validators=[MinValueValidator(1)],
+    )
+    batch_linger = models.PositiveIntegerField(
+        _("batch linger"),
+        help_text=mark_experimental(
+            _(
+                "The number of seconds that cloudevents are held back to be sent in "
+                "the same batch as the cloudevents that follow them."
+            )
+        ),
+        default=0,
+    )
 
     class Meta:
         verbose_name = _("abonnement")
@@ -161,6 +187,10 @@ class Abonnement(models.Model):
     def kanalen(self):
         return {f.kanaal for f in self.filter_groups.all()}
 
+    @property
+    def sends_batches(self) -> bool:
+        return self.send_cloudevents and self.batch_size > 1
+
 
 class FilterGroup(models.Model):
     """
@@ -199,9 +229,92 @@ class Filter(models.Model):
         unique_together = ["filter_group", "key"]
 
 
-class Notificatie(models.Model):
+class DeliverySummary(models.Model):
+    """
+    The results of the deliveries of a message, kept up to date by the delivery
+    path (see `nrc.api.summaries`), so they can be filtered and ordered on without
+    aggregating the responses.
+    """
+
+    delivered_count = models.PositiveIntegerField(
+        _("delivered"),
+        default=0,
+        editable=False,
+        help_text=_(
+            "the number of subscriptions of which the latest delivery attempt succeeded"
+        ),
+    )
+    failed_count = models.PositiveIntegerField(
+        _("failed"),
+        default=0,
+        editable=False,
+        help_text=_(
+            "the number of subscriptions of which the latest delivery attempt failed"
+        ),
+    )
+    pending_count = models.PositiveIntegerField(
+        _("pending"),
+        default=0,
+        editable=False,
+        help_text=_("the number of scheduled deliveries that were not attempted yet"),
+    )
+    last_attempt_at = models.DateTimeField(
+        _("last attempt"),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("the moment the results of the latest delivery were recorded"),
+    )
+
+    class Meta:
+        abstract = True
+
+
+class Notificatie(DeliverySummary):
     forwarded_msg = models.JSONField(encoder=DjangoJSONEncoder)
     kanaal = models.ForeignKey(Kanaal, on_delete=models.CASCADE)
+    aanmaakdatum = models.DateTimeField(
+        _("aanmaakdatum"),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("the aanmaakdatum of the forwarded message"),
+    )
+    actie = models.CharField(
+        _("actie"),
+        max_length=100,
+        blank=True,
+        editable=False,
+        help_text=_("the actie of the forwarded message"),
+    )
+    resource = models.CharField(
+        _("resource"),
+        max_length=100,
+        blank=True,
+        editable=False,
+        help_text=_("the resource of the forwarded message"),
+    )
+
+    class Meta:
+        # the indexes are created concurrently, because of the size of the table
+        indexes = [
+            models.Index(fields=["aanmaakdatum"], name="notificatie_aanmaakdatum_idx"),
+            models.Index(fields=["actie"], name="notificatie_actie_idx"),
+            models.Index(fields=["resource"], name="notificatie_resource_idx"),
+            models.Index(fields=["failed_count"], name="notificatie_failed_count_idx"),
+            models.Index(
+                fields=["last_attempt_at"], name="notificatie_last_attempt_idx"
+            ),
+            # trigram index for the `icontains` search of the admin, which compares
+            # `UPPER("forwarded_msg"::text)`
+            GinIndex(
+                OpClass(
+                    Upper(Cast("forwarded_msg", models.TextField())),
+                    name="gin_trgm_ops",
+                ),
+                name="notificatie_msg_trgm_idx",
+            ),
+        ]
 
     @property
     def last_attempt(self):
@@ -217,6 +330,17 @@ class Notificatie(models.Model):
 
         return DateTimeField().to_internal_value(aanmaakdatum)
 
+    def save(self, *args, **kwargs):
+        # stored in columns, so the notifications can be found with the indexes
+        try:
+            self.aanmaakdatum = self.created_date
+        except (AttributeError, ValidationError):
+            self.aanmaakdatum = None
+        if isinstance(self.forwarded_msg, dict):
+            self.actie = str(self.forwarded_msg.get("actie", ""))[:100]
+            self.resource = str(self.forwarded_msg.get("resource", ""))[:100]
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"Notificatie ({self.kanaal})"
 
@@ -232,11 +356,21 @@ class NotificatieResponse(models.Model):
     exception = models.CharField(max_length=1000, blank=True)
     response_status = models.IntegerField(null=True)
 
+    class Meta:
+        indexes = [
+            # used to find the latest response per subscription for the delivery
+            # summaries (see `nrc.api.summaries`), it is created concurrently
+            models.Index(
+                fields=["notificatie", "abonnement", "-attempt", "-id"],
+                name="notificatieresponse_latest_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.abonnement} {self.response_status or self.exception}"
 
 
-class CloudEvent(models.Model):
+class CloudEvent(DeliverySummary):
     int_id = models.BigAutoField(
         primary_key=True, serialize=False, verbose_name="ID", help_text=_("internal id")
     )
@@ -301,6 +435,14 @@ class CloudEvent(models.Model):
 
     class Meta:
         unique_together = ["id", "source"]
+        # the indexes are created concurrently, because of the size of the table
+        indexes = [
+            models.Index(fields=["time"], name="cloudevent_time_idx"),
+            models.Index(fields=["failed_count"], name="cloudevent_failed_count_idx"),
+            models.Index(
+                fields=["last_attempt_at"], name="cloudevent_last_attempt_idx"
+            ),
+        ]
 
 
 class CloudEventFilterGroup(models.Model):
@@ -351,6 +493,16 @@ class CloudEventResponse(models.Model):
     exception = models.CharField(max_length=1000, blank=True)
     response_status = models.IntegerField(null=True)
 
+    class Meta:
+        indexes = [
+            # used to find the latest response per subscription for the delivery
+            # summaries (see `nrc.api.summaries`), it is created concurrently
+            models.Index(
+                fields=["cloudevent", "abonnement", "-attempt", "-id"],
+                name="cloudeventresponse_latest_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.abonnement} {self.response_status or self.exception}"
 
@@ -360,6 +512,45 @@ class NotificationTypes(models.TextChoices):
     cloudevent = "cloudevent", _("cloudevent")
 
 
+class Payload(models.Model):
+    """
+    The contents of a published message, shared by the scheduled notifications of all
+    subscriptions that receive it.
+    """
+
+    id = models.BigAutoField(
+        primary_key=True,
+        serialize=False,
+        verbose_name="ID",
+    )
+    type = models.CharField(
+        _("type"),
+        max_length=255,
+        choices=NotificationTypes,
+        help_text=_("type of message"),
+    )
+    data = models.JSONField(
+        _("data"),
+        encoder=DjangoJSONEncoder,
+        help_text=_("the contents of the message"),
+    )
+    uuid = models.UUIDField(
+        _("uuid"),
+        default=_uuid.uuid4,
+        editable=False,
+        help_text=_("the id of the cloudevent if a notification is sent as cloudevent"),
+    )
+    created_at = models.DateTimeField(
+        _("created at"),
+        auto_now_add=True,
+        help_text=_("the datetime at which the message was scheduled"),
+    )
+
+    class Meta:
+        verbose_name = _("payload")
+        verbose_name_plural = _("payloads")
+
+
 class ScheduledNotification(models.Model):
     id = models.BigAutoField(
         primary_key=True,
@@ -372,10 +563,22 @@ class ScheduledNotification(models.Model):
         choices=NotificationTypes,
         help_text=_("type of notification"),
     )
+    payload = models.ForeignKey(
+        Payload,
+        on_delete=models.CASCADE,
+        related_name="scheduled_notifications",
+        null=True,
+        blank=True,
+        help_text=_("the contents of the notification"),
+    )
     task_args = models.JSONField(
         _("task args"),
         encoder=DjangoJSONEncoder,
-        help_text=_("the contents of the notification"),
+        null=True,
+        blank=True,
+        help_text=_(
+            "the contents of the notification, if they are not stored in a payload"
+        ),
     )
     execute_after = models.DateTimeField(
         _("execute_after"),
@@ -423,6 +626,209 @@ class ScheduledNotification(models.Model):
         help_text=_("the related cloudevent"),
     )
 
+    class Meta:
+        indexes = [
+            # used to claim the scheduled notifications that should be started (in
+            # order) and to count them, without reading the rest of the table
+            models.Index(
+                fields=["execute_after", "attempt"],
+                condition=Q(in_progress=False),
+                name="schednotif_pending_idx",
+            ),
+            models.Index(
+                fields=["execute_after", "attempt"],
+                condition=Q(in_progress=True),
+                name="schednotif_in_progress_idx",
+            ),
+        ]
+
+
+class ReceivedMessage(models.Model):
+    """
+    A published notification or cloudevent that is not yet routed to the
+    subscriptions (if ``NOTIFICATION_PUBLISH_MODE`` is ``async``).
+    """
+
+    id = models.BigAutoField(
+        primary_key=True,
+        serialize=False,
+        verbose_name="ID",
+    )
+    type = models.CharField(
+        _("type"),
+        max_length=255,
+        choices=NotificationTypes,
+        help_text=_("type of message"),
+    )
+    data = models.JSONField(
+        _("data"),
+        encoder=DjangoJSONEncoder,
+        help_text=_("the message as it was published"),
+    )
+    received_at = models.DateTimeField(
+        _("received at"),
+        auto_now_add=True,
+        help_text=_("the datetime at which the message was published"),
+    )
+
+    class Meta:
+        verbose_name = _("received message")
+        verbose_name_plural = _("received messages")
+
+
+class ResendJobStatus(models.TextChoices):
+    pending = "pending", _("pending")
+    running = "running", _("running")
+    finished = "finished", _("finished")
+    failed = "failed", _("failed")
+
+
+class ResendJob(models.Model):
+    """
+    The resend of notifications or cloudevents in the background (see
+    `nrc.api.resend`).
+
+    The messages are either selected in the admin (``message_ids``), or are the ones
+    that were published in a time range and/or were sent to a subscription.
+    """
+
+    type = models.CharField(
+        _("type"),
+        max_length=255,
+        choices=NotificationTypes,
+        help_text=_("type of the messages"),
+    )
+    message_ids = ArrayField(
+        models.BigIntegerField(),
+        blank=True,
+        default=list,
+        verbose_name=_("message ids"),
+        help_text=_("the ids of the notifications or cloudevents to resend"),
+    )
+    abonnement = models.ForeignKey(
+        Abonnement,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="resend_jobs",
+        verbose_name=_("abonnement"),
+        help_text=_("only resend the messages to this subscription"),
+    )
+    start = models.DateTimeField(
+        _("start"),
+        null=True,
+        blank=True,
+        help_text=_(
+            "only resend the messages that were created (`aanmaakdatum` or `time`) "
+            "at or after this moment"
+        ),
+    )
+    end = models.DateTimeField(
+        _("end"),
+        null=True,
+        blank=True,
+        help_text=_(
+            "only resend the messages that were created (`aanmaakdatum` or `time`) "
+            "before this moment"
+        ),
+    )
+    only_failed = models.BooleanField(
+        _("only failed"),
+        default=False,
+        help_text=_(
+            "only resend the messages to the subscriptions of which the latest "
+            "delivery attempt failed"
+        ),
+    )
+    status = models.CharField(
+        _("status"),
+        max_length=20,
+        choices=ResendJobStatus,
+        default=ResendJobStatus.pending,
+    )
+    total = models.PositiveIntegerField(
+        _("total"),
+        default=0,
+        help_text=_("the number of messages to resend, counted when the job starts"),
+    )
+    processed = models.PositiveIntegerField(
+        _("processed"),
+        default=0,
+        help_text=_("the number of messages that were handled"),
+    )
+    last_message_id = models.BigIntegerField(
+        _("last message id"),
+        default=0,
+        help_text=_("the id of the last message that was handled"),
+    )
+    scheduled = models.PositiveIntegerField(
+        _("scheduled"),
+        default=0,
+        help_text=_("the number of deliveries that were scheduled"),
+    )
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    updated_at = models.DateTimeField(
+        _("updated at"),
+        auto_now=True,
+        help_text=_(
+            "when the job was claimed or its progress was updated, a running job that "
+            "was not updated for a while is resumed"
+        ),
+    )
+    finished_at = models.DateTimeField(_("finished at"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("resend job")
+        verbose_name_plural = _("resend jobs")
+
+    def __str__(self) -> str:
+        return f"{self.get_type_display()} resend ({self.created_at:%Y-%m-%d %H:%M})"
+
+    def clean(self):
+        super().clean()
+
+        if self.start and self.end and self.start >= self.end:
+            raise DjangoValidationError(
+                {"end": _("The end should be after the start.")}
+            )
+        if not (self.message_ids or self.abonnement or self.start or self.end):
+            raise DjangoValidationError(
+                _("Select the messages with a time range and/or an abonnement.")
+            )
+
+
+class CallbackCheck(models.Model):
+    """
+    The result of the latest check of the callback URL of a subscription (see
+    `nrc.api.callback_checks`).
+    """
+
+    abonnement = models.OneToOneField(
+        Abonnement,
+        on_delete=models.CASCADE,
+        related_name="callback_check",
+        verbose_name=_("abonnement"),
+    )
+    reachable = models.BooleanField(
+        _("reachable"),
+        db_index=True,
+        help_text=_("whether the callback URL accepted the test notification"),
+    )
+    response_status = models.PositiveIntegerField(
+        _("response status"),
+        null=True,
+        blank=True,
+    )
+    exception = models.TextField(_("exception"), blank=True)
+    checked_at = models.DateTimeField(_("checked at"))
+
+    class Meta:
+        verbose_name = _("callback check")
+        verbose_name_plural = _("callback checks")
+
+    def __str__(self) -> str:
+        return f"{self.abonnement} ({self.checked_at:%Y-%m-%d %H:%M})"
+
 
 def match_pattern(
     filters: QuerySet[Filter | CloudEventFilter], msg_filters: dict[str, str]
@@ -1,8 +1,12 @@
 from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
 from django.test import RequestFactory, TestCase
 
+from nrc.api.summaries import update_delivery_summaries
+
 from ..admin import NotificatieAdmin
-from ..admin_filters import ResultFilter
+from ..admin_filters import ActionFilter, ResourceFilter, ResultFilter
+from ..facets import _seen_values, add_facets, invalidate_facets
 from ..models import Notificatie
 from .factories import (
     AbonnementFactory,
@@ -27,11 +31,12 @@ class NotificatieFilterTests(TestCase):
             attempt=1,
             response_status=201,
         )
+        update_delivery_summaries(Notificatie, [notificatie.pk])
 
         request = self.factory.get("/")
         obj = self.admin.get_queryset(request).get(pk=notificatie.pk)
 
-        self.assertFalse(obj.has_failure)
+        self.assertEqual(obj.failed_count, 0)
         self.assertTrue(self.admin.result(obj))
 
     def test_get_queryset_notification_with_failures(self):
@@ -44,14 +49,15 @@ class NotificatieFilterTests(TestCase):
             attempt=1,
             response_status=500,
         )
+        update_delivery_summaries(Notificatie, [notificatie.pk])
 
         request = self.factory.get("/")
         obj = self.admin.get_queryset(request).get(pk=notificatie.pk)
 
-        self.assertTrue(obj.has_failure)
+        self.assertEqual(obj.failed_count, 1)
         self.assertFalse(self.admin.result(obj))
 
-    def test_has_failure_annotation(self):
+    def test_filter_failure(self):
         success = NotificatieFactory.create()
         failure = NotificatieFactory.create()
 
@@ -67,6 +73,7 @@ class NotificatieFilterTests(TestCase):
             abonnement=abonnement,
             response_status=500,
         )
+        update_delivery_summaries(Notificatie, [success.pk, failure.pk])
 
         request = self.factory.get("/", {"result": "failure"})
         request.GET = request.GET.copy()
@@ -83,7 +90,7 @@ class NotificatieFilterTests(TestCase):
         self.assertIn(failure, filtered)
         self.assertNotIn(success, filtered)
 
-    def test_has_succes_annotation(self):
+    def test_filter_success(self):
         success = NotificatieFactory.create()
         failure = NotificatieFactory.create()
 
@@ -99,6 +106,7 @@ class NotificatieFilterTests(TestCase):
             abonnement=abonnement,
             response_status=500,
         )
+        update_delivery_summaries(Notificatie, [success.pk, failure.pk])
 
         request = self.factory.get("/", {"result": "success"})
         request.GET = request.GET.copy()
@@ -114,3 +122,98 @@ class NotificatieFilterTests(TestCase):
 
         self.assertIn(success, filtered)
         self.assertNotIn(failure, filtered)
+
+
+class NotificatieFacetTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        # the values that were seen by other tests
+        _seen_values.clear()
+        self.addCleanup(_seen_values.clear)
+
+        self.site = AdminSite()
+        self.admin = NotificatieAdmin(Notificatie, self.site)
+        self.request = RequestFactory().get("/")
+
+    def _get_lookups(self, filter_class) -> list[str]:
+        list_filter = filter_class(self.request, {}, Notificatie, self.admin)
+        return [value for value, _ in list_filter.lookups(self.request, self.admin)]
+
+    def test_columns_of_forwarded_message(self):
+        notificatie = NotificatieFactory.create(
+            forwarded_msg={"actie": "create", "resource": "zaak"}
+        )
+
+        self.assertEqual(notificatie.actie, "create")
+        self.assertEqual(notificatie.resource, "zaak")
+
+    def test_lookups_are_cached(self):
+        NotificatieFactory.create(forwarded_msg={"actie": "create", "resource": "zaak"})
+        NotificatieFactory.create(
+            forwarded_msg={"actie": "update", "resource": "status"}
+        )
+
+        self.assertEqual(self._get_lookups(ActionFilter), ["create", "update"])
+        self.assertEqual(self._get_lookups(ResourceFilter), ["status", "zaak"])
+
+        with self.assertNumQueries(0):
+            self._get_lookups(ActionFilter)
+            self._get_lookups(ResourceFilter)
+
+    def test_new_values_invalidate_the_lookups(self):
+        NotificatieFactory.create(forwarded_msg={"actie": "create", "resource": "zaak"})
+        self._get_lookups(ActionFilter)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            add_facets(
+                [
+                    NotificatieFactory.create(
+                        forwarded_msg={"actie": "destroy", "resource": "zaak"}
+                    )
+                ]
+            )
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self._get_lookups(ActionFilter), ["create", "destroy"])
+
+    def test_known_values_do_not_invalidate_the_lookups(self):
+        notificatie = NotificatieFactory.create(
+            forwarded_msg={"actie": "create", "resource": "zaak"}
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            add_facets([notificatie])
+        self._get_lookups(ActionFilter)
+
+        with (
+            self.captureOnCommitCallbacks(execute=True) as callbacks,
+            self.assertNumQueries(0),
+        ):
+            add_facets([notificatie])
+            self._get_lookups(ActionFilter)
+
+        self.assertEqual(callbacks, [])
+
+    def test_invalidate(self):
+        self._get_lookups(ActionFilter)
+        NotificatieFactory.create(forwarded_msg={"actie": "create", "resource": "zaak"})
+
+        invalidate_facets()
+
+        self.assertEqual(self._get_lookups(ActionFilter), ["create"])
+
+    def test_filter_queryset(self):
+        create = NotificatieFactory.create(
+            forwarded_msg={"actie": "create", "resource": "zaak"}
+        )
+        update = NotificatieFactory.create(
+            forwarded_msg={"actie": "update", "resource": "zaak"}
+        )
+
+        filtered = ActionFilter(
+            self.request, {"actie": ["update"]}, Notificatie, self.admin
+        ).queryset(self.request, Notificatie.objects.all())
+
+        self.assertIn(update, filtered)
+        self.assertNotIn(create, filtered)
@@ -1,11 +1,12 @@
+from unittest.mock import patch
+
 from django.test import override_settings, tag
 from django.urls import reverse, reverse_lazy
 
-import requests_mock
+import httpx
 from django_webtest import WebTest
 from freezegun import freeze_time
 from maykin_2fa.test import disable_admin_mfa
-from requests.exceptions import RequestException
 
 from nrc.accounts.tests.factories import SuperUserFactory, UserFactory
 from nrc.datamodel.tests.factories import (
@@ -16,10 +17,29 @@ from nrc.datamodel.tests.factories import (
 )
 
 
+def callback_handler(request: httpx.Request) -> httpx.Response:
+    match request.url.host:
+        case "reachable.local":
+            return httpx.Response(204)
+        case "unreachable.local":
+            return httpx.Response(403)
+    raise httpx.ConnectError("connection refused")
+
+
+def mock_async_client(handler):
+    async_client = httpx.AsyncClient
+
+    def build_client(**kwargs):
+        return async_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    return patch("nrc.api.callback_checks.httpx.AsyncClient", side_effect=build_client)
+
+
 @disable_admin_mfa()
 @freeze_time("2022-01-01T12:00:00")
 @override_settings(
     LOG_NOTIFICATIONS_IN_DB=True,
+    CELERY_TASK_ALWAYS_EAGER=True,
 )
 class AbonnementAdminWebTest(WebTest):
     maxdiff = None
@@ -80,7 +100,7 @@ class AbonnementAdminWebTest(WebTest):
         self.assertNotIn("Notificatie response", deleted_objects)
 
     @tag("gh-108")
-    @requests_mock.Mocker()
+    @mock_async_client(callback_handler)
     def test_abonnement_list_check_if_callback_urls_are_reachable(self, m):
         """
         Test that the callback URL statuses can be checked by using the admin action
@@ -104,10 +124,6 @@ class AbonnementAdminWebTest(WebTest):
             auth="Token 4321",
         )
 
-        m.post("http://reachable.local/foo", status_code=204)
-        m.post("http://unreachable.local/foo", status_code=403)
-        m.post("http://incorrect.auth.local/foo", exc=RequestException)
-
         response = self.app.get(self.changelist_url, user=self.user)
 
         row_incorrect_auth, row_unreachable, row_unreachable2, row_reachable = (
@@ -155,7 +171,9 @@ class AbonnementAdminWebTest(WebTest):
             abonnement_url_incorrect_auth.pk,
         ]
 
-        response = form.submit().follow()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = form.submit()
+        response = response.follow()
 
         row_incorrect_auth, row_unreachable, row_unreachable2, row_reachable = (
             response.html.find("tbody").find_all("tr")
@@ -228,7 +246,7 @@ class AbonnementAdminWebTest(WebTest):
             )
 
     @tag("gh-108")
-    @requests_mock.Mocker()
+    @mock_async_client(callback_handler)
     def test_abonnement_list_check_if_callback_urls_are_reachable_with_custom_button(
         self, m
     ):
@@ -255,10 +273,6 @@ class AbonnementAdminWebTest(WebTest):
             auth="Token 4321",
         )
 
-        m.post("http://reachable.local/foo", status_code=204)
-        m.post("http://unreachable.local/foo", status_code=403)
-        m.post("http://incorrect.auth.local/foo", exc=RequestException)
-
         response = self.app.get(self.changelist_url, user=self.user)
 
         row_incorrect_auth, row_unreachable, row_unreachable2, row_reachable = (
@@ -298,11 +312,13 @@ class AbonnementAdminWebTest(WebTest):
                 row_reachable.find_all("td")[2].find("img").attrs["alt"], "None"
             )
 
-        response = self.app.get(
-            self.action_url,
-            user=self.user,
-            headers={"Referer": str(self.changelist_url)},
-        ).follow()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.app.get(
+                self.action_url,
+                user=self.user,
+                headers={"Referer": str(self.changelist_url)},
+            )
+        response = response.follow()
 
         row_incorrect_auth, row_unreachable, row_unreachable2, row_reachable = (
             response.html.find("tbody").find_all("tr")
@@ -27,6 +27,7 @@ from nrc.datamodel.tests.factories import (
 @freeze_time("2022-01-01T12:00:00")
 @override_settings(
     LOG_NOTIFICATIONS_IN_DB=True,
+    CELERY_TASK_ALWAYS_EAGER=True,
 )
 class CloudEventAdminWebTest(WebTest):
     maxdiff = None
@@ -81,7 +82,7 @@ class CloudEventAdminWebTest(WebTest):
         self.assertEqual(scheduled_notif.type, NotificationTypes.cloudevent)
         self.assertEqual(scheduled_notif.attempt, 1)
         self.assertEqual(
-            scheduled_notif.task_args,
+            scheduled_notif.payload.data,
             self.event
             | {
                 "time": self.event["time"].strftime("%Y-%m-%dT%H:%M:%SZ"),
@@ -119,7 +120,7 @@ class CloudEventAdminWebTest(WebTest):
         self.assertEqual(scheduled_notif.type, NotificationTypes.cloudevent)
         self.assertEqual(scheduled_notif.attempt, 2)
         self.assertEqual(
-            scheduled_notif.task_args,
+            scheduled_notif.payload.data,
             self.event
             | {
                 "time": self.event["time"].strftime("%Y-%m-%dT%H:%M:%SZ"),
@@ -152,7 +153,9 @@ class CloudEventAdminWebTest(WebTest):
         form["action"] = "resend_cloudevents"
         form["_selected_action"] = [cloudevent1.pk, cloudevent2.pk]
 
-        response = form.submit()
+        # the resend job is started when the transaction is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            response = form.submit()
 
         self.assertEqual(response.status_code, 302)
 
@@ -1,5 +1,6 @@
 import json
 from collections import OrderedDict
+from unittest.mock import patch
 
 from django.test import override_settings
 from django.urls import reverse
@@ -14,6 +15,7 @@ from nrc.datamodel.models import (
     Notificatie,
     NotificatieResponse,
     NotificationTypes,
+    ResendJob,
     ScheduledNotification,
 )
 from nrc.datamodel.tests.factories import (
@@ -29,6 +31,7 @@ from nrc.datamodel.tests.factories import (
 @freeze_time("2022-01-01T12:00:00")
 @override_settings(
     LOG_NOTIFICATIONS_IN_DB=True,
+    CELERY_TASK_ALWAYS_EAGER=True,
 )
 class NotificationAdminWebTest(WebTest):
     maxdiff = None
@@ -100,7 +103,7 @@ class NotificationAdminWebTest(WebTest):
         self.assertEqual(scheduled_notif.type, NotificationTypes.notification)
         self.assertEqual(scheduled_notif.attempt, 1)
         self.assertEqual(
-            scheduled_notif.task_args,
+            scheduled_notif.payload.data,
             self.forwarded_msg
             | {
                 "aanmaakdatum": self.forwarded_msg["aanmaakdatum"].strftime(
@@ -140,7 +143,7 @@ class NotificationAdminWebTest(WebTest):
         self.assertEqual(scheduled_notif.type, NotificationTypes.notification)
         self.assertEqual(scheduled_notif.attempt, 2)
         self.assertEqual(
-            scheduled_notif.task_args,
+            scheduled_notif.payload.data,
             self.forwarded_msg
             | {
                 "aanmaakdatum": self.forwarded_msg["aanmaakdatum"].strftime(
@@ -175,7 +178,9 @@ class NotificationAdminWebTest(WebTest):
         form["action"] = "resend_notifications"
         form["_selected_action"] = [notificatie1.pk, notificatie2.pk]
 
-        response = form.submit()
+        # the resend job is started when the transaction is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            response = form.submit()
 
         self.assertEqual(response.status_code, 302)
 
@@ -192,6 +197,26 @@ class NotificationAdminWebTest(WebTest):
         notificatie3.refresh_from_db()
         self.assertEqual(notificatie3.notificatieresponse_set.count(), 1)
 
+    @patch("nrc.datamodel.admin.MAX_SELECTED_MESSAGES", 1)
+    def test_resend_notification_action_too_many_selected(self):
+        notificaties = NotificatieFactory.create_batch(
+            2, forwarded_msg=self.forwarded_msg
+        )
+
+        response = self.app.get(
+            reverse("admin:datamodel_notificatie_changelist"),
+            user=self.user,
+        )
+
+        form = response.forms["changelist-form"]
+        form["action"] = "resend_notifications"
+        form["_selected_action"] = [notificatie.pk for notificatie in notificaties]
+
+        response = form.submit().follow()
+
+        self.assertFalse(ResendJob.objects.exists())
+        self.assertContains(response, "At most 1 messages can be resent at once.")
+
     def test_create_notification_as_cloudevent(self):
         response = self.app.get(
             reverse("admin:datamodel_notificatie_add"), user=self.user
@@ -216,7 +241,7 @@ class NotificationAdminWebTest(WebTest):
         self.assertEqual(scheduled_notif.type, NotificationTypes.notification)
         self.assertEqual(scheduled_notif.attempt, 1)
         self.assertEqual(
-            scheduled_notif.task_args,
+            scheduled_notif.payload.data,
             self.forwarded_msg
             | {
                 "aanmaakdatum": self.forwarded_msg["aanmaakdatum"].strftime(
@@ -251,7 +276,7 @@ class NotificationAdminWebTest(WebTest):
         self.assertEqual(scheduled_notif.type, NotificationTypes.notification)
         self.assertEqual(scheduled_notif.attempt, 2)
         self.assertEqual(
-            scheduled_notif.task_args,
+            scheduled_notif.payload.data,
             self.forwarded_msg
             | {
                 "aanmaakdatum": self.forwarded_msg["aanmaakdatum"].strftime(
@@ -283,7 +308,9 @@ class NotificationAdminWebTest(WebTest):
         form["action"] = "resend_notifications"
         form["_selected_action"] = [notificatie1.pk, notificatie2.pk]
 
-        response = form.submit()
+        # the resend job is started when the transaction is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            response = form.submit()
 
         self.assertEqual(response.status_code, 302)
 
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from nrc.api.clients import client_cache
+from nrc.datamodel.models import Abonnement, Kanaal, Payload, ScheduledNotification
+
+
+class BenchmarkPipelineTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(cache.clear)
+        self.addCleanup(client_cache.clear)
+
+    def test_benchmark(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_pipeline",
+            kanalen=1,
+            abonnementen=5,
+            filter_groups=1,
+            zaaktypen=1,
+            notifications=4,
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("Published 4 notifications", output)
+        self.assertIn("Delivered 20 of 20 scheduled notifications", output, msg=output)
+        self.assertIn("0 not delivered", output)
+        self.assertIn("Callback responses: 204: 20", output)
+        for stage in ("validate", "route", "create", "publish to delivery"):
+            self.assertIn(stage, output)
+        self.assertFalse(Abonnement.objects.exists())
+        self.assertFalse(Kanaal.objects.exists())
+        self.assertFalse(Payload.objects.exists())
+        self.assertFalse(ScheduledNotification.objects.exists())
+
+    def test_failing_callbacks(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_pipeline",
+            kanalen=1,
+            abonnementen=2,
+            filter_groups=1,
+            zaaktypen=1,
+            notifications=1,
+            error_rate=1,
+            keep=True,
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("Delivered 0 of 2 scheduled notifications", output)
+        self.assertIn("2 not delivered", output)
+        self.assertIn("Callback responses: 500: 2", output)
+        self.assertEqual(ScheduledNotification.objects.count(), 2)
+
+    def test_no_notifications(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_pipeline", notifications=0, stdout=StringIO())
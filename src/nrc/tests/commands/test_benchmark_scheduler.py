@@ -0,0 +1,36 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from nrc.datamodel.models import Abonnement, ScheduledNotification
+
+
+class BenchmarkSchedulerTests(TestCase):
+    def test_benchmark(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_scheduler",
+            count=100,
+            due_ratio=1,
+            limit=10,
+            batch_size=30,
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("Seeding 100 scheduled notifications", output)
+        self.assertIn("Claimed 10 scheduled notifications", output)
+        self.assertIn("Total execution time", output)
+        self.assertEqual(output.count("Execution Time"), 3)
+        self.assertFalse(ScheduledNotification.objects.exists())
+        self.assertFalse(Abonnement.objects.exists())
+
+    def test_keep_seeded_scheduled_notifications(self):
+        call_command("benchmark_scheduler", count=20, keep=True, stdout=StringIO())
+
+        self.assertEqual(ScheduledNotification.objects.count(), 20)
+        self.assertFalse(
+            ScheduledNotification.objects.filter(in_progress=True).exists()
+        )
@@ -1,15 +1,20 @@
 from datetime import datetime, timedelta
+from io import StringIO
 
 from django.core.management import call_command
 from django.test import TestCase, override_settings
+from django.utils import timezone
 
 from nrc.datamodel.models import (
     CloudEvent,
     CloudEventResponse,
     Notificatie,
     NotificatieResponse,
+    NotificationTypes,
+    ScheduledNotification,
 )
 from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
     CloudEventFactory,
     CloudEventResponseFactory,
     KanaalFactory,
@@ -112,3 +117,73 @@ class CleanOldNotificationsTests(TestCase):
         self.assertEqual(
             CloudEventResponse.objects.first(), self.cloudevent_response_in_month
         )
+
+    def test_aanmaakdatum_is_stored(self):
+        self.assertIsNotNone(self.notif_out_month.aanmaakdatum)
+        self.assertEqual(
+            Notificatie.objects.get(
+                aanmaakdatum__lt=timezone.now() - timedelta(days=30)
+            ),
+            self.notif_out_month,
+        )
+
+    def test_notifications_without_aanmaakdatum_are_deleted(self):
+        # not filled by the migration (yet)
+        Notificatie.objects.update(aanmaakdatum=None)
+
+        call_command("clean_old_notifications", stdout=StringIO())
+
+        self.assertEqual(list(Notificatie.objects.all()), [self.notif_in_month])
+
+    def test_scheduled_notifications_are_deleted(self):
+        sub = AbonnementFactory.create()
+        for notificatie, cloudevent in [
+            (self.notif_in_month, self.cloudevent_in_month),
+            (self.notif_out_month, self.cloudevent_out_month),
+        ]:
+            ScheduledNotification.objects.create(
+                type=NotificationTypes.notification,
+                task_args={},
+                execute_after=timezone.now(),
+                sub=sub,
+                notificatie=notificatie,
+            )
+            ScheduledNotification.objects.create(
+                type=NotificationTypes.cloudevent,
+                task_args={},
+                execute_after=timezone.now(),
+                sub=sub,
+                cloudevent=cloudevent,
+            )
+
+        call_command("clean_old_notifications", stdout=StringIO())
+
+        self.assertCountEqual(
+            ScheduledNotification.objects.values_list("notificatie", "cloudevent"),
+            [(self.notif_in_month.pk, None), (None, self.cloudevent_in_month.pk)],
+        )
+
+    def test_objects_are_deleted_in_batches(self):
+        out_month = timezone.now() - timedelta(days=35)
+        notifs = NotificatieFactory.create_batch(
+            2, forwarded_msg={"aanmaakdatum": out_month.isoformat()}
+        )
+        for notif in notifs:
+            NotificatieResponseFactory.create(notificatie=notif)
+        CloudEventFactory.create_batch(2, time=out_month)
+        stdout = StringIO()
+
+        call_command("clean_old_notifications", batch_size=1, stdout=stdout)
+
+        self.assertEqual(list(Notificatie.objects.all()), [self.notif_in_month])
+        self.assertEqual(
+            list(NotificatieResponse.objects.all()), [self.notif_response_in_month]
+        )
+        self.assertEqual(list(CloudEvent.objects.all()), [self.cloudevent_in_month])
+        self.assertEqual(
+            list(CloudEventResponse.objects.all()),
+            [self.cloudevent_response_in_month],
+        )
+        output = stdout.getvalue()
+        self.assertIn("Deleted 3 notifications", output)
+        self.assertIn("Deleted 3 cloudevents", output)
@@ -0,0 +1,96 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from nrc.api.dispatcher import notify_dispatcher
+from nrc.api.serializers import MessageSerializer
+from nrc.datamodel.management.commands.run_dispatcher import Command
+from nrc.datamodel.tests.factories import (
+    AbonnementFactory,
+    FilterGroupFactory,
+    KanaalFactory,
+)
+
+MSG = {
+    "kanaal": "zaken",
+    "source": "zaken.maykin.nl",
+    "hoofdObject": "https://example.com/zrc/api/v1/zaken/d7a22",
+    "resource": "status",
+    "resourceUrl": "https://example.com/zrc/api/v1/statussen/d7a22/721c9",
+    "actie": "create",
+    "aanmaakdatum": datetime(2025, 1, 1, 12, 0, 0),
+    "kenmerken": {},
+}
+
+
+@override_settings(NOTIFICATION_DISPATCHER_ENABLED=True)
+class RunDispatcherTests(TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.command = Command()
+        self.command._listen()
+
+        def unlisten():
+            with connection.cursor() as cursor:
+                cursor.execute("UNLISTEN *")
+
+        self.addCleanup(unlisten)
+
+    def test_wakes_up_when_notifications_are_scheduled(self):
+        self.assertFalse(self.command._wait(timeout=0.1))
+
+        for _ in range(3):
+            notify_dispatcher()
+
+        self.assertTrue(self.command._wait(timeout=5))
+        # the notifications are handled together
+        self.assertFalse(self.command._wait(timeout=0.1))
+
+    @override_settings(NOTIFICATION_DISPATCHER_ENABLED=False)
+    def test_disabled(self):
+        notify_dispatcher()
+
+        self.assertFalse(self.command._wait(timeout=0.1))
+        with self.assertRaises(CommandError):
+            call_command("run_dispatcher")
+
+    @patch("nrc.datamodel.management.commands.run_dispatcher.execute_notifications")
+    def test_starts_deliveries_after_wake_up(self, mock_execute_notifications):
+        with (
+            patch.object(Command, "_listen"),
+            patch.object(Command, "_wait", side_effect=[True, KeyboardInterrupt]),
+            self.assertRaises(KeyboardInterrupt),
+        ):
+            call_command("run_dispatcher", timeout=1)
+
+        self.assertEqual(mock_execute_notifications.call_count, 2)
+
+
+class NotifyDispatcherTests(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        kanaal = KanaalFactory.create(naam="zaken")
+        FilterGroupFactory.create(kanaal=kanaal, abonnement=AbonnementFactory.create())
+
+    def _get_notify_queries(self) -> list[str]:
+        with CaptureQueriesContext(connection) as context:
+            MessageSerializer().create(MSG.copy())
+
+        return [
+            query["sql"]
+            for query in context.captured_queries
+            if "pg_notify" in query["sql"]
+        ]
+
+    @override_settings(NOTIFICATION_DISPATCHER_ENABLED=True)
+    def test_scheduling_notifies_dispatcher(self):
+        self.assertEqual(len(self._get_notify_queries()), 1)
+
+    def test_dispatcher_disabled(self):
+        self.assertEqual(self._get_notify_queries(), [])